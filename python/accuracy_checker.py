@@ -4,20 +4,19 @@ Error fixed: 'achieved_daily' → 'achieved_daily_avg'
 Added caching and performance optimizations
 """
 
-import pickle
 import numpy as np
 import random
 import time
 from models.data_preprocessor import DataPreprocessor
 from models.genetic_algorithm import MealPlanGeneticAlgorithm
-from config import SCALER_SAVE_PATH, DEFAULT_DAYS, NUTRITION_COLS
+from models.restriction_index import restriction_profile_key
+from config import DEFAULT_DAYS, NUTRITION_COLS
 import hashlib
 
 # ----------------------------- CONFIG -----------------------------
 NUM_TEST_CASES = 20
 DAYS = 7
 GOALS = ['Lose Weight', 'Build Muscle', 'Gain Weight', 'Maintain Weight']
-CACHE = {}  # Simple in-memory cache for valid meal indices
 # -----------------------------------------------------------------
 
 def calculate_target_nutrition(calories, goal):
@@ -46,19 +45,15 @@ def compute_accuracy(achieved_daily_avg, target_daily):
     return accuracies
 
 def get_cache_key(dietary_restrictions):
-    return hashlib.md5(str(dietary_restrictions).encode()).hexdigest()[:8]
+    # Same canonical profile the GA's valid-meal cache is keyed on
+    return hashlib.md5(str(restriction_profile_key(dietary_restrictions)).encode()).hexdigest()[:8]
 
 def main():
     print("Loading data and model...\n")
 
     preprocessor = DataPreprocessor()
-    df = preprocessor.load_data()
-    df, _, _, _ = preprocessor.preprocess_data()
-
-    with open(SCALER_SAVE_PATH, 'rb') as f:
-        scaler_data = pickle.load(f)
-    scaler = scaler_data['scaler']
-    scaler_columns = scaler_data['columns']
+    df, scaler, _, _ = preprocessor.load_or_build_catalog()
+    scaler_columns = NUTRITION_COLS
 
     ga = MealPlanGeneticAlgorithm(df)
     ga.scaler = scaler
@@ -147,6 +142,8 @@ def main():
     overall_avg = np.mean([np.mean(v) for v in all_accuracies.values()])
     avg_time = total_time / NUM_TEST_CASES
     print(f"\nOverall Accuracy: {overall_avg:.2f}% | Avg Time/Plan: {avg_time:.1f}s")
+    cache_stats = ga.valid_meals_cache.stats()
+    print(f"Valid-meal cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
 
     if overall_avg >= 90:
         print("✅ EXCELLENT - Production Ready!")
@@ -3,34 +3,89 @@
 from flask import Flask, request, jsonify
 from models.genetic_algorithm import MealPlanGeneticAlgorithm
 from models.data_preprocessor import DataPreprocessor
-import pickle
+from models.catalog import MealCatalog
+from models.restriction_index import restriction_profile_key
+from models.cache import LRUCache, DiskCache, TieredCache
+from models.jobs import JobManager, JobQueueFull
+from models.solvers import Planner, SOLVER_NAMES
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
 from config import (
-    SCALER_SAVE_PATH,
     DEFAULT_DAYS,
-    NUTRITION_COLS,
     PORTION_MULTIPLIERS,
-    MEAL_TYPES
+    MEAL_TYPES,
+    CACHE_DIR,
+    PLAN_CACHE_ENABLED,
+    PLAN_CACHE_CALORIE_GRANULARITY,
+    PLAN_CACHE_SIZE,
+    PLAN_CACHE_TTL,
+    PLAN_CACHE_DISK,
+    JOB_MAX_WAIT,
+    SOLVER_ENGINE,
+    ADMIN_TOKEN
 )
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000"])
 
-# Load data and initialize once at startup
+# Map the compiled catalog at startup. Its numeric arrays are read-only
+# memory maps, so pre-forked workers (and the GA's island processes) share
+# one copy of them instead of each holding a DataFrame.
 preprocessor = DataPreprocessor()
-df = preprocessor.load_data()
-df, _, _, _ = preprocessor.preprocess_data()
 
-# Load scaler with columns
-with open(SCALER_SAVE_PATH, 'rb') as f:
-    scaler_data = pickle.load(f)
-    scaler = scaler_data['scaler']
-    scaler_columns = scaler_data['columns']
 
-# Initialize GA and inject scaler
-ga = MealPlanGeneticAlgorithm(df)
-ga.scaler = scaler  # for denormalization
-ga.nutrition_cols = scaler_columns
+class CatalogSnapshot:
+    """A catalog version together with the GA and planner over it.
+
+    Requests take the current snapshot once and use it throughout, so a
+    catalog update swapping in a new snapshot never changes the meals under
+    a request that is already running.
+    """
+
+    def __init__(self, catalog, ga):
+        self.catalog = catalog
+        self.ga = ga
+        self.planner = Planner(ga)
+        # Cached plans are only valid for the catalog version they were generated from
+        self.version = catalog.fingerprint
+
+
+# Nutrition in the catalog is already denormalized, so the GA needs no scaler
+_catalog = preprocessor.load_mapped_catalog()
+snapshot = CatalogSnapshot(_catalog, MealPlanGeneticAlgorithm(_catalog))
+snapshot_lock = threading.Lock()
+
+
+def current_snapshot():
+    """The snapshot to serve a request from, switching first if the catalog was updated
+    (possibly by another worker process)."""
+    global snapshot
+    directory = preprocessor.current_catalog_dir()
+    if directory != snapshot.catalog.directory:
+        with snapshot_lock:
+            if directory != snapshot.catalog.directory:
+                try:
+                    catalog = MealCatalog(directory)
+                except OSError as e:
+                    # The pointer names a catalog that is gone (say, another process rebuilt
+                    # the artifact); the mapped snapshot keeps working until a restart
+                    print(f"Warning: could not open catalog {directory} ({e}), keeping {snapshot.catalog.directory}")
+                    return snapshot
+                snapshot = CatalogSnapshot(catalog, snapshot.ga.with_catalog(catalog))
+    return snapshot
+
+
+plan_cache = TieredCache(
+    LRUCache(max_size=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL),
+    DiskCache(os.path.join(CACHE_DIR, 'plans'), max_size=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL)
+    if PLAN_CACHE_DISK else None
+)
+
+jobs = JobManager()
 
 
 def calculate_target_nutrition(user_data):
@@ -56,110 +111,268 @@ def calculate_target_nutrition(user_data):
     }
 
 
-@app.route('/generate-meal-plan', methods=['POST'])
-def generate_meal_plan():
-    try:
-        user_data = request.json
-
-        days = user_data.get('days', DEFAULT_DAYS)
-
-        # Build dietary restrictions dictionary
-        dietary_restrictions = {
-            'vegetarian': user_data.get('dietType') == 'Vegetarian',
-            'vegan': user_data.get('dietType') == 'Vegan',
-            'keto': user_data.get('dietType') == 'Keto',
-            'paleo': user_data.get('dietType') == 'Paleo',
-            'gluten_free': user_data.get('dietType') == 'Gluten Free',
-            'mediterranean': user_data.get('dietType') == 'Mediterranean',
-            'allergies': [a.lower() for a in user_data.get('allergies', [])],
-            'health_risks': user_data.get('healthRisks', [])
-        }
+def build_dietary_restrictions(user_data):
+    """Build the GA restriction dictionary from the request payload."""
+    return {
+        'vegetarian': user_data.get('dietType') == 'Vegetarian',
+        'vegan': user_data.get('dietType') == 'Vegan',
+        'keto': user_data.get('dietType') == 'Keto',
+        'paleo': user_data.get('dietType') == 'Paleo',
+        'gluten_free': user_data.get('dietType') == 'Gluten Free',
+        'mediterranean': user_data.get('dietType') == 'Mediterranean',
+        'allergies': [a.lower() for a in user_data.get('allergies', [])],
+        'health_risks': user_data.get('healthRisks', [])
+    }
 
-        target_nutrition = calculate_target_nutrition(user_data)
 
-        # Run the genetic algorithm
-        best_solution = ga.evolve(target_nutrition, dietary_restrictions, days)
+def bucket_calories(calories):
+    """Round a calorie target to PLAN_CACHE_CALORIE_GRANULARITY so near-identical requests share a plan."""
+    if not PLAN_CACHE_ENABLED or not PLAN_CACHE_CALORIE_GRANULARITY:
+        return calories
+    return int(round(calories / PLAN_CACHE_CALORIE_GRANULARITY) * PLAN_CACHE_CALORIE_GRANULARITY)
 
-        # best_solution is now a FLAT list of meal indices:
-        # [breakfast_day1, lunch_day1, dinner_day1, breakfast_day2, ...]
 
-        meal_plan = []
-        meal_index = 0  # pointer into the flat list
+def plan_cache_key(user_data, dietary_restrictions, days, catalog_version):
+    """Normalized request key: catalog version, bucketed calories, goal, canonical restrictions, day count and solver."""
+    return (
+        catalog_version,
+        bucket_calories(user_data['adjustedCalories']),
+        user_data['goal'],
+        restriction_profile_key(dietary_restrictions),
+        days,
+        user_data.get('solver', SOLVER_ENGINE)
+    )
 
-        for day_idx in range(days):
-            daily = {
-                'day': day_idx + 1,
-                'meals': [],
-                'totalNutrition': {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
-            }
 
-            for meal_type in MEAL_TYPES:  # ['breakfast', 'lunch', 'dinner']
-                if meal_index >= len(best_solution):
-                    raise ValueError("Best solution length mismatch - not enough meals generated.")
-
-                meal_idx = best_solution[meal_index]
-                meal = df.iloc[meal_idx]
-
-                # Denormalize nutrition values
-                vals = meal[scaler_columns].values.reshape(1, -1)
-                denorm = scaler.inverse_transform(vals)[0]
-                nutrition_dict = dict(zip(scaler_columns, denorm))
-
-                # Apply portion multiplier for realistic serving size
-                multiplier = PORTION_MULTIPLIERS.get(meal_type, 1.0)
-                scaled_nutrition = {k: v * multiplier for k, v in nutrition_dict.items()}
-
-                cal = scaled_nutrition['calories']
-                pro = scaled_nutrition['protein']
-                fat = scaled_nutrition['fat']
-                carb = scaled_nutrition['carbs']
-
-                # Accumulate daily totals
-                daily['totalNutrition']['calories'] += cal
-                daily['totalNutrition']['protein'] += pro
-                daily['totalNutrition']['fat'] += fat
-                daily['totalNutrition']['carbs'] += carb
-
-                # Build meal object for frontend
-                meal_data = {
-                    'meal_name': meal['meal_name'],
-                    'calories': round(cal, 1),
-                    'protein': round(pro, 1),
-                    'fat': round(fat, 1),
-                    'carbs': round(carb, 1),
-                    'image_url': meal.get('image_url', ''),
-                    'vitamins': meal.get('vitamins', ''),
-                    'ingredients': meal['ingredients'].split(', ') if isinstance(meal.get('ingredients'), str) else [],
-                    'sodium': round(scaled_nutrition.get('sodium_mg', 0), 1),
-                    'sugar': round(scaled_nutrition.get('sugar_g', 0), 1),
-                    'fiber': round(scaled_nutrition.get('fiber_g', 0), 1),
-                    'cholesterol': round(scaled_nutrition.get('cholesterol_mg', 0), 1),
-                    'portion_size_g': round(100 * multiplier, 0)
-                }
-
-                daily['meals'].append({meal_type: meal_data})
-                meal_index += 1
-
-            # Round daily totals
-            for key in daily['totalNutrition']:
-                daily['totalNutrition'][key] = round(daily['totalNutrition'][key], 1)
-
-            meal_plan.append(daily)
-
-        # Overall summary
-        totals = [d['totalNutrition'] for d in meal_plan]
-        nutrition_summary = {
-            'avgCalories': round(sum(t['calories'] for t in totals) / days, 1),
-            'avgProtein': round(sum(t['protein'] for t in totals) / days, 1),
-            'avgFat': round(sum(t['fat'] for t in totals) / days, 1),
-            'avgCarbs': round(sum(t['carbs'] for t in totals) / days, 1),
-            'totalDays': days
+def build_meal_plan_response(best_solution, days, catalog):
+    """Turn the GA's list of {'breakfast','lunch','dinner'} day dicts into the API response."""
+    if len(best_solution) < days:
+        raise ValueError("Best solution length mismatch - not enough days generated.")
+
+    nutrition_matrix = catalog.nutrition_matrix
+    meal_plan = []
+
+    for day_idx in range(days):
+        daily = {
+            'day': day_idx + 1,
+            'meals': [],
+            'totalNutrition': {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
         }
 
-        return jsonify({
-            'mealPlan': meal_plan,
-            'nutritionSummary': nutrition_summary
-        })
+        for meal_type in MEAL_TYPES:  # ['breakfast', 'lunch', 'dinner']
+            meal_idx = best_solution[day_idx][meal_type]
+            meal = catalog.row(meal_idx)
+
+            # Denormalized nutrition values, precomputed by the GA
+            nutrition_dict = dict(zip(catalog.nutrition_cols, nutrition_matrix[meal_idx]))
+
+            # Apply portion multiplier for realistic serving size
+            multiplier = PORTION_MULTIPLIERS.get(meal_type, 1.0)
+            scaled_nutrition = {k: v * multiplier for k, v in nutrition_dict.items()}
+
+            cal = scaled_nutrition['calories']
+            pro = scaled_nutrition['protein']
+            fat = scaled_nutrition['fat']
+            carb = scaled_nutrition['carbs']
+
+            # Accumulate daily totals
+            daily['totalNutrition']['calories'] += cal
+            daily['totalNutrition']['protein'] += pro
+            daily['totalNutrition']['fat'] += fat
+            daily['totalNutrition']['carbs'] += carb
+
+            # Build meal object for frontend
+            meal_data = {
+                'meal_id': int(meal_idx),  # catalog row; identifies the meal to /replan-meal-plan
+                'meal_name': meal['meal_name'],
+                'calories': round(cal, 1),
+                'protein': round(pro, 1),
+                'fat': round(fat, 1),
+                'carbs': round(carb, 1),
+                'image_url': meal.get('image_url', ''),
+                'vitamins': meal.get('vitamins', ''),
+                'ingredients': meal['ingredients'].split(', ') if isinstance(meal.get('ingredients'), str) else [],
+                'sodium': round(scaled_nutrition.get('sodium_mg', 0), 1),
+                'sugar': round(scaled_nutrition.get('sugar_g', 0), 1),
+                'fiber': round(scaled_nutrition.get('fiber_g', 0), 1),
+                'cholesterol': round(scaled_nutrition.get('cholesterol_mg', 0), 1),
+                'portion_size_g': round(100 * multiplier, 0)
+            }
+
+            daily['meals'].append({meal_type: meal_data})
+
+        # Round daily totals
+        for key in daily['totalNutrition']:
+            daily['totalNutrition'][key] = round(daily['totalNutrition'][key], 1)
+
+        meal_plan.append(daily)
+
+    # Overall summary
+    totals = [d['totalNutrition'] for d in meal_plan]
+    nutrition_summary = {
+        'avgCalories': round(sum(t['calories'] for t in totals) / days, 1),
+        'avgProtein': round(sum(t['protein'] for t in totals) / days, 1),
+        'avgFat': round(sum(t['fat'] for t in totals) / days, 1),
+        'avgCarbs': round(sum(t['carbs'] for t in totals) / days, 1),
+        'totalDays': days
+    }
+
+    return {
+        'mealPlan': meal_plan,
+        'nutritionSummary': nutrition_summary
+    }
+
+
+class PlanRequestError(ValueError):
+    """Invalid plan request payload (reported to the client as a 400)."""
+
+
+def validate_user_data(user_data):
+    if not isinstance(user_data, dict):
+        raise PlanRequestError('Request body must be a JSON object')
+    for field in ('adjustedCalories', 'goal'):
+        if field not in user_data:
+            raise PlanRequestError(f"Missing required field '{field}'")
+
+    # Wrong types would otherwise fail deep inside the search (or a batch group)
+    calories = user_data['adjustedCalories']
+    if isinstance(calories, bool) or not isinstance(calories, (int, float)) or not math.isfinite(calories) \
+            or calories <= 0:
+        raise PlanRequestError('adjustedCalories must be a positive number')
+    if not isinstance(user_data['goal'], str):
+        raise PlanRequestError('goal must be a string')
+    days = user_data.get('days', DEFAULT_DAYS)
+    if isinstance(days, bool) or not isinstance(days, int) or days < 1:
+        raise PlanRequestError('days must be a positive integer')
+    if user_data.get('dietType') is not None and not isinstance(user_data['dietType'], str):
+        raise PlanRequestError('dietType must be a string')
+    for field in ('allergies', 'healthRisks'):
+        values = user_data.get(field, [])
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise PlanRequestError(f'{field} must be a list of strings')
+
+
+def prepare_plan_request(user_data):
+    """Validate a plan payload and derive everything needed to solve or look it up in the cache."""
+    validate_user_data(user_data)
+
+    days = user_data.get('days', DEFAULT_DAYS)
+    dietary_restrictions = build_dietary_restrictions(user_data)
+
+    # Optional per-request latency budget for the search, in milliseconds
+    time_budget_ms = user_data.get('timeBudgetMs')
+    if time_budget_ms is not None and (isinstance(time_budget_ms, bool) or not isinstance(time_budget_ms, (int, float))
+                                       or not math.isfinite(time_budget_ms) or time_budget_ms <= 0):
+        raise PlanRequestError('timeBudgetMs must be a positive number of milliseconds')
+
+    # Optional planning engine; 'auto' leaves the choice to the planner
+    solver = user_data.get('solver', SOLVER_ENGINE)
+    if solver not in SOLVER_NAMES:
+        raise PlanRequestError(f"solver must be one of {', '.join(SOLVER_NAMES)}")
+
+    plan_snapshot = current_snapshot()
+    cache_key = None
+    if PLAN_CACHE_ENABLED:
+        cache_key = plan_cache_key(user_data, dietary_restrictions, days, plan_snapshot.version)
+        # Solve for the bucketed target so the cached plan fits every request in the bucket
+        user_data = dict(user_data, adjustedCalories=bucket_calories(user_data['adjustedCalories']))
+
+    return {
+        'days': days,
+        'dietary_restrictions': dietary_restrictions,
+        'target_nutrition': calculate_target_nutrition(user_data),
+        'time_budget_ms': time_budget_ms,
+        'solver': solver,
+        'cache_key': cache_key,
+        'snapshot': plan_snapshot
+    }
+
+
+def search_stats(stats):
+    return {
+        'solver': stats.get('solver', 'ga'),
+        'generations': stats['generations'],
+        'maxGenerations': stats['max_generations'],
+        'stopReason': stats['stop_reason'],
+        'budgetExhausted': stats['budget_exhausted'],
+        'elapsedMs': round(stats['elapsed_ms'], 1)
+    }
+
+
+def finish_plan(plan_request, best_solution, stats):
+    """Build the response for a solved request and store it in the plan cache."""
+    result = build_meal_plan_response(best_solution, plan_request['days'], plan_request['snapshot'].catalog)
+    result['searchStats'] = search_stats(stats)
+
+    # Plans cut short by a caller's budget are not reused for other callers
+    if plan_request['cache_key'] is not None and not stats['budget_exhausted']:
+        plan_cache.set(plan_request['cache_key'], result)
+    return result
+
+
+@contextmanager
+def timed_phase(timings, phase):
+    """Record the seconds spent in the with-block as timings[phase] (no-op when timings is None)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[phase] = time.perf_counter() - start
+
+
+def server_timing(timings):
+    """Server-Timing header value for {phase: seconds}."""
+    return ', '.join(f"{phase};dur={seconds * 1000:.2f}" for phase, seconds in timings.items())
+
+
+def solve_plan_request(plan_request, progress_callback=None, timings=None):
+    """Answer a prepared request from the plan cache or by running a planning engine.
+
+    Returns (result, cache_status) with cache_status 'hit', 'miss' or 'off'.
+    With a timings dict, the seconds spent in the cache lookup, the search
+    and building the response are recorded in it.
+    """
+    cache_key = plan_request['cache_key']
+    if cache_key is not None:
+        with timed_phase(timings, 'cache'):
+            cached = plan_cache.get(cache_key)
+        if cached is not None:
+            return cached, 'hit'
+
+    # Run the requested engine, or the one the planner picks for this profile
+    with timed_phase(timings, 'solve'):
+        best_solution, stats = plan_request['snapshot'].planner.solve(
+            plan_request['target_nutrition'], plan_request['dietary_restrictions'], plan_request['days'],
+            time_budget_ms=plan_request['time_budget_ms'], progress_callback=progress_callback,
+            engine=plan_request['solver']
+        )
+    with timed_phase(timings, 'build'):
+        result = finish_plan(plan_request, best_solution, stats)
+    return result, 'miss' if cache_key is not None else 'off'
+
+
+@app.route('/generate-meal-plan', methods=['POST'])
+def generate_meal_plan():
+    # Per-phase server time, reported in the Server-Timing header
+    timings = {}
+    start = time.perf_counter()
+    try:
+        with timed_phase(timings, 'prepare'):
+            plan_request = prepare_plan_request(request.json)
+    except PlanRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate meal plan', 'details': str(e)}), 500
+
+    try:
+        result, cache_status = solve_plan_request(plan_request, timings=timings)
+        with timed_phase(timings, 'serialize'):
+            response = jsonify(result)
+        response.headers['X-Plan-Cache'] = cache_status
+        timings['total'] = time.perf_counter() - start
+        response.headers['Server-Timing'] = server_timing(timings)
+        return response
 
     except Exception as e:
         print(f"Error: {e}")
@@ -168,5 +381,209 @@ def generate_meal_plan():
         return jsonify({'error': 'Failed to generate meal plan', 'details': str(e)}), 500
 
 
+def parse_replan_slots(user_data):
+    """Read the plan to keep and the slots to replace from a /replan-meal-plan payload.
+
+    'plan' is a list of {'breakfast': mealId, 'lunch': mealId, 'dinner': mealId}
+    days (meal_id values from a previous response); 'replace' lists
+    {'day': n, 'meal': 'dinner'} entries with 1-based days, where leaving
+    out 'meal' replaces the whole day.
+    """
+    plan = user_data.get('plan')
+    if not isinstance(plan, list) or not plan:
+        raise PlanRequestError("'plan' must be a non-empty list of days")
+    try:
+        plan = [{meal_type: int(day[meal_type]) for meal_type in MEAL_TYPES} for day in plan]
+    except (KeyError, TypeError, ValueError):
+        raise PlanRequestError(f"Every plan day needs integer meal ids for {', '.join(MEAL_TYPES)}")
+
+    replace = user_data.get('replace')
+    if not isinstance(replace, list) or not replace:
+        raise PlanRequestError("'replace' must be a non-empty list of slots")
+    slots = []
+    for slot in replace:
+        if not isinstance(slot, dict) or not isinstance(slot.get('day'), int):
+            raise PlanRequestError("Every slot needs an integer 'day'")
+        slots.append((slot['day'] - 1, slot.get('meal')))
+    return plan, slots
+
+
+@app.route('/replan-meal-plan', methods=['POST'])
+def replan_meal_plan():
+    """Replace some meals or days of an existing plan, keeping the rest.
+
+    Takes the /generate-meal-plan profile fields plus 'plan' and 'replace'
+    (see parse_replan_slots) and searches only the replaced slots, so the
+    plan as a whole still matches the user's target.
+    """
+    user_data = request.json
+    try:
+        validate_user_data(user_data)
+        plan, slots = parse_replan_slots(user_data)
+    except PlanRequestError as e:
+        return jsonify({'error': str(e)}), 400
+
+    plan_snapshot = current_snapshot()
+    try:
+        best_solution, stats = plan_snapshot.ga.replan(
+            plan, slots, calculate_target_nutrition(user_data), build_dietary_restrictions(user_data),
+            return_stats=True
+        )
+    except ValueError as e:
+        return jsonify({'error': 'Invalid re-plan request', 'details': str(e)}), 400
+
+    result = build_meal_plan_response(best_solution, len(best_solution), plan_snapshot.catalog)
+    result['searchStats'] = search_stats(stats)
+    return jsonify(result)
+
+
+@app.route('/jobs', methods=['POST'])
+def submit_meal_plan_job():
+    """Queue a /generate-meal-plan payload and return its job id immediately."""
+    try:
+        plan_request = prepare_plan_request(request.json)
+    except PlanRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate meal plan', 'details': str(e)}), 500
+
+    def task(progress):
+        def report(generation, best_fitness, max_generations):
+            progress(generation=generation, maxGenerations=max_generations, bestFitness=round(best_fitness, 4))
+        return solve_plan_request(plan_request, progress_callback=report)[0]
+
+    try:
+        job_id = jobs.submit(task)
+    except JobQueueFull as e:
+        return jsonify({'error': 'Too many pending jobs', 'details': str(e)}), 503
+
+    return jsonify({'jobId': job_id, 'status': 'queued', 'statusUrl': f'/jobs/{job_id}'}), 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_meal_plan_job(job_id):
+    """Job status and progress; ?wait=<seconds> long-polls until the job finishes."""
+    wait = min(request.args.get('wait', 0, type=float), JOB_MAX_WAIT)
+    job = jobs.get(job_id, wait=max(wait, 0))
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+
+    body = {
+        'jobId': job['id'],
+        'status': job['status'],
+        'progress': job['progress']
+    }
+    if job['status'] == 'done':
+        body['result'] = job['result']
+    elif job['status'] == 'failed':
+        body['error'] = 'Failed to generate meal plan'
+        body['details'] = job['error']
+    return jsonify(body)
+
+
+@app.route('/generate-meal-plans', methods=['POST'])
+def generate_meal_plans():
+    """Generate plans for many users in one call.
+
+    Accepts a JSON list of /generate-meal-plan payloads (or {'requests': [...]}).
+    Users are grouped by restriction profile and day count; each group
+    resolves its valid meals once and, when the GA serves it, evolves all
+    its populations together.
+    Every user gets either a plan or an error, without failing the batch.
+    """
+    payloads = request.json
+    if isinstance(payloads, dict):
+        payloads = payloads.get('requests')
+    if not isinstance(payloads, list):
+        return jsonify({'error': 'Expected a list of meal plan requests'}), 400
+
+    results = [None] * len(payloads)
+    groups = {}
+
+    for i, user_data in enumerate(payloads):
+        try:
+            plan_request = prepare_plan_request(user_data)
+        except PlanRequestError as e:
+            results[i] = {'error': str(e)}
+            continue
+        except Exception as e:
+            results[i] = {'error': 'Failed to generate meal plan', 'details': str(e)}
+            continue
+
+        if plan_request['cache_key'] is not None:
+            cached = plan_cache.get(plan_request['cache_key'])
+            if cached is not None:
+                results[i] = dict(cached, cached=True)
+                continue
+
+        group_key = (
+            plan_request['snapshot'].version,
+            restriction_profile_key(plan_request['dietary_restrictions']),
+            plan_request['days'],
+            plan_request['time_budget_ms'],
+            plan_request['solver']
+        )
+        groups.setdefault(group_key, []).append((i, plan_request))
+
+    for members in groups.values():
+        first = members[0][1]
+        try:
+            solutions = first['snapshot'].planner.solve_batch(
+                [plan_request['target_nutrition'] for _, plan_request in members],
+                first['dietary_restrictions'], first['days'], time_budget_ms=first['time_budget_ms'],
+                engine=first['solver']
+            )
+        except Exception as e:
+            for i, _ in members:
+                results[i] = {'error': 'Failed to generate meal plan', 'details': str(e)}
+            continue
+
+        for (i, plan_request), (best_solution, stats) in zip(members, solutions):
+            try:
+                results[i] = finish_plan(plan_request, best_solution, stats)
+            except Exception as e:
+                results[i] = {'error': 'Failed to generate meal plan', 'details': str(e)}
+
+    return jsonify({
+        'results': [dict(result, index=i) for i, result in enumerate(results)],
+        'groups': len(groups)
+    })
+
+
+@app.route('/admin/meals', methods=['POST'])
+def update_meals():
+    """Add, update or remove catalog meals without a restart.
+
+    Body: {'add': [meal, ...], 'update': {'<mealId>': {field: value}}, 'remove': [mealId, ...]}
+    with meals in the dataset's CSV columns. Requires the X-Admin-Token
+    header to match ADMIN_TOKEN; the endpoint is disabled when it is unset.
+    Running requests finish on the previous catalog version.
+    """
+    global snapshot
+    if not ADMIN_TOKEN or request.headers.get('X-Admin-Token') != ADMIN_TOKEN:
+        return jsonify({'error': 'Forbidden'}), 403
+
+    body = request.json
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    try:
+        update = {int(meal_id): fields for meal_id, fields in (body.get('update') or {}).items()}
+        remove = [int(meal_id) for meal_id in body.get('remove') or []]
+        added = body.get('add') or []
+        with snapshot_lock:
+            catalog, added_ids = preprocessor.update_catalog(add=added, update=update, remove=remove)
+            snapshot = CatalogSnapshot(catalog, snapshot.ga.with_catalog(catalog))
+    except KeyError as e:
+        return jsonify({'error': f'Unknown meal id {e.args[0]}'}), 404
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': 'Invalid meal update', 'details': str(e)}), 400
+
+    return jsonify({
+        'catalogVersion': snapshot.version,
+        'meals': catalog.live_count,
+        'addedIds': added_ids
+    })
+
+
 if __name__ == '__main__':
     app.run(debug=True)
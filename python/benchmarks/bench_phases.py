@@ -0,0 +1,57 @@
+"""
+bench_phases.py - where evolve spends its time, generation by generation
+
+Attaches a GenerationCollector to the GA, runs evolve for a few goals and
+prints each phase's share of the generation time (stopping checks,
+selection, crossover, mutation, fitness evaluation, repair) and the
+convergence curve: best and mean fitness and diversity every --every
+generations, averaged over the runs.
+
+Run from the python/ directory:
+    python benchmarks/bench_phases.py [--runs 5] [--days 7] [--every 10] [--islands 1]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.genetic_algorithm import MealPlanGeneticAlgorithm
+from models.observers import GenerationCollector
+from synthetic import GOALS, bundled_catalog
+
+TARGETS = [GOALS[calories] for calories in (1500, 2000, 2500)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="runs per target")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--every', type=int, default=10, help="print every this many generations")
+    parser.add_argument('--islands', type=int, default=1)
+    args = parser.parse_args()
+
+    ga = MealPlanGeneticAlgorithm(bundled_catalog(), seed=0, island_count=args.islands)
+    collector = GenerationCollector()
+    ga.add_observer(collector)
+    try:
+        for target in TARGETS:
+            for _ in range(args.runs):
+                ga.evolve(target, {}, args.days, stagnation_generations=None)
+    finally:
+        ga.close()
+
+    summary = collector.summary()
+    print(f"{summary['runs']} runs, {summary['generations']} generations")
+    print(f"{'phase':>10} {'ms/gen':>8} {'share':>7}")
+    for phase, stats in summary['phase_ms'].items():
+        print(f"{phase:>10} {stats['mean']:>8.3f} {stats['share']:>7.1%}")
+    print(f"\n{'gen':>5} {'best':>7} {'mean':>7} {'diversity':>10}")
+    for point in summary['convergence']:
+        if point['generation'] % args.every == 0:
+            print(f"{point['generation']:>5} {point['best_fitness']:>7.4f} {point['mean_fitness']:>7.4f} "
+                  f"{point['diversity']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
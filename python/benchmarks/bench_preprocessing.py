@@ -0,0 +1,81 @@
+"""
+bench_preprocessing.py - feature extraction scaling benchmark
+
+Times vitamin/allergen feature extraction on catalogs of increasing size,
+built by resampling the bundled dataset, against the original row-wise
+apply/re.search implementation.
+
+Run from the python/ directory:
+    python benchmarks/bench_preprocessing.py [--sizes 1000 10000 100000 500000] [--rowwise-max 100000] [--distinct]
+
+Resampling repeats strings, which the extraction exploits by testing each
+distinct string once; --distinct makes every ingredients string unique to
+show the worst case.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import DATA_PATH, COMMON_ALLERGENS
+from models.data_preprocessor import vitamin_features, allergen_features
+
+
+def rowwise_features(df):
+    """The original per-row extraction, kept here as the baseline."""
+    vitamins = set()
+    for item in df['vitamins']:
+        if pd.notna(item):
+            for vitamin in str(item).split(', '):
+                vitamins.add(vitamin.strip())
+    columns = {}
+    for vitamin in vitamins:
+        columns[vitamin] = df['vitamins'].apply(lambda x: 1 if pd.notna(x) and vitamin in str(x) else 0)
+    for allergen, keywords in COMMON_ALLERGENS.items():
+        pattern = '|'.join(keywords)
+        columns[allergen] = df['ingredients'].apply(lambda x: 1 if re.search(pattern, str(x)) else 0)
+    return columns
+
+
+def vectorized_features(df):
+    _, columns = vitamin_features(df['vitamins'])
+    columns.update(allergen_features(df['ingredients']))
+    return columns
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 500000])
+    parser.add_argument('--rowwise-max', type=int, default=100000,
+                        help="skip the row-wise baseline above this many rows")
+    parser.add_argument('--distinct', action='store_true', help="make every ingredients string unique")
+    args = parser.parse_args()
+
+    base = pd.read_csv(DATA_PATH)
+    base['ingredients'] = base['ingredients'].astype(str).str.lower()
+
+    print(f"{'rows':>10} {'vectorized s':>14} {'row-wise s':>12} {'speedup':>9}")
+    for size in args.sizes:
+        df = base.sample(n=size, replace=True, random_state=0).reset_index(drop=True)
+        if args.distinct:
+            df['ingredients'] = df['ingredients'] + ', item ' + df.index.astype(str)
+        fast = timed(vectorized_features, df)
+        if size <= args.rowwise_max:
+            slow = timed(rowwise_features, df)
+            print(f"{size:>10} {fast:>14.3f} {slow:>12.3f} {slow / fast:>8.1f}x")
+        else:
+            print(f"{size:>10} {fast:>14.3f} {'-':>12} {'-':>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_repair.py - KD-tree repair operator on growing catalogs
+
+Builds catalogs of increasing size by resampling the bundled dataset with
+multiplicative noise on every nutrition value, then runs the GA with the
+repair operator off and on (GA_REPAIR_COUNT best individuals per
+generation) and reports the generations and time needed to reach the
+mean final fitness of the runs without repair, plus the final fitness.
+The macro index is built before timing, as a running service caches it
+per restriction profile.
+
+Run from the python/ directory:
+    python benchmarks/bench_repair.py [--sizes 1000 10000 100000] [--runs 3] [--days 7] [--fitness 0.94]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import DATA_PATH, NUTRITION_COLS, GA_REPAIR_COUNT
+from models.genetic_algorithm import MealPlanGeneticAlgorithm
+from synthetic import GOALS
+
+TARGET = GOALS[2000]
+
+
+def synthetic_catalog(base, size, rng):
+    """(normalized DataFrame, fitted scaler) of size meals resampled from base with +-30% noise."""
+    df = base.sample(n=size, replace=True, random_state=int(rng.integers(2 ** 31))).reset_index(drop=True)
+    df[NUTRITION_COLS] = df[NUTRITION_COLS].to_numpy(dtype=float) * rng.uniform(0.7, 1.3, (size, len(NUTRITION_COLS)))
+    df['meal_name'] = df['meal_name'] + ' #' + df.index.astype(str)
+    scaler = MinMaxScaler()
+    df[NUTRITION_COLS] = scaler.fit_transform(df[NUTRITION_COLS])
+    return df, scaler
+
+
+def run(ga, days):
+    """([(generation, best, seconds)], final best) of a full-length run"""
+    history = []
+    start = time.perf_counter()
+    ga.evolve(TARGET, {}, days, stagnation_generations=None, fitness_target=None, min_diversity=None,
+              time_budget_ms=None, islands=1,
+              progress_callback=lambda generation, best: history.append(
+                  (generation, best, time.perf_counter() - start)))
+    return history, ga.best_fitness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--fitness', type=float, help="fitness level to reach (default: final mean without repair)")
+    parser.add_argument('--repair-count', type=int, default=GA_REPAIR_COUNT or 2)
+    args = parser.parse_args()
+
+    base = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(0)
+
+    print(f"{'meals':>8} {'repair':>7} {'final':>7} {'level':>7} {'reached':>8} {'mean gens':>10} {'mean s':>8}")
+    for size in args.sizes:
+        df, scaler = synthetic_catalog(base, size, rng)
+        results = {}
+        for label, count in (('off', 0), ('on', args.repair_count)):
+            ga = MealPlanGeneticAlgorithm(df, scaler=scaler, seed=size, island_count=1)
+            ga.repair_count = count
+            ga.meals_filling_gap(TARGET, {})  # build the index up front, as a warm service would have
+            results[label] = [run(ga, args.days) for _ in range(args.runs)]
+
+        level = args.fitness if args.fitness is not None else np.mean([final for _, final in results['off']])
+        for label, runs in results.items():
+            reached = [next(((g, s) for g, best, s in history if best >= level), None) for history, _ in runs]
+            reached = [point for point in reached if point is not None]
+            gens = f"{np.mean([g for g, _ in reached]):.1f}" if reached else '-'
+            seconds = f"{np.mean([s for _, s in reached]):.3f}" if reached else '-'
+            print(f"{size:>8} {label:>7} {np.mean([final for _, final in runs]):>7.4f} {level:>7.4f} "
+                  f"{len(reached):>4}/{args.runs:<3} {gens:>10} {seconds:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+bench_seeding.py - greedy seeding vs random initial populations
+
+Runs the GA for a set of calorie goals with stopping criteria off, once
+with a purely random initial population and once with the greedy seeds
+(GA_SEED_FRACTION of the population), and reports the best fitness of the
+first bred generation and how many generations each needs to reach a
+fitness level: --fitness if given, else the mean final fitness of the
+random runs for that goal.
+
+Run from the python/ directory:
+    python benchmarks/bench_seeding.py [--fitness 0.75] [--runs 5] [--days 7] [--seed-fraction 0.2]
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import GA_GENERATIONS, GA_SEED_FRACTION
+from models.genetic_algorithm import MealPlanGeneticAlgorithm
+from synthetic import GOALS, bundled_catalog
+
+TARGETS = [GOALS[calories] for calories in (1500, 2000, 2500, 3200)]
+
+
+def run(ga, target, days):
+    """(best after the first bred generation, [(generation, best)], final best) of a full-length run"""
+    history = []
+    ga.evolve(target, {}, days, stagnation_generations=None, fitness_target=None, min_diversity=None,
+              time_budget_ms=None, islands=1,
+              progress_callback=lambda generation, best: history.append((generation, best)))
+    return history[0][1], history, ga.best_fitness
+
+
+def generation_reaching(history, level):
+    return next((generation for generation, best in history if best >= level), None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fitness', type=float, help="fitness level to reach (default: random runs' final mean)")
+    parser.add_argument('--runs', type=int, default=5, help="seeded runs per target")
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--seed-fraction', type=float, default=GA_SEED_FRACTION or 0.2)
+    args = parser.parse_args()
+
+    catalog = bundled_catalog()
+
+    print(f"{'calories':>9} {'seeding':>8} {'gen-2 best':>11} {'final':>7} {'level':>7} {'reached':>8} {'mean gens':>10}")
+    for target in TARGETS:
+        results = {}
+        for label, fraction in (('random', 0.0), ('greedy', args.seed_fraction)):
+            results[label] = []
+            for seed in range(args.runs):
+                ga = MealPlanGeneticAlgorithm(catalog, seed=seed, island_count=1)
+                ga.seed_fraction = fraction
+                results[label].append(run(ga, target, args.days))
+
+        level = args.fitness if args.fitness is not None else np.mean([final for _, _, final in results['random']])
+        for label, runs in results.items():
+            reached = [generation_reaching(history, level) for _, history, _ in runs]
+            reached = [generation for generation in reached if generation is not None]
+            mean_gens = f"{np.mean(reached):.1f}" if reached else '-'
+            print(f"{target['calories']:>9} {label:>8} {np.mean([early for early, _, _ in runs]):>11.4f} "
+                  f"{np.mean([final for _, _, final in runs]):>7.4f} {level:>7.4f} "
+                  f"{len(reached):>4}/{args.runs:<3} {mean_gens:>10}")
+    print(f"(runs that never reach the level stop at {GA_GENERATIONS} generations)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+bench_solvers.py - plan quality vs latency of the planning engines
+
+Solves the same requests with simulated annealing, the GA and the MILP
+(each forced, bypassing the planner's auto policy) for several day counts,
+calorie goals and restriction profiles, and reports the mean best fitness
+and wall time per engine. The MILP is deterministic and runs once per case.
+
+Run from the python/ directory:
+    python benchmarks/bench_solvers.py [--runs 3] [--days 1 3 7] [--engines anneal ga milp]
+"""
+
+import argparse
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.genetic_algorithm import MealPlanGeneticAlgorithm
+from models.solvers import Planner
+from synthetic import GOALS, bundled_catalog
+
+TARGETS = [GOALS[calories] for calories in (1100, 2000)]
+PROFILES = {
+    'all': {},
+    'vegan': {'vegan': True},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help="runs per case for the stochastic engines")
+    parser.add_argument('--days', type=int, nargs='+', default=[1, 3, 7])
+    parser.add_argument('--engines', nargs='+', default=['anneal', 'ga', 'milp'])
+    args = parser.parse_args()
+
+    planner = Planner(MealPlanGeneticAlgorithm(bundled_catalog(), seed=0))
+
+    print(f"{'profile':>8} {'days':>5} {'calories':>9} {'engine':>7} {'fitness':>8} {'mean ms':>8}")
+    for profile, restrictions in PROFILES.items():
+        for days in args.days:
+            for target in TARGETS:
+                for engine in args.engines:
+                    runs = []
+                    for _ in range(1 if engine == 'milp' else args.runs):
+                        _, stats = planner.solve(target, restrictions, days, engine=engine)
+                        runs.append((stats['best_fitness'], stats['elapsed_ms']))
+                    fitness, ms = np.mean(runs, axis=0)
+                    print(f"{profile:>8} {days:>5} {target['calories']:>9} {engine:>7} {fitness:>8.4f} {ms:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
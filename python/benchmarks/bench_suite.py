@@ -0,0 +1,182 @@
+"""
+bench_suite.py - microbenchmarks of the planning pipeline, with regression checks
+
+Times each stage a plan request goes through on synthetic catalogs (see
+synthetic.py) of increasing size:
+
+    preprocess      DataPreprocessor.preprocess_data on the raw frame
+    valid_meals     _get_valid_meals for a mixed restriction profile, cache cleared
+    fitness         calculate_fitness of one 7-day plan
+    population      population_fitness of a GA_POPULATION_SIZE population
+    evolve          a full 7-day evolve, early stopping off, one island
+    response        build_meal_plan_response (the /generate-meal-plan body)
+
+Each case is repeated and its median and minimum seconds per call are
+written as JSON (--out); cases faster than MIN_SAMPLE_S are called in a
+loop per sample so timer noise does not dominate. Given an earlier result
+file (--compare), cases whose fastest sample got slower by more than
+--threshold are listed and the script exits with status 1, so runs can be
+compared between commits.
+
+Run from the python/ directory:
+    python benchmarks/bench_suite.py [--sizes 1000 10000 100000 1000000] [--repeats 5] [--out bench.json]
+    python benchmarks/bench_suite.py --out new.json --compare old.json [--threshold 0.25]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import DATA_PATH, GA_POPULATION_SIZE, MEAL_TYPES
+import models.data_preprocessor as data_preprocessor
+from models.catalog import MealCatalog
+from models.genetic_algorithm import MealPlanGeneticAlgorithm
+from synthetic import GOALS, synthetic_meals
+
+with contextlib.redirect_stdout(io.StringIO()):  # app.py maps the bundled catalog on import
+    from app import build_meal_plan_response
+
+DAYS = 7
+TARGET = GOALS[2000]
+RESTRICTIONS = {'vegetarian': True, 'allergies': ['dairy'], 'health_risks': ['High blood pressure']}
+MIN_SAMPLE_S = 0.05
+
+
+def timed(func, repeats):
+    """{'median_s', 'min_s', 'repeats', 'loops'}: seconds per func() call over repeats samples"""
+    start = time.perf_counter()
+    func()  # warm-up, and sizes the loop
+    loops = max(1, int(MIN_SAMPLE_S / max(time.perf_counter() - start, 1e-9)))
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        seconds.append((time.perf_counter() - start) / loops)
+    return {'median_s': float(np.median(seconds)), 'min_s': float(np.min(seconds)), 'repeats': repeats,
+            'loops': loops}
+
+
+def preprocess(raw):
+    preprocessor = data_preprocessor.DataPreprocessor()
+    preprocessor.df = raw.copy()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return preprocessor.preprocess_data()
+
+
+def bench_size(size, repeats, workdir):
+    """{case: timing} for one catalog size"""
+    raw = synthetic_meals(size, seed=size, base=pd.read_csv(DATA_PATH))
+    results = {'preprocess': timed(lambda: preprocess(raw), repeats)}
+
+    df, scaler, _, _ = preprocess(raw)
+    catalog = MealCatalog.write(os.path.join(workdir, str(size)), df, scaler)
+    ga = MealPlanGeneticAlgorithm(catalog, seed=0, island_count=1)
+
+    def valid_meals():
+        ga.valid_meals_cache.clear()
+        return ga._get_valid_meals(RESTRICTIONS)
+    results['valid_meals'] = timed(valid_meals, repeats)
+
+    valid = ga._valid_meal_array(RESTRICTIONS)
+    rng = np.random.default_rng(0)
+    genes = valid[rng.integers(len(valid), size=(GA_POPULATION_SIZE, DAYS, len(MEAL_TYPES)))]
+    plan = ga._decode_individual(genes[0])
+    results['fitness'] = timed(lambda: ga.calculate_fitness(plan, TARGET, DAYS), repeats)
+    results['population'] = timed(lambda: ga.population_fitness(genes, TARGET, DAYS), repeats)
+
+    evolve = lambda: ga.evolve(TARGET, RESTRICTIONS, DAYS, stagnation_generations=None, fitness_target=None,
+                               min_diversity=None, time_budget_ms=None, islands=1)
+    results['evolve'] = timed(evolve, repeats)
+
+    results['response'] = timed(lambda: build_meal_plan_response(plan, DAYS, catalog), repeats)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """[(key, old, new)] of cases more than threshold slower than in baseline.
+
+    Compares the fastest samples, which vary far less between runs than
+    medians on a busy machine.
+    """
+    regressions = []
+    for key, timing in results.items():
+        old = baseline.get(key)
+        if old is not None and timing['min_s'] > old['min_s'] * (1 + threshold):
+            regressions.append((key, old['min_s'], timing['min_s']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--out', help="write results to this JSON file")
+    parser.add_argument('--compare', help="earlier results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    # preprocess_data saves its scaler; keep the app's copy untouched
+    workdir = tempfile.mkdtemp(prefix='bench_suite_')
+    data_preprocessor.SCALER_SAVE_PATH = os.path.join(workdir, 'scaler.pkl')
+
+    results = {}
+    print(f"{'meals':>9} {'case':>12} {'median ms':>10} {'min ms':>9}")
+    try:
+        for size in args.sizes:
+            for case, timing in bench_size(size, args.repeats, workdir).items():
+                results[f"{case}/{size}"] = timing
+                print(f"{size:>9} {case:>12} {timing['median_s'] * 1000:>10.3f} {timing['min_s'] * 1000:>9.3f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'repeats': args.repeats
+        },
+        'results': results
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms ({new / old - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No case slower than {baseline['meta'].get('commit')} by more than {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
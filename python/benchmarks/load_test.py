@@ -0,0 +1,235 @@
+"""
+load_test.py - concurrent load on /generate-meal-plan
+
+Starts the app in a subprocess (threaded WSGI server, no debug reloader)
+against the bundled catalog, a CSV of your own (--catalog) or a synthetic
+one of --synthetic meals (see synthetic.py), then sends --requests plan
+requests from --concurrency client threads. Payloads are a seeded random
+mix of calorie targets, goals, diet types, allergies, health risks and
+day counts. The app's caches live in a temporary directory, so every run
+starts cold and the repository's cache/ is untouched.
+
+Reports throughput, the error rate, latency percentiles, the plan cache
+hit rate and the mean and p99 of each server-side phase from the
+Server-Timing header. Use --url to load an app that is already running.
+
+Run from the python/ directory:
+    python benchmarks/load_test.py [--concurrency 20] [--requests 500] [--synthetic 100000] [--out load.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import COMMON_ALLERGENS, HEALTH_RISK_THRESHOLDS
+from synthetic import synthetic_meals
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SERVER = (
+    "import sys; from werkzeug.serving import run_simple; from app import app; "
+    "run_simple(sys.argv[1], int(sys.argv[2]), app, threaded=True)"
+)
+
+GOALS = ['Lose Weight', 'Build Muscle', 'Gain Weight', 'Maintain Weight']
+DIET_TYPES = [None, None, None, 'Vegetarian', 'Vegan', 'Keto', 'Paleo', 'Gluten Free', 'Mediterranean']
+DAYS = [1, 3, 7, 7, 7, 14]
+
+
+def random_payload(rng):
+    """One /generate-meal-plan body; most users have no diet type and few restrictions."""
+    payload = {
+        'adjustedCalories': rng.randrange(1400, 3400, 10),
+        'goal': rng.choice(GOALS),
+        'allergies': rng.sample(sorted(COMMON_ALLERGENS), rng.choice([0, 0, 0, 1, 1, 2])),
+        'healthRisks': rng.sample(sorted(HEALTH_RISK_THRESHOLDS), rng.choice([0, 0, 0, 1])),
+        'days': rng.choice(DAYS)
+    }
+    diet_type = rng.choice(DIET_TYPES)
+    if diet_type is not None:
+        payload['dietType'] = diet_type
+    return payload
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_app(workdir, catalog, port, timeout):
+    """Run the app on port with its caches under workdir; wait until it accepts connections."""
+    env = dict(os.environ, MEAL_PLANNER_CACHE_DIR=os.path.join(workdir, 'cache'),
+               MEAL_PLANNER_SCALER_PATH=os.path.join(workdir, 'scaler.pkl'))
+    if catalog is not None:
+        env['MEAL_PLANNER_DATA_PATH'] = os.path.abspath(catalog)
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    process = subprocess.Popen([sys.executable, '-c', SERVER, '127.0.0.1', str(port)], cwd=APP_DIR, env=env,
+                               stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with status {process.returncode}, see {log.name}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"App did not start within {timeout} s, see {log.name}")
+
+
+def parse_server_timing(header):
+    """{phase: milliseconds} from a Server-Timing header value"""
+    timings = {}
+    for entry in filter(None, (part.strip() for part in (header or '').split(','))):
+        name, _, params = entry.partition(';')
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'dur':
+                timings[name] = float(value)
+    return timings
+
+
+def client(host, port, payloads, next_index, lock, records):
+    connection = http.client.HTTPConnection(host, port, timeout=120)
+    while True:
+        with lock:
+            i = next_index[0]
+            next_index[0] += 1
+        if i >= len(payloads):
+            break
+        body = json.dumps(payloads[i])
+        start = time.perf_counter()
+        try:
+            connection.request('POST', '/generate-meal-plan', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            record = {
+                'status': response.status,
+                'cache': response.getheader('X-Plan-Cache'),
+                'timings': parse_server_timing(response.getheader('Server-Timing'))
+            }
+            if response.getheader('Connection', '').lower() == 'close' or response.version == 10:
+                connection.close()
+        except (OSError, http.client.HTTPException) as e:
+            record = {'status': None, 'error': str(e)}
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=120)
+        record['latency_ms'] = (time.perf_counter() - start) * 1000
+        records[i] = record
+    connection.close()
+
+
+def run_load(host, port, payloads, concurrency):
+    """(per-request records, wall seconds)"""
+    records = [None] * len(payloads)
+    next_index, lock = [0], threading.Lock()
+    threads = [threading.Thread(target=client, args=(host, port, payloads, next_index, lock, records))
+               for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - start
+
+
+def summarize(records, seconds):
+    latencies = np.array([record['latency_ms'] for record in records])
+    ok = [record for record in records if record['status'] == 200]
+    cached = [record for record in ok if record['cache'] is not None]
+    phases = {}
+    for record in ok:
+        for phase, ms in record['timings'].items():
+            phases.setdefault(phase, []).append(ms)
+    return {
+        'requests': len(records),
+        'seconds': seconds,
+        'throughput_rps': len(records) / seconds,
+        'error_rate': 1 - len(ok) / len(records),
+        'latency_ms': {f"p{q}": float(np.percentile(latencies, q)) for q in (50, 90, 95, 99)}
+        | {'max': float(latencies.max())},
+        'cache_hit_rate': sum(record['cache'] == 'hit' for record in cached) / len(cached) if cached else None,
+        'server_timing_ms': {phase: {'mean': float(np.mean(values)), 'p99': float(np.percentile(values, 99)),
+                                     'count': len(values)}
+                             for phase, values in phases.items()}
+    }
+
+
+def print_summary(summary):
+    latency = summary['latency_ms']
+    print(f"{summary['requests']} requests in {summary['seconds']:.1f} s: "
+          f"{summary['throughput_rps']:.1f} req/s, {summary['error_rate']:.1%} errors")
+    print("latency ms: " + ', '.join(f"{key} {value:.1f}" for key, value in latency.items()))
+    if summary['cache_hit_rate'] is not None:
+        print(f"plan cache hit rate: {summary['cache_hit_rate']:.1%}")
+    print(f"{'phase':>10} {'mean ms':>9} {'p99 ms':>9} {'count':>6}")
+    for phase, stats in summary['server_timing_ms'].items():
+        print(f"{phase:>10} {stats['mean']:>9.2f} {stats['p99']:>9.2f} {stats['count']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20, help="requests sent before measuring")
+    parser.add_argument('--seed', type=int, default=0)
+    catalog = parser.add_mutually_exclusive_group()
+    catalog.add_argument('--catalog', help="meal CSV to serve (default: the bundled dataset)")
+    catalog.add_argument('--synthetic', type=int, metavar='MEALS', help="serve a synthetic catalog of this size")
+    catalog.add_argument('--url', help="load an already running app instead, e.g. http://127.0.0.1:5000")
+    parser.add_argument('--startup-timeout', type=float, default=600,
+                        help="seconds to wait for the app (a new catalog is compiled on first start)")
+    parser.add_argument('--out', help="write the summary to this JSON file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = [random_payload(rng) for _ in range(args.warmup + args.requests)]
+
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    process = None
+    try:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            catalog = args.catalog
+            if args.synthetic:
+                catalog = os.path.join(workdir, 'meals.csv')
+                synthetic_meals(args.synthetic, args.seed).to_csv(catalog, index=False)
+            host, port = '127.0.0.1', free_port()
+            started = time.perf_counter()
+            process = start_app(workdir, catalog, port, args.startup_timeout)
+            print(f"App started in {time.perf_counter() - started:.1f} s")
+
+        if args.warmup:
+            run_load(host, port, payloads[:args.warmup], min(args.concurrency, args.warmup))
+        records, seconds = run_load(host, port, payloads[args.warmup:], args.concurrency)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarize(records, seconds)
+    summary['config'] = {key: value for key, value in vars(args).items() if key != 'out'}
+    print_summary(summary)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
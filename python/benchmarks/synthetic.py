@@ -0,0 +1,67 @@
+"""
+synthetic.py - synthetic meal catalogs in the dataset's CSV schema
+
+Resamples the bundled dataset to any size with +-30% multiplicative noise
+on every nutrition value, and suffixes meal names with the row number so
+they stay distinct. Flags, vitamins, ingredients and image URLs are kept
+as sampled, so preprocessing and restriction filtering see realistic data.
+
+Also holds what the benchmark scripts share: the daily nutrition goals
+they plan for and the bundled catalog. Can write a CSV for the app to load:
+    python benchmarks/synthetic.py --size 100000 --out /tmp/meals_100k.csv [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from config import DATA_PATH, NUTRITION_COLS
+from models.data_preprocessor import DataPreprocessor
+
+# Daily nutrition goals by calories (2000 is what the app asks for a 'Maintain
+# Weight' user). Catalog nutrition is per 100 g, so most are out of reach and
+# the search is for the closest plan.
+GOALS = {
+    1100: {'calories': 1100, 'protein': 75, 'fat': 45, 'carbs': 90},
+    1500: {'calories': 1500, 'protein': 131, 'fat': 42, 'carbs': 150},
+    2000: {'calories': 2000, 'protein': 150, 'fat': 66.7, 'carbs': 200},
+    2500: {'calories': 2500, 'protein': 156, 'fat': 69, 'carbs': 313},
+    3200: {'calories': 3200, 'protein': 200, 'fat': 89, 'carbs': 400},
+}
+
+
+def bundled_catalog():
+    """The app's memory-mapped catalog, compiled on first use, without the preprocessor's output."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataPreprocessor().load_mapped_catalog()
+
+
+def synthetic_meals(size, seed=0, base=None):
+    """Raw (unnormalized) catalog DataFrame of size meals, columns as in the dataset CSV."""
+    base = pd.read_csv(DATA_PATH) if base is None else base
+    rng = np.random.default_rng(seed)
+    df = base.sample(n=size, replace=True, random_state=int(rng.integers(2 ** 31))).reset_index(drop=True)
+    cols = [col for col in NUTRITION_COLS if col in df.columns]
+    df[cols] = (df[cols].to_numpy(dtype=float) * rng.uniform(0.7, 1.3, (size, len(cols)))).round(2)
+    df['meal_name'] = df['meal_name'] + ' #' + df.index.astype(str)
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, required=True)
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    synthetic_meals(args.size, args.seed).to_csv(args.out, index=False)
+    print(f"Wrote {args.size} meals to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,12 @@
 # config.py
 
-# Configuration constants
-DATA_PATH = "dataset/meal_plan_dataset.csv"
+import os
+
+# Configuration constants. The data paths can be overridden from the
+# environment, e.g. to serve (or load-test) another catalog.
+DATA_PATH = os.environ.get('MEAL_PLANNER_DATA_PATH', "dataset/meal_plan_dataset.csv")
 MODEL_SAVE_PATH = "models/saved_genetic_algorithm.pkl"
-SCALER_SAVE_PATH = "models/scaler.pkl"
+SCALER_SAVE_PATH = os.environ.get('MEAL_PLANNER_SCALER_PATH', "models/scaler.pkl")
 
 # Add this list - order must match the columns used in scaling
 NUTRITION_COLS = [
@@ -27,6 +30,73 @@ GA_CROSSOVER_RATE = 0.8
 GA_ELITISM_COUNT = 5
 GA_TOURNAMENT_SIZE = 5
 
+# Early stopping for evolve (None disables a criterion)
+GA_STAGNATION_GENERATIONS = 20  # stop after this many generations without improvement
+GA_FITNESS_TARGET = None        # stop once the best fitness reaches this value
+GA_MIN_DIVERSITY = None         # stop when the share of distinct individuals falls below this
+GA_TIME_BUDGET_MS = None        # wall-clock budget per evolve call; best-so-far is returned when it runs out
+
+# evolve logs the best fitness every this many generations (0 = never), at
+# INFO level on the 'models.genetic_algorithm' logger
+GA_LOG_INTERVAL = 20
+
+# Island model: sub-populations evolved in parallel worker processes (1 = serial)
+GA_ISLAND_COUNT = 1
+GA_MIGRATION_INTERVAL = 10  # generations between migrations
+GA_MIGRATION_SIZE = 2       # best individuals sent to the next island
+
+# Delta fitness: children are scored from their parents' cached per-day
+# totals, recomputing only the days mutation changed
+GA_DELTA_FITNESS = True
+GA_DELTA_CHECK = False  # debug: compare every delta result with full recomputation
+
+# Greedy seeding: this share of the initial population is built slot by slot
+# from meals close to an even split of the remaining day's macro budget (one
+# of the GA_SEED_CANDIDATES best of GA_SEED_SAMPLE sampled meals, at random,
+# so seeds differ). The rest stays random for diversity. 0 disables it.
+GA_SEED_FRACTION = 0.2
+GA_SEED_CANDIDATES = 8
+GA_SEED_SAMPLE = 512
+
+# Repair: after each generation the GA_REPAIR_COUNT best individuals swap their
+# worst-fitting meal for one of the GA_REPAIR_CANDIDATES nearest meals (macro
+# KD-tree) to what would close their macro gap, if that improves them. 0 disables it.
+GA_REPAIR_COUNT = 2
+GA_REPAIR_CANDIDATES = 8
+# The macro KD-trees are cached per valid-meal set; this bounds the total
+# number of meals indexed across the cached trees (roughly 100 bytes each)
+GA_MACRO_INDEX_CACHE_MEALS = 200000
+
+# Re-planning a few slots of an existing plan: a single slot is solved by
+# scoring every candidate meal, larger selections by a short GA
+GA_REPLAN_GENERATIONS = 30
+GA_REPLAN_CHUNK_SIZE = 4096  # candidates scored per batch in the exhaustive search
+
+# Planning engines: 'ga', 'milp' (exact integer program), 'anneal' (simulated
+# annealing) or 'auto', which uses the MILP for restriction profiles with at
+# most SOLVER_MILP_MAX_MEALS valid meals, annealing for other plans of at most
+# SOLVER_ANNEAL_MAX_DAYS days and the GA otherwise. Requests may pick one.
+# The GA is the default: on the bundled catalog the MILP takes 2-3x as long
+# for plans of similar fitness (see benchmarks/bench_solvers.py).
+SOLVER_ENGINE = 'ga'
+SOLVER_MILP_MAX_MEALS = 400
+SOLVER_MILP_TIME_LIMIT_MS = 1000  # per plan, unless the request sets timeBudgetMs
+SOLVER_MILP_GAP = 1e-3  # stop once the plan is provably within this of the best fitness
+
+# Simulated annealing engine ('anneal'): steps, candidate swaps scored per step,
+# and the temperature schedule (in fitness units)
+SOLVER_ANNEAL_STEPS = 300
+SOLVER_ANNEAL_MOVES = 32
+SOLVER_ANNEAL_START_TEMP = 0.01
+SOLVER_ANNEAL_END_TEMP = 0.0001
+SOLVER_ANNEAL_MAX_DAYS = 3
+
+# Per-run fitness memo: chromosomes already scored in a run (elites, duplicates)
+# reuse their fitness instead of being scored again; hit rates are reported in
+# evolve's stats. Off (0) by default, since vectorized scoring of a default-size
+# population is cheaper than the lookups at the hit rates typically seen.
+GA_FITNESS_MEMO_SIZE = 0
+
 # Fitness weights
 FITNESS_WEIGHTS = {
     'calorie_match': 0.4,
@@ -89,6 +159,32 @@ DEFAULT_SERVING_SIZE = 100
 NUTRITION_CARRYOVER = 0.3
 
 # Cache settings
-CACHE_DIR = "cache/"
+CACHE_DIR = os.environ.get('MEAL_PLANNER_CACHE_DIR', "cache/")
 CACHE_TTL = 3600  # 1 hour
 MAX_CACHE_SIZE = 1000
+
+# Compiled catalog artifact (preprocessed data + scaler), rebuilt when the CSV
+# or the preprocessing configuration changes. Bump the version when
+# DataPreprocessor.preprocess_data changes what it produces.
+CATALOG_ARTIFACT_DIR = os.path.join(CACHE_DIR, "catalog/")
+CATALOG_FORMAT_VERSION = 6
+# Build the mapped catalog by streaming the CSV in chunks of this many rows
+# instead of preprocessing it in one frame (for catalogs larger than memory)
+CATALOG_STREAMING = False
+CATALOG_CHUNK_SIZE = 50000
+
+# Shared secret for the /admin/meals catalog update endpoint (disabled when unset)
+ADMIN_TOKEN = os.environ.get('MEAL_PLANNER_ADMIN_TOKEN')
+
+# Response cache for /generate-meal-plan
+PLAN_CACHE_ENABLED = True
+PLAN_CACHE_CALORIE_GRANULARITY = 50  # kcal; targets are rounded to this bucket (0 = exact)
+PLAN_CACHE_SIZE = MAX_CACHE_SIZE
+PLAN_CACHE_TTL = CACHE_TTL
+PLAN_CACHE_DISK = False  # also persist plans under CACHE_DIR so they survive restarts
+
+# Asynchronous plan jobs (/jobs)
+JOB_WORKERS = 2          # plans generated concurrently in the background
+JOB_MAX_PENDING = 100    # queued + running jobs before submissions are refused
+JOB_RESULT_TTL = 600     # seconds a finished job's result stays available
+JOB_MAX_WAIT = 30        # longest a GET /jobs/<id>?wait= long-poll may block, in seconds
@@ -0,0 +1,203 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from config import CACHE_TTL, MAX_CACHE_SIZE
+
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL.
+
+    Bounded to max_size entries; the least recently used entry is evicted
+    first. With weigh, each entry counts weigh(value) against max_size
+    instead of 1, so the bound can be on what the values hold. A ttl of None
+    disables expiry.
+    """
+
+    def __init__(self, max_size=MAX_CACHE_SIZE, ttl=CACHE_TTL, clock=time.monotonic, weigh=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._weigh = weigh if weigh is not None else lambda value: 1
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._size = 0  # total weight of the entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value)
+            self._size += self._weigh(value)
+            while self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._size -= self._weigh(value)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value, computing and storing it on a miss.
+
+        compute() runs outside the lock, so a slow computation never blocks
+        readers of other keys; concurrent misses on one key may compute twice.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl
+            }
+
+
+class DiskCache:
+    """JSON-file cache under a directory, so entries survive restarts.
+
+    One file per key (named by a hash of the key); expiry uses wall-clock
+    time because it must hold across processes. When more than max_size
+    files exist the oldest are removed.
+    """
+
+    def __init__(self, directory, max_size=MAX_CACHE_SIZE, ttl=CACHE_TTL):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return default
+        if entry['expires_at'] is not None and entry['expires_at'] <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return default
+        return entry['value']
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl is not None else None
+        path = self._path(key)
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'expires_at': expires_at, 'value': value}, f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory) if name.endswith('.json')
+            ]
+            if len(entries) <= self.max_size:
+                return
+            entries.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for path in entries[:len(entries) - self.max_size]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.directory, name))
+
+
+class TieredCache:
+    """In-memory LRUCache in front of an optional DiskCache.
+
+    Disk hits are promoted into memory; hit/miss counts are those of the
+    memory tier plus the number of lookups served from disk.
+    """
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+        self.disk_hits = 0
+
+    def get(self, key, default=None):
+        sentinel = object()
+        value = self.memory.get(key, sentinel)
+        if value is not sentinel:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key, sentinel)
+            if value is not sentinel:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats['disk_hits'] = self.disk_hits
+        return stats
@@ -0,0 +1,351 @@
+# catalog.py
+
+import fcntl
+import json
+import os
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+from config import COMMON_ALLERGENS, NUTRITION_COLS
+from models.restriction_index import DIET_FLAGS
+
+# Macros scored by the fitness function, in the order they are accumulated
+MACRO_KEYS = ['calories', 'protein', 'fat', 'carbs']
+
+# String fields the API response needs; everything else is numeric
+TEXT_FIELDS = ['meal_name', 'image_url', 'vitamins', 'ingredients']
+
+# MinMaxScaler attributes persisted next to the catalog
+SCALER_PARAMS = ['data_min_', 'data_max_', 'data_range_', 'scale_', 'min_', 'n_samples_seen_',
+                 'n_features_in_', 'feature_names_in_']
+
+
+def save_scaler(path, scaler):
+    """Write a fitted MinMaxScaler's parameters to an .npz file (no pickle)."""
+    params = {name: getattr(scaler, name) for name in SCALER_PARAMS if hasattr(scaler, name)}
+    if 'feature_names_in_' in params:
+        params['feature_names_in_'] = np.asarray(params['feature_names_in_'], dtype=str)
+    params['feature_range'] = np.asarray(scaler.feature_range, dtype=float)
+    np.savez(path, **params)
+
+
+def load_scaler(path):
+    with np.load(path, allow_pickle=False) as params:
+        feature_range = tuple(params['feature_range']) if 'feature_range' in params.files else (0, 1)
+        scaler = MinMaxScaler(feature_range=feature_range)
+        for name in params.files:
+            if name == 'feature_range':
+                continue
+            value = params[name]
+            if name == 'feature_names_in_':
+                value = value.astype(object)  # sklearn stores column names as an object array
+            setattr(scaler, name, value.item() if value.ndim == 0 else value)
+    return scaler
+
+
+def catalog_in_use(directory):
+    """Whether any process still has the MealCatalog in directory open."""
+    try:
+        with open(os.path.join(directory, 'meta.json')) as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            return False  # closing f releases the probe's lock
+    except FileNotFoundError:
+        return False
+
+
+class MealCatalog:
+    """Read-only, memory-mapped numeric view of the preprocessed meal catalog.
+
+    The numeric arrays (normalized and denormalized nutrition, diet/allergen
+    flags, meal-name IDs) are .npy files opened with mmap_mode='r', so every
+    worker process that opens the same directory shares one copy of the pages
+    through the OS page cache. Only the string fields used by the response
+    are loaded as Python objects, on first use.
+
+    Row positions are stable meal IDs: updates rewrite a row, additions are
+    appended and removed meals stay in place with live set to False.
+
+    Supports the small part of the DataFrame interface the restriction index
+    uses: len(), .columns and catalog[column].
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        # A shared lock on meta.json, held while this catalog is open, keeps
+        # the directory from being deleted under it (see catalog_in_use)
+        self._reader_lock = open(os.path.join(directory, 'meta.json'))
+        fcntl.flock(self._reader_lock, fcntl.LOCK_SH)
+        meta = json.load(self._reader_lock)
+        self.fingerprint = meta.get('fingerprint')
+        self.nutrition_cols = meta['nutrition_cols']
+        self.flag_cols = meta['flag_cols']
+        self.text_fields = meta['text_fields']
+
+        self.nutrition = self._map('nutrition')
+        self.nutrition_matrix = self._map('nutrition_denorm')
+        self.macro_matrix = self._map('macros')
+        self.flags = self._map('flags')
+        self.name_ids = self._map('name_ids')
+        self.live = self._map('live')
+
+        self._text = None
+        self.scaler = load_scaler(os.path.join(directory, 'scaler.npz'))
+
+    def __del__(self):
+        lock = getattr(self, '_reader_lock', None)
+        if lock is not None:
+            lock.close()
+
+    @property
+    def text(self):
+        """{field: list of values} of the string fields, loaded from text.json when first needed."""
+        if self._text is None:
+            with open(os.path.join(self.directory, 'text.json')) as f:
+                self._text = json.load(f)
+        return self._text
+
+    def _map(self, name):
+        # np.asarray drops the memmap subclass (and its per-operation overhead)
+        # while keeping the mapped buffer
+        return np.asarray(np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode='r'))
+
+    @classmethod
+    def write(cls, directory, meals_df, scaler, nutrition_cols=NUTRITION_COLS, fingerprint=None):
+        """Compile a preprocessed frame and its fitted scaler into directory and open it."""
+        writer = MealCatalogWriter(directory, len(meals_df), meals_df.columns, nutrition_cols)
+        writer.append(meals_df, scaler)
+        return writer.close(fingerprint)
+
+    def updated(self, directory, rows, meal_ids, remove=(), fingerprint=None):
+        """Write a new catalog to directory with rows changed, added and removed.
+
+        rows is a preprocessed but not normalized frame (as from
+        DataPreprocessor._prepare_chunk); each row replaces meal_ids[i], or is
+        appended when that ID is None. Only these rows are featurized. If the
+        live rows' nutrition range changes, the scaler is refitted and the
+        normalized column recomputed from the denormalized values, which the
+        search and the restriction masks use unchanged.
+        """
+        old_rows = len(self)
+        for meal_id in [m for m in meal_ids if m is not None] + list(remove):
+            if not 0 <= meal_id < old_rows:
+                raise KeyError(meal_id)
+        positions = []
+        total = old_rows
+        for meal_id in meal_ids:
+            if meal_id is None:
+                positions.append(total)
+                total += 1
+            else:
+                positions.append(meal_id)
+        positions = np.asarray(positions, dtype=np.int64)
+        added = total - old_rows
+
+        raw = rows[self.nutrition_cols].to_numpy(dtype=float)
+        nutrition_denorm = np.empty((total, len(self.nutrition_cols)))
+        nutrition_denorm[:old_rows] = self.nutrition_matrix
+        nutrition_denorm[positions] = raw
+        live = np.zeros(total, dtype=bool)
+        live[:old_rows] = self.live
+        live[positions] = True
+        live[np.asarray(list(remove), dtype=np.int64)] = False
+
+        # Refit only when the live range moved; an unchanged range keeps the
+        # existing rows bit-for-bit (their stored values round-trip the scaler)
+        scaler = self.scaler
+        if live.any():
+            low, high = nutrition_denorm[live].min(axis=0), nutrition_denorm[live].max(axis=0)
+            if not (np.allclose(low, scaler.data_min_, rtol=1e-9, atol=1e-12)
+                    and np.allclose(high, scaler.data_max_, rtol=1e-9, atol=1e-12)):
+                scaler = MinMaxScaler(feature_range=scaler.feature_range).fit(
+                    pd.DataFrame(nutrition_denorm[live], columns=self.nutrition_cols))
+
+        changed = pd.DataFrame(raw, columns=self.nutrition_cols)
+        if scaler is self.scaler:
+            nutrition = np.empty_like(nutrition_denorm)
+            nutrition[:old_rows] = self.nutrition
+        else:
+            nutrition = scaler.transform(pd.DataFrame(nutrition_denorm, columns=self.nutrition_cols))
+        flags = np.zeros((total, len(self.flag_cols)), dtype=np.int8)
+        flags[:old_rows] = self.flags
+        if len(positions):  # a remove-only update changes no rows
+            nutrition[positions] = scaler.transform(changed)
+            nutrition_denorm[positions] = scaler.inverse_transform(nutrition[positions])
+            flags[positions] = rows[self.flag_cols].to_numpy(dtype=np.int8).reshape(len(rows), len(self.flag_cols))
+
+        text = {field: list(values) + [None] * added for field, values in self.text.items()}
+        for field in text:
+            if field in rows.columns:
+                for position, value in zip(positions, rows[field]):
+                    text[field][position] = value if isinstance(value, str) else None
+
+        name_ids = np.empty(total, dtype=np.int64)
+        name_ids[:old_rows] = self.name_ids
+        if 'meal_name' in text:
+            known = {}
+            for name, name_id in zip(self.text['meal_name'], self.name_ids):
+                known.setdefault(name, int(name_id))
+            next_id = int(self.name_ids.max()) + 1 if old_rows else 0
+            for position in positions:
+                name = text['meal_name'][position]
+                if name not in known:
+                    known[name] = next_id
+                    next_id += 1
+                name_ids[position] = known[name]
+        else:
+            name_ids[positions] = positions
+
+        writer = MealCatalogWriter(directory, total, self.columns, self.nutrition_cols)
+        writer.append_arrays(nutrition, nutrition_denorm, flags, name_ids, text, scaler, live)
+        return writer.close(fingerprint)
+
+    def __len__(self):
+        return len(self.name_ids)
+
+    @property
+    def live_count(self):
+        return int(np.count_nonzero(self.live))
+
+    @property
+    def columns(self):
+        return self.nutrition_cols + self.flag_cols + self.text_fields
+
+    def __getitem__(self, column):
+        if column in self.flag_cols:
+            return self.flags[:, self.flag_cols.index(column)]
+        if column in self.nutrition_cols:
+            return self.nutrition[:, self.nutrition_cols.index(column)]
+        if column in self.text_fields:
+            return self.text[column]
+        raise KeyError(column)
+
+    def record(self, meal_idx):
+        """One meal as an un-normalized record: text fields, nutrition values and flags."""
+        record = self.row(meal_idx)
+        record.update(zip(self.nutrition_cols, self.nutrition_matrix[meal_idx].tolist()))
+        record.update(zip(self.flag_cols, self.flags[meal_idx].tolist()))
+        return record
+
+    def row(self, meal_idx):
+        """String fields of one meal, as a dict."""
+        return {field: values[meal_idx] for field, values in self.text.items()}
+
+
+class MealCatalogWriter:
+    """Writes a MealCatalog directory one chunk of preprocessed rows at a time.
+
+    The numeric arrays are preallocated .npy memory maps of the final row
+    count and text fields are spooled to per-field line files, so memory holds
+    only the current chunk (plus the meal-name -> ID map). The scaler passed
+    with the last chunk is saved alongside.
+    """
+
+    _MISSING_NAME = object()  # key for missing meal names, which all share one ID
+
+    def __init__(self, directory, rows, columns, nutrition_cols=NUTRITION_COLS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.rows = rows
+        self.nutrition_cols = list(nutrition_cols)
+        self.flag_cols = [col for col in DIET_FLAGS + list(COMMON_ALLERGENS) if col in columns]
+        self.text_fields = [field for field in TEXT_FIELDS if field in columns]
+        self.has_names = 'meal_name' in columns
+        self._macro_idx = [self.nutrition_cols.index(key) for key in MACRO_KEYS]
+        self._name_ids = {}
+        self._offset = 0
+
+        cols = len(self.nutrition_cols)
+        self._arrays = {
+            'nutrition': self._allocate('nutrition', float, (rows, cols)),
+            'nutrition_denorm': self._allocate('nutrition_denorm', float, (rows, cols)),
+            'macros': self._allocate('macros', float, (rows, len(MACRO_KEYS))),
+            'flags': self._allocate('flags', np.int8, (rows, len(self.flag_cols))),
+            'name_ids': self._allocate('name_ids', np.int64, (rows,)),
+            'live': self._allocate('live', bool, (rows,))
+        }
+        self._scaler = None
+        self._text_files = {
+            field: open(os.path.join(directory, f"text-{field}.jsonl"), 'w') for field in self.text_fields
+        }
+
+    def _allocate(self, name, dtype, shape):
+        return np.lib.format.open_memmap(os.path.join(self.directory, f"{name}.npy"),
+                                         mode='w+', dtype=dtype, shape=shape)
+
+    def _meal_name_ids(self, names):
+        # Same IDs as pd.factorize(use_na_sentinel=False) over the whole column:
+        # new names are numbered in order of first appearance
+        codes, uniques = pd.factorize(names, use_na_sentinel=False)
+        ids = np.empty(len(uniques), dtype=np.int64)
+        for i, name in enumerate(uniques):
+            key = name if pd.notna(name) else self._MISSING_NAME
+            ids[i] = self._name_ids.setdefault(key, len(self._name_ids))
+        return ids[codes]
+
+    def append(self, meals_df, scaler):
+        """Add a chunk of preprocessed (normalized) rows."""
+        start = self._offset
+        nutrition = meals_df[self.nutrition_cols].to_numpy(dtype=float)
+        if self.has_names:
+            name_ids = self._meal_name_ids(meals_df['meal_name'])
+        else:
+            name_ids = np.arange(start, start + len(meals_df))
+        text = {field: meals_df[field] for field in self.text_fields}
+        self.append_arrays(nutrition, scaler.inverse_transform(nutrition),
+                           meals_df[self.flag_cols].to_numpy(dtype=np.int8).reshape(len(meals_df), len(self.flag_cols)),
+                           name_ids, text, scaler)
+
+    def append_arrays(self, nutrition, nutrition_denorm, flags, name_ids, text, scaler, live=None):
+        """Add rows given as arrays; live defaults to all True."""
+        start, stop = self._offset, self._offset + len(nutrition)
+        if stop > self.rows:
+            raise ValueError(f"Catalog was sized for {self.rows} rows, got {stop}")
+
+        self._arrays['nutrition'][start:stop] = nutrition
+        self._arrays['nutrition_denorm'][start:stop] = nutrition_denorm
+        self._arrays['macros'][start:stop] = nutrition_denorm[:, self._macro_idx]
+        self._arrays['flags'][start:stop] = flags
+        self._arrays['name_ids'][start:stop] = name_ids
+        self._arrays['live'][start:stop] = True if live is None else live
+
+        for field, f in self._text_files.items():
+            for value in text[field]:
+                f.write(json.dumps(value if isinstance(value, str) else None) + '\n')
+        self._scaler = scaler
+        self._offset = stop
+
+    def close(self, fingerprint=None):
+        """Flush everything, write the metadata and open the finished catalog."""
+        if self._offset != self.rows:
+            raise ValueError(f"Catalog was sized for {self.rows} rows, got {self._offset}")
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays = {}
+
+        # Assemble text.json from the spooled fields without loading them
+        with open(os.path.join(self.directory, 'text.json'), 'w') as out:
+            out.write('{')
+            for i, (field, f) in enumerate(self._text_files.items()):
+                f.close()
+                out.write(('' if i == 0 else ', ') + json.dumps(field) + ': [')
+                with open(f.name) as lines:
+                    for j, line in enumerate(lines):
+                        out.write(('' if j == 0 else ', ') + line.rstrip('\n'))
+                out.write(']')
+                os.remove(f.name)
+            out.write('}')
+        self._text_files = {}
+
+        save_scaler(os.path.join(self.directory, 'scaler.npz'), self._scaler)
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump({
+                'fingerprint': fingerprint,
+                'rows': self.rows,
+                'nutrition_cols': self.nutrition_cols,
+                'flag_cols': self.flag_cols,
+                'text_fields': self.text_fields
+            }, f)
+        return MealCatalog(self.directory)  # maps the arrays; text.json stays on disk until used
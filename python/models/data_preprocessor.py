@@ -1,10 +1,58 @@
 # data_preprocessor.py
 
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.preprocessing import MinMaxScaler
 import pickle
-import re
-from config import DATA_PATH, SCALER_SAVE_PATH, COMMON_ALLERGENS, NUTRITION_COLS
+from config import (
+    DATA_PATH, SCALER_SAVE_PATH, COMMON_ALLERGENS, NUTRITION_COLS,
+    CATALOG_ARTIFACT_DIR, CATALOG_FORMAT_VERSION, CATALOG_STREAMING, CATALOG_CHUNK_SIZE
+)
+from models.catalog import MealCatalog, MealCatalogWriter, catalog_in_use, save_scaler, load_scaler
+
+def _contains_matrix(values, patterns, regex=False):
+    """0/1 matrix (rows x patterns) of whether each string contains each pattern.
+
+    Every distinct string is tested once and the results are broadcast back
+    by its factorized code, so repeated values cost one array lookup.
+    Missing values never match.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    hits = np.zeros((len(uniques) + 1, len(patterns)), dtype=int)  # last row: missing values (code -1)
+    for j, pattern in enumerate(patterns):
+        hits[:-1, j] = uniques.str.contains(pattern, regex=regex)
+    return hits[codes]
+
+
+def vitamin_features(vitamins):
+    """One-hot vitamin columns from the comma-separated vitamins field.
+
+    Returns the sorted vitamin names and a {name: 0/1 Series} dict. A meal
+    has a vitamin when the name occurs anywhere in its vitamins string
+    (substring match, as the original row-wise extraction did).
+    """
+    uniques = pd.Series(pd.unique(vitamins.dropna().astype(str)), dtype=object)
+    names = sorted(set(uniques.str.split(', ').explode().str.strip()))
+    text = vitamins.where(vitamins.isna(), vitamins.astype(str))
+    hits = _contains_matrix(text, names)
+    return names, {name: pd.Series(hits[:, j], index=vitamins.index) for j, name in enumerate(names)}
+
+
+def allergen_features(ingredients):
+    """{allergen: 0/1 Series} marking ingredient strings that match any of its keywords."""
+    patterns = ['|'.join(keywords) for keywords in COMMON_ALLERGENS.values()]
+    hits = _contains_matrix(ingredients.astype(str), patterns, regex=True)
+    return {allergen: pd.Series(hits[:, j], index=ingredients.index) for j, allergen in enumerate(COMMON_ALLERGENS)}
+
 
 class DataPreprocessor:
     def __init__(self):
@@ -12,6 +60,7 @@ class DataPreprocessor:
         self.scaler = MinMaxScaler()
         self.vitamins = None
         self.diet_cols = None
+        self.catalog_home = None
 
     def load_data(self):
         try:
@@ -46,26 +95,14 @@ class DataPreprocessor:
 
         # Vitamins one-hot (optional)
         if 'vitamins' in self.df.columns:
-            vitamins = set()
-            for item in self.df['vitamins']:
-                if pd.notna(item):
-                    for vitamin in str(item).split(', '):
-                        vitamins.add(vitamin.strip())
-            self.vitamins = list(vitamins)
-            for vitamin in self.vitamins:
-                self.df[vitamin] = self.df['vitamins'].apply(
-                    lambda x: 1 if pd.notna(x) and vitamin in str(x) else 0
-                )
+            self.vitamins, vitamin_cols = vitamin_features(self.df['vitamins'])
+            self._set_columns(vitamin_cols)
         else:
             self.vitamins = []
 
         # Allergen columns
         if 'ingredients' in self.df.columns:
-            for allergen, keywords in COMMON_ALLERGENS.items():
-                pattern = '|'.join(keywords)
-                self.df[allergen] = self.df['ingredients'].apply(
-                    lambda x: 1 if re.search(pattern, str(x)) else 0
-                )
+            self._set_columns(allergen_features(self.df['ingredients']))
 
         # Ensure health/nutrition columns
         for col in NUTRITION_COLS:
@@ -86,6 +123,81 @@ class DataPreprocessor:
 
         return self.df, self.scaler, self.vitamins, self.diet_cols
 
+    # Streaming ingestion
+
+    def _read_chunks(self, chunksize):
+        return pd.read_csv(DATA_PATH, chunksize=chunksize)
+
+    def _prepare_chunk(self, chunk, columns):
+        """The row-local part of preprocess_data() (everything but normalization) for one chunk."""
+        chunk = chunk.copy()
+        for col in self.diet_cols:
+            chunk[col] = chunk[col].astype(int) if col in columns else 0
+        if 'ingredients' in columns:
+            chunk['ingredients'] = chunk['ingredients'].astype(str).str.lower()
+            for allergen, values in allergen_features(chunk['ingredients']).items():
+                chunk[allergen] = values
+        for col in NUTRITION_COLS:
+            if col not in columns:
+                chunk[col] = 0.0
+        chunk[NUTRITION_COLS] = chunk[NUTRITION_COLS].fillna(0)
+        return chunk
+
+    def stream_catalog(self, directory, chunksize=CATALOG_CHUNK_SIZE, fingerprint=None):
+        """Build the MealCatalog store in directory from the CSV without loading it whole.
+
+        Two passes over the file: the first cleans each chunk, fits the scaler
+        with partial_fit and counts rows; the second normalizes each chunk and
+        writes it into the preallocated store. Peak memory is about one chunk
+        (plus the distinct meal names), and the store is identical to
+        MealCatalog.write() on the output of preprocess_data().
+        """
+        columns = pd.read_csv(DATA_PATH, nrows=0).columns
+        self.diet_cols = ['vegan', 'vegetarian', 'keto', 'paleo', 'gluten_free', 'mediterranean']
+        for col in self.diet_cols:
+            if col not in columns:
+                print(f"Warning: Diet column '{col}' not found in dataset")
+        if 'ingredients' not in columns:
+            print("Warning: 'ingredients' column not found in dataset")
+        for col in NUTRITION_COLS:
+            if col not in columns:
+                print(f"Warning: Column '{col}' not found, setting to 0")
+
+        self.scaler = MinMaxScaler()
+        rows = 0
+        vitamins = set()
+        for chunk in self._read_chunks(chunksize):
+            chunk = self._prepare_chunk(chunk, columns)
+            self.scaler.partial_fit(chunk[NUTRITION_COLS])
+            if 'vitamins' in columns:
+                vitamins.update(vitamin_features(chunk['vitamins'])[0])
+            rows += len(chunk)
+        self.vitamins = sorted(vitamins)
+        print(f"Fitted scaler on {rows} rows in chunks of {chunksize}")
+
+        with open(SCALER_SAVE_PATH, 'wb') as f:
+            pickle.dump({'scaler': self.scaler, 'columns': NUTRITION_COLS}, f)
+        print(f"Scaler saved to {SCALER_SAVE_PATH}")
+
+        store_columns = list(columns) + self.diet_cols + (list(COMMON_ALLERGENS) if 'ingredients' in columns else [])
+        writer = MealCatalogWriter(directory, rows, store_columns, NUTRITION_COLS)
+        for chunk in self._read_chunks(chunksize):
+            chunk = self._prepare_chunk(chunk, columns)
+            chunk[NUTRITION_COLS] = self.scaler.transform(chunk[NUTRITION_COLS])
+            writer.append(chunk, self.scaler)
+        return writer.close(fingerprint)
+
+    def _set_columns(self, columns):
+        """Assign several feature columns at once (one concat instead of a fragmenting insert each)."""
+        new = {}
+        for col, values in columns.items():
+            if col in self.df.columns:
+                self.df[col] = values
+            else:
+                new[col] = values
+        if new:
+            self.df = pd.concat([self.df, pd.DataFrame(new, index=self.df.index)], axis=1)
+
     def validate_data(self):
         required_columns = ['meal_name', 'calories', 'protein', 'fat', 'carbs', 'ingredients', 'image_url']
         missing_columns = [col for col in required_columns if col not in self.df.columns]
@@ -94,3 +206,357 @@ class DataPreprocessor:
             return False
         print("Data validation passed")
         return True
+
+    # Compiled catalog artifact
+
+    def catalog_fingerprint(self):
+        """Content hash of the source CSV plus everything that shapes its preprocessing."""
+        digest = hashlib.sha256()
+        with open(DATA_PATH, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(json.dumps({
+            'format_version': CATALOG_FORMAT_VERSION,
+            'nutrition_cols': NUTRITION_COLS,
+            'allergens': COMMON_ALLERGENS,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__
+        }, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def load_or_build_catalog(self, artifact_dir=CATALOG_ARTIFACT_DIR):
+        """Return what preprocess_data() returns, loading the compiled artifact when it is fresh.
+
+        The artifact lives in artifact_dir/<fingerprint>/ and is rebuilt (and
+        older ones removed) only when the CSV or preprocessing config changes.
+        An artifact built with CATALOG_STREAMING holds no pickled frame; the
+        frame is then preprocessed from the CSV and the artifact kept as is.
+        """
+        fingerprint = self.catalog_fingerprint()
+        path = os.path.join(artifact_dir, fingerprint[:16])
+        base = self._artifact_base(path)
+
+        streamed = False
+        if os.path.exists(os.path.join(base, 'meta.json')):
+            try:
+                result = self._load_artifact(base, fingerprint)
+                if result is not None:
+                    print(f"Loaded compiled catalog with {len(self.df)} rows from {base}")
+                    return result
+                streamed = True
+            except Exception as e:
+                print(f"Warning: could not load catalog artifact ({e}), rebuilding")
+
+        self.load_data()
+        result = self.preprocess_data()
+        if streamed:
+            return result
+        try:
+            self._save_artifact(artifact_dir, path, fingerprint)
+        except OSError as e:
+            print(f"Warning: could not save catalog artifact: {e}")
+        return result
+
+    def load_mapped_catalog(self, artifact_dir=CATALOG_ARTIFACT_DIR):
+        """Open the memory-mapped MealCatalog from the compiled artifact, building it if needed.
+
+        Unlike load_or_build_catalog() this never loads the pandas frame when
+        the artifact is fresh, so each worker process only maps shared pages.
+        With CATALOG_STREAMING a missing artifact is built chunk by chunk, so
+        catalogs larger than memory can be compiled.
+
+        If meals were changed through update_catalog(), the latest catalog
+        version is opened instead of the one compiled from the CSV, after
+        replaying any logged change this artifact has not seen yet.
+        """
+        fingerprint = self.catalog_fingerprint()
+        self.catalog_home = os.path.join(artifact_dir, fingerprint[:16])
+        try:
+            catalog = MealCatalog(os.path.join(self._artifact_base(self.catalog_home), 'mapped'))
+            if catalog.fingerprint != fingerprint:
+                raise ValueError("fingerprint mismatch")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Compiled catalog not available ({e}), building it")
+            if CATALOG_STREAMING:
+                self._save_streamed_artifact(artifact_dir, self.catalog_home, fingerprint)
+            else:
+                self.load_or_build_catalog(artifact_dir)
+
+        with self._update_lock():
+            catalog = self._replay_changes()
+        print(f"Mapped compiled catalog with {len(catalog)} rows from {catalog.directory}")
+        return catalog
+
+    # Incremental updates. Each change writes a new catalog version under
+    # <catalog_home>/versions/ and then repoints the CURRENT file at it, so
+    # readers (in any worker process) switch between complete versions only.
+    # Versions are deleted once superseded and no longer open anywhere.
+    #
+    # Every change is also appended to <artifact_dir>/changes.jsonl, which
+    # outlives the fingerprinted catalog homes. A home replays the entries it
+    # has not applied yet (counted in its CHANGES_APPLIED file) when it is
+    # opened, so edits survive a CSV change, a library upgrade or a format
+    # version bump. Meal IDs past the compiled catalog (meals added through
+    # updates) are shifted by however many rows the CSV gained meanwhile;
+    # edits of CSV rows assume the existing rows keep their positions.
+
+    def current_catalog_dir(self):
+        """Directory of the newest catalog version (cheap enough to check per request)."""
+        try:
+            with open(os.path.join(self.catalog_home, 'CURRENT')) as f:
+                return os.path.join(self.catalog_home, f.read().strip())
+        except FileNotFoundError:
+            return os.path.join(self._artifact_base(self.catalog_home), 'mapped')
+
+    def update_catalog(self, add=(), update=None, remove=()):
+        """Add, update or remove meals and publish the result as the current catalog version.
+
+        add is a list of raw meal records (CSV columns), update maps meal IDs
+        (catalog row positions) to the fields to change, and remove lists meal
+        IDs to retire. Only these rows are preprocessed. Returns the new
+        MealCatalog and the meal IDs given to the added records (taken under
+        the update lock, so another worker's concurrent update cannot shift
+        them); call after load_mapped_catalog().
+        """
+        update = update or {}
+        with self._update_lock():
+            # Always apply on top of the newest version, which another worker may have written
+            current = self._replay_changes()
+            entry = json.dumps({
+                'add': [dict(record) for record in add],
+                'update': {str(meal_id): fields for meal_id, fields in update.items()},
+                'remove': list(remove),
+                'base_rows': self._base_rows()
+            }, default=lambda value: value.item() if isinstance(value, np.generic) else str(value))
+            catalog = self._apply_change(current, add, update, remove)
+            added_ids = list(range(len(current), len(current) + len(add)))  # added rows are appended
+            with open(self._change_log_path(), 'a') as f:
+                f.write(entry + '\n')
+            self._write_pointer(self.catalog_home, 'CHANGES_APPLIED', str(self._changes_applied() + 1))
+
+        print(f"Catalog updated: {len(add)} added, {len(update)} updated, "
+              f"{len(remove)} removed, {catalog.live_count} live meals")
+        return catalog, added_ids
+
+    @contextlib.contextmanager
+    def _update_lock(self):
+        """Serialize catalog writers across worker processes: this home's lock, then the change log's."""
+        with open(os.path.join(self.catalog_home, '.update.lock'), 'w') as lock, \
+                open(os.path.join(os.path.dirname(self.catalog_home), '.changes.lock'), 'w') as log_lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            fcntl.flock(log_lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(log_lock, fcntl.LOCK_UN)
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _change_log_path(self):
+        return os.path.join(os.path.dirname(self.catalog_home), 'changes.jsonl')
+
+    def _changes_applied(self):
+        try:
+            with open(os.path.join(self.catalog_home, 'CHANGES_APPLIED')) as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return 0
+
+    def _base_rows(self):
+        """Rows of the catalog compiled from the CSV, before any update."""
+        return len(MealCatalog(os.path.join(self._artifact_base(self.catalog_home), 'mapped')))
+
+    def _replay_changes(self):
+        """Apply the logged changes this home has not seen and return the newest MealCatalog.
+
+        Call with _update_lock() held.
+        """
+        current = MealCatalog(self.current_catalog_dir())
+        try:
+            with open(self._change_log_path()) as f:
+                entries = f.read().splitlines()
+        except FileNotFoundError:
+            return current
+        applied = self._changes_applied()
+        if applied >= len(entries):
+            return current
+
+        base_rows = self._base_rows()
+        for line in entries[applied:]:
+            try:
+                change = json.loads(line)
+                logged_rows = change['base_rows']
+                shift = lambda meal_id: meal_id + base_rows - logged_rows if meal_id >= logged_rows else meal_id
+                current = self._apply_change(
+                    current, change['add'],
+                    {shift(int(meal_id)): fields for meal_id, fields in change['update'].items()},
+                    [shift(meal_id) for meal_id in change['remove']]
+                )
+            except (KeyError, ValueError, TypeError) as e:
+                print(f"Warning: could not replay a logged catalog change ({e!r}), skipping it")
+        self._write_pointer(self.catalog_home, 'CHANGES_APPLIED', str(len(entries)))
+        print(f"Replayed {len(entries) - applied} logged catalog changes")
+        return current
+
+    def _apply_change(self, current, add, update, remove):
+        """Write current with the change applied as the next version, point CURRENT at it and open it."""
+        records = [dict(record) for record in add]
+        meal_ids = [None] * len(records)
+        for meal_id, fields in update.items():
+            if not 0 <= meal_id < len(current) or not current.live[meal_id]:
+                raise KeyError(meal_id)
+            records.append(dict(current.record(meal_id), **fields))
+            meal_ids.append(meal_id)
+
+        rows = pd.DataFrame(records) if records else pd.DataFrame(columns=current.columns)
+        missing = [col for col in ['meal_name', 'ingredients', 'calories', 'protein', 'fat', 'carbs']
+                   if records and col not in rows.columns]
+        if missing:
+            raise ValueError(f"Meal records are missing columns: {missing}")
+        if records:
+            self.diet_cols = ['vegan', 'vegetarian', 'keto', 'paleo', 'gluten_free', 'mediterranean']
+            for col in self.diet_cols:
+                if col in rows.columns:
+                    rows[col] = rows[col].fillna(0)  # records may omit diets they do not follow
+            rows = self._prepare_chunk(rows, rows.columns)
+            for col in current.flag_cols:
+                if col not in rows.columns:
+                    rows[col] = 0
+
+        version = self._next_catalog_version()
+        versions_dir = os.path.join(self.catalog_home, 'versions')
+        os.makedirs(versions_dir, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=versions_dir, prefix='.building-')
+        try:
+            current.updated(tmp_path, rows, meal_ids, remove,
+                            fingerprint=f"{current.fingerprint.split('+')[0]}+{version}")
+            os.replace(tmp_path, os.path.join(versions_dir, str(version)))
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        self._write_pointer(self.catalog_home, 'CURRENT', os.path.join('versions', str(version)))
+        catalog = MealCatalog(os.path.join(versions_dir, str(version)))
+
+        # Keep the previous version for readers that have not switched
+        # yet, and any older one a worker still has open
+        for name in os.listdir(versions_dir):
+            old = os.path.join(versions_dir, name)
+            if name.isdigit() and int(name) < version - 1 and not catalog_in_use(old):
+                shutil.rmtree(old, ignore_errors=True)
+        return catalog
+
+    def _next_catalog_version(self):
+        return self._next_number(os.path.join(self.catalog_home, 'versions'))
+
+    @staticmethod
+    def _next_number(directory):
+        """One more than the highest numbered entry in directory."""
+        if not os.path.isdir(directory):
+            return 1
+        return max([int(name) for name in os.listdir(directory) if name.isdigit()], default=0) + 1
+
+    @staticmethod
+    def _write_pointer(directory, name, target):
+        """Atomically point the file directory/name at target (a relative path)."""
+        fd, tmp_pointer = tempfile.mkstemp(dir=directory, prefix=f".{name}-")
+        with os.fdopen(fd, 'w') as f:
+            f.write(target)
+        os.replace(tmp_pointer, os.path.join(directory, name))
+
+    # Each compile of an artifact goes to <path>/builds/<n>/ and the BASE file
+    # points at the newest one, so a rebuild swaps it in with a rename and
+    # leaves the catalog versions and CURRENT pointer next to it untouched.
+
+    @staticmethod
+    def _artifact_base(path):
+        """Directory of the current build of the artifact in path."""
+        try:
+            with open(os.path.join(path, 'BASE')) as f:
+                return os.path.join(path, f.read().strip())
+        except FileNotFoundError:
+            return path  # built before builds/ existed
+
+    def _save_artifact(self, artifact_dir, path, fingerprint):
+        def write(tmp_path):
+            self.df.to_pickle(os.path.join(tmp_path, 'catalog.pkl'))
+            MealCatalog.write(os.path.join(tmp_path, 'mapped'), self.df, self.scaler, NUTRITION_COLS, fingerprint)
+            self._write_artifact_meta(tmp_path, fingerprint, len(self.df))
+
+        self._publish_artifact(artifact_dir, path, write)
+
+    def _save_streamed_artifact(self, artifact_dir, path, fingerprint, chunksize=CATALOG_CHUNK_SIZE):
+        """Like _save_artifact, but streams the CSV into the mapped store and skips the pickled frame."""
+        def write(tmp_path):
+            catalog = self.stream_catalog(os.path.join(tmp_path, 'mapped'), chunksize, fingerprint)
+            self._write_artifact_meta(tmp_path, fingerprint, len(catalog), streamed=True)
+
+        self._publish_artifact(artifact_dir, path, write)
+
+    def _write_artifact_meta(self, tmp_path, fingerprint, rows, streamed=False):
+        save_scaler(os.path.join(tmp_path, 'scaler.npz'), self.scaler)
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump({
+                'fingerprint': fingerprint,
+                'rows': rows,
+                'vitamins': self.vitamins,
+                'diet_cols': self.diet_cols,
+                'streamed': streamed
+            }, f)
+
+    def _publish_artifact(self, artifact_dir, path, write):
+        builds_dir = os.path.join(path, 'builds')
+        os.makedirs(builds_dir, exist_ok=True)
+        # Build in a temporary directory and rename, so readers never see half an artifact
+        tmp_path = tempfile.mkdtemp(dir=builds_dir, prefix='.building-')
+        try:
+            write(tmp_path)
+            with open(os.path.join(path, '.update.lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)  # the same lock update_catalog() takes
+                try:
+                    build = str(self._next_number(builds_dir))
+                    os.replace(tmp_path, os.path.join(builds_dir, build))
+                    self._write_pointer(path, 'BASE', os.path.join('builds', build))
+                    # Older builds go once no worker has their catalog mapped
+                    for name in os.listdir(builds_dir):
+                        old = os.path.join(builds_dir, name)
+                        if name.isdigit() and name != build and not catalog_in_use(os.path.join(old, 'mapped')):
+                            shutil.rmtree(old, ignore_errors=True)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+        # Artifacts for older versions of the catalog are no longer needed once
+        # no worker (possibly still running older code) has one of their catalogs open
+        for name in os.listdir(artifact_dir):
+            other = os.path.join(artifact_dir, name)
+            if other != path and os.path.isdir(other) and not name.startswith('.') \
+                    and not self._home_in_use(other):
+                shutil.rmtree(other, ignore_errors=True)
+        print(f"Compiled catalog saved to {path}")
+
+    @staticmethod
+    def _home_in_use(home):
+        """Whether any catalog build or version under an artifact directory is open."""
+        catalogs = [os.path.join(home, 'mapped')]
+        for subdir, suffix in (('builds', 'mapped'), ('versions', '')):
+            if os.path.isdir(os.path.join(home, subdir)):
+                catalogs += [os.path.join(home, subdir, name, suffix)
+                             for name in os.listdir(os.path.join(home, subdir))]
+        return any(catalog_in_use(catalog) for catalog in catalogs)
+
+    def _load_artifact(self, path, fingerprint):
+        """What preprocess_data() returns, or None for a streamed artifact (no pickled frame)."""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['fingerprint'] != fingerprint:
+            raise ValueError("fingerprint mismatch")
+        if meta.get('streamed'):
+            return None
+
+        self.df = pd.read_pickle(os.path.join(path, 'catalog.pkl'))
+        self.scaler = load_scaler(os.path.join(path, 'scaler.npz'))
+        self.vitamins = meta['vitamins']
+        self.diet_cols = meta['diet_cols']
+        return self.df, self.scaler, self.vitamins, self.diet_cols
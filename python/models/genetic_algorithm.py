@@ -1,53 +1,201 @@
 import numpy as np
+import pandas as pd
 import random
 import pickle
 import copy
+import functools
+import hashlib
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import os
+import threading
+import time
 from config import (
     GA_POPULATION_SIZE, GA_GENERATIONS, GA_MUTATION_RATE,
     GA_CROSSOVER_RATE, GA_ELITISM_COUNT, GA_TOURNAMENT_SIZE,
-    FITNESS_WEIGHTS, COMMON_ALLERGENS, MODEL_SAVE_PATH,
-    HEALTH_RISK_THRESHOLDS, NUTRITION_COLS
+    GA_STAGNATION_GENERATIONS, GA_FITNESS_TARGET, GA_MIN_DIVERSITY, GA_TIME_BUDGET_MS,
+    GA_ISLAND_COUNT, GA_MIGRATION_INTERVAL, GA_MIGRATION_SIZE,
+    GA_DELTA_FITNESS, GA_DELTA_CHECK, GA_FITNESS_MEMO_SIZE, GA_REPLAN_GENERATIONS, GA_REPLAN_CHUNK_SIZE,
+    GA_SEED_FRACTION, GA_SEED_CANDIDATES, GA_SEED_SAMPLE, GA_REPAIR_COUNT, GA_REPAIR_CANDIDATES,
+    GA_MACRO_INDEX_CACHE_MEALS, GA_LOG_INTERVAL, FITNESS_WEIGHTS, MODEL_SAVE_PATH, NUTRITION_COLS, MEAL_TYPES
 )
 from sklearn.preprocessing import MinMaxScaler
+from sklearn.utils.validation import check_is_fitted
+from models.restriction_index import RestrictionIndex, restriction_profile_key
+from models.cache import LRUCache
+from models.catalog import MealCatalog, MACRO_KEYS
+from models.macro_index import MacroIndex
+from models.observers import PhaseClock, NULL_CLOCK
+
+logger = logging.getLogger(__name__)
+
 
 class MealPlanGeneticAlgorithm:
-    def __init__(self, meals_df):
-        self.meals = meals_df.reset_index(drop=True)
-        self.scaler = MinMaxScaler()  # placeholder
-        self.nutrition_cols = NUTRITION_COLS
+    # Score children from their parents' cached day totals, optionally
+    # checking every delta result against full recomputation (island
+    # workers included, see SEARCH_SETTINGS)
+    delta_fitness = GA_DELTA_FITNESS
+    delta_check = GA_DELTA_CHECK
+    fitness_memo_size = GA_FITNESS_MEMO_SIZE
+    seed_fraction = GA_SEED_FRACTION
+    repair_count = GA_REPAIR_COUNT
+    # Per-instance overrides of the above carry over to with_catalog() and island workers
+    SEARCH_SETTINGS = ('delta_fitness', 'delta_check', 'fitness_memo_size', 'seed_fraction', 'repair_count')
+
+    def __init__(self, meals_df, scaler=None, nutrition_cols=None, seed=None, island_count=GA_ISLAND_COUNT):
+        if isinstance(meals_df, MealCatalog):
+            # Memory-mapped catalog: nutrition is already denormalized and shared between processes
+            self.meals = meals_df
+            nutrition_cols = meals_df.nutrition_cols
+        else:
+            self.meals = meals_df.reset_index(drop=True)
+        self._scaler = scaler if scaler is not None else MinMaxScaler()  # placeholder until injected
+        self._nutrition_cols = list(nutrition_cols) if nutrition_cols is not None else NUTRITION_COLS
         self.population = []
         self.fitness_scores = []
         self.best_solution = None
         self.best_fitness = -float('inf')
+        self.last_run_stats = None
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self._rng_lock = threading.Lock()
+        self.valid_meals_cache = LRUCache()
+        self.macro_index_cache = self._new_macro_index_cache()
+        self.island_count = island_count
+        self.observers = []
+        self._run_ids = itertools.count(1)
+        self._island_pool = None
+        self._island_pool_size = 0
+
+        # Integer meal-name IDs for the variety term (same name -> same ID)
+        if isinstance(self.meals, MealCatalog):
+            self.meal_name_ids = self.meals.name_ids
+        elif 'meal_name' in self.meals.columns:
+            self.meal_name_ids = pd.factorize(self.meals['meal_name'], use_na_sentinel=False)[0]
+        else:
+            self.meal_name_ids = np.arange(len(self.meals))
+
+        self.nutrition_matrix = None
+        self._build_nutrition_matrix()
+
+    # The scaler and column order are usually injected after construction,
+    # so the denormalized matrix is rebuilt whenever either changes.
+    @property
+    def scaler(self):
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+        self._build_nutrition_matrix()
+
+    @property
+    def nutrition_cols(self):
+        return self._nutrition_cols
+
+    @nutrition_cols.setter
+    def nutrition_cols(self, cols):
+        self._nutrition_cols = list(cols) if cols is not None else NUTRITION_COLS
+        self._build_nutrition_matrix()
+
+    def _build_nutrition_matrix(self):
+        """Denormalize every meal once into a float matrix (meals x nutrition_cols)
+        and rebuild the restriction index from it.
+
+        Left as None while the scaler is unfitted; _get_nutrition_matrix() retries
+        then, so the original NotFittedError still surfaces at scoring time.
+        """
+        if isinstance(self.meals, MealCatalog):
+            self.nutrition_matrix = self.meals.nutrition_matrix
+            self._macro_matrix = self.meals.macro_matrix
+        elif not hasattr(self._scaler, 'scale_'):
+            self.nutrition_matrix = None
+            self._macro_matrix = None
+        else:
+            vals = self.meals[self._nutrition_cols].to_numpy(dtype=float)
+            self.nutrition_matrix = self._scaler.inverse_transform(vals)
+            macro_idx = [self._nutrition_cols.index(key) for key in MACRO_KEYS]
+            self._macro_matrix = np.ascontiguousarray(self.nutrition_matrix[:, macro_idx])
+        live = self.meals.live if isinstance(self.meals, MealCatalog) else None
+        self.restriction_index = RestrictionIndex(self.meals, self.nutrition_matrix, self._nutrition_cols, live)
+        self.valid_meals_cache.clear()
+        self.macro_index_cache.clear()
+        self.close()  # island workers hold the previous arrays
+
+    def with_catalog(self, catalog):
+        """A GA over an updated MealCatalog with this one's settings.
+
+        The random stream and the island pool are shared (island workers
+        switch catalogs per task), so runs still in progress on this instance
+        finish against the old catalog while new runs use the new one.
+        """
+        ga = type(self)(catalog, island_count=self.island_count)
+        for name, value in self._search_settings().items():
+            setattr(ga, name, value)
+        ga.observers = self.observers
+        ga._run_ids = self._run_ids
+        ga._seed_sequence = self._seed_sequence
+        ga._rng_lock = self._rng_lock
+        ga._island_pool = self._island_pool
+        ga._island_pool_size = self._island_pool_size
+        return ga
+
+    def _search_settings(self):
+        return {name: getattr(self, name) for name in self.SEARCH_SETTINGS}
+
+    @classmethod
+    def _search_only(cls, macro_matrix, meal_name_ids):
+        """Instance holding just the arrays the evolution loop needs (used in island workers)."""
+        ga = cls.__new__(cls)
+        ga._macro_matrix = macro_matrix
+        ga.meal_name_ids = meal_name_ids
+        ga.macro_index_cache = cls._new_macro_index_cache()
+        return ga
+
+    def _get_nutrition_matrix(self):
+        if self.nutrition_matrix is None:
+            check_is_fitted(self._scaler)
+            self._build_nutrition_matrix()
+        return self.nutrition_matrix
 
     def _denormalize_row(self, row):
         vals = row[self.nutrition_cols].values.reshape(1, -1)
         denorm = self.scaler.inverse_transform(vals)
         return dict(zip(self.nutrition_cols, denorm[0]))
 
-    def _get_valid_meals(self, dietary_restrictions):
-        df = self.meals
-        valid_mask = np.ones(len(df), dtype=bool)
+    def _valid_meal_array(self, dietary_restrictions):
+        """Valid meal indices for a profile, cached per canonical restriction profile."""
+        if self.restriction_index.needs_nutrition(dietary_restrictions):
+            self._get_nutrition_matrix()  # builds the health-risk masks or raises if unfitted
 
-        for diet in ['vegetarian', 'vegan', 'keto', 'paleo', 'gluten_free', 'mediterranean']:
-            if dietary_restrictions.get(diet, False) and diet in df.columns:
-                valid_mask &= (df[diet] == 1)
+        def resolve():
+            valid = self.restriction_index.resolve(dietary_restrictions)
+            valid.flags.writeable = False  # shared between requests
+            return valid
 
-        for allergy in dietary_restrictions.get('allergies', []):
-            allergy = allergy.lower()
-            if allergy in COMMON_ALLERGENS and allergy in df.columns:
-                valid_mask &= (df[allergy] == 0)
+        return self.valid_meals_cache.get_or_compute(restriction_profile_key(dietary_restrictions), resolve)
 
-        for risk in dietary_restrictions.get('health_risks', []):
-            thresholds = HEALTH_RISK_THRESHOLDS.get(risk, {})
-            for col, thresh in thresholds.items():
-                if col in df.columns:
-                    if 'omega3' in col:
-                        valid_mask &= df.apply(lambda row: self._denormalize_row(row)[col] >= thresh, axis=1)
-                    else:
-                        valid_mask &= df.apply(lambda row: self._denormalize_row(row)[col] <= thresh, axis=1)
+    @staticmethod
+    def _new_macro_index_cache():
+        # Trees grow with their valid-meal pools, so the bound is on meals indexed
+        return LRUCache(max_size=GA_MACRO_INDEX_CACHE_MEALS, ttl=None, weigh=len)
 
-        return np.where(valid_mask)[0].tolist()
+    def _macro_index(self, valid):
+        """MacroIndex over the valid meals, cached per valid set (island workers only see the array)."""
+        if self._macro_matrix is None:
+            self._get_nutrition_matrix()
+        key = hashlib.blake2b(np.ascontiguousarray(valid).tobytes(), digest_size=16).digest()
+        return self.macro_index_cache.get_or_compute(key, lambda: MacroIndex(self._macro_matrix, valid))
+
+    def meals_filling_gap(self, gap, dietary_restrictions, k=5):
+        """The k valid meals whose macros best fill gap ({'calories', 'protein', 'fat', 'carbs'}), best first."""
+        valid = self._valid_meal_array(dietary_restrictions)
+        if not len(valid):
+            raise ValueError("No meals match the dietary restrictions.")
+        return self._macro_index(valid).nearest([gap[key] for key in MACRO_KEYS], k).tolist()
+
+    def _get_valid_meals(self, dietary_restrictions):
+        return self._valid_meal_array(dietary_restrictions).tolist()
 
     def initialize_population(self, days, valid_meal_indices):
         self.population = []
@@ -58,38 +206,170 @@ class MealPlanGeneticAlgorithm:
                 individual.append(day_meals)
             self.population.append(individual)
 
-    def calculate_fitness(self, individual, target_nutrition, days):
-        total = {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
-        meal_names = set()
+    @staticmethod
+    def _encode_population(population):
+        """Convert a list of individuals (lists of day dicts) to a (population, days, 3) array."""
+        return np.array([
+            [[day_meals[meal_type] for meal_type in MEAL_TYPES] for day_meals in individual]
+            for individual in population
+        ], dtype=np.int64)
 
-        for day_meals in individual:
-            for meal_idx in day_meals.values():
-                meal = self.meals.iloc[meal_idx]
-                denorm = self._denormalize_row(meal)
-                total['calories'] += denorm['calories']
-                total['protein'] += denorm['protein']
-                total['fat'] += denorm['fat']
-                total['carbs'] += denorm['carbs']
-                meal_names.add(meal['meal_name'])
+    @staticmethod
+    def _target_total(target_nutrition, days):
+        return np.array([target_nutrition[key] * days for key in MACRO_KEYS], dtype=float)
 
-        target_total = {k: v * days for k, v in target_nutrition.items()}
+    def population_fitness(self, genes, target_nutrition, days):
+        """Score a whole (population, days, 3) array of meal indices at once.
 
-        matches = {}
-        for key in ['calories', 'protein', 'fat', 'carbs']:
-            diff = abs(total[key] - target_total[key])
-            matches[key] = 1 - diff / (target_total[key] + 1e-6)
+        Totals are accumulated slot by slot in the same order as the original
+        per-meal loop, so the scores are bit-for-bit identical to it.
+        """
+        return self._score(genes, self._target_total(target_nutrition, days), days)
 
-        variety_score = len(meal_names) / (days * 3)
+    def _score(self, genes, target_total, days):
+        """Fitness of (n, days, 3) genes against a (4,) target, or an (n, 4) target per individual."""
+        if self._macro_matrix is None:
+            self._get_nutrition_matrix()
+        genes = np.asarray(genes, dtype=np.int64)
+        flat = genes.reshape(len(genes), -1)
+
+        totals = np.zeros((len(flat), len(MACRO_KEYS)))
+        for slot in range(flat.shape[1]):
+            totals += self._macro_matrix[flat[:, slot]]
+
+        return self._combine(totals, self._distinct_names(flat), target_total, days)
+
+    def _distinct_names(self, genes):
+        """Distinct meal names per individual = 1 + number of changes in the sorted IDs."""
+        names = np.sort(self.meal_name_ids[genes.reshape(len(genes), -1)], axis=1)
+        return 1 + np.count_nonzero(np.diff(names, axis=1), axis=1)
+
+    @staticmethod
+    def _combine(totals, distinct, target_total, days):
+        """Fitness from (n, 4) macro totals and (n,) distinct meal-name counts."""
+        matches = np.maximum(0, 1 - np.abs(totals - target_total) / (target_total + 1e-6))
+        variety_score = distinct / (days * 3)
 
         fitness = (
-                FITNESS_WEIGHTS['calorie_match'] * max(0, matches['calories']) +
-                FITNESS_WEIGHTS['protein_match'] * max(0, matches['protein']) +
-                FITNESS_WEIGHTS['fat_match'] * max(0, matches['fat']) +
-                FITNESS_WEIGHTS['carb_match'] * max(0, matches['carbs']) +
+                FITNESS_WEIGHTS['calorie_match'] * matches[:, 0] +
+                FITNESS_WEIGHTS['protein_match'] * matches[:, 1] +
+                FITNESS_WEIGHTS['fat_match'] * matches[:, 2] +
+                FITNESS_WEIGHTS['carb_match'] * matches[:, 3] +
                 FITNESS_WEIGHTS['variety'] * variety_score
         )
         return fitness
 
+    def _score_blocks(self, population, target_totals, days):
+        """Fitness of (blocks, population, days, 3) genes, each block against its own target."""
+        blocks, size = population.shape[:2]
+        flat = population.reshape(blocks * size, *population.shape[2:])
+        return self._score(flat, np.repeat(target_totals, size, axis=0), days).reshape(blocks, size)
+
+    # Delta evaluation. A fitness cache holds the macro totals of every day of
+    # every individual. Crossover moves whole days, so a child's day totals are
+    # copied from the parent each day came from and only days changed by
+    # mutation are recomputed.
+
+    def _day_totals(self, genes):
+        """(..., days, 3) genes -> (..., days, 4) macro totals of each day."""
+        macros = self._macro_matrix
+        return macros[genes[..., 0]] + macros[genes[..., 1]] + macros[genes[..., 2]]
+
+    def _fitness_cache(self, genes):
+        return {'day_totals': self._day_totals(genes)}
+
+    def _delta_cache(self, cache, population, children, source):
+        """Fitness cache for children bred from population, where day d of child i
+        was copied from population[source[i, d]] before mutation."""
+        day_idx = np.arange(children.shape[1])
+        mutated = (children != population[source, day_idx]).any(axis=2)
+        day_totals = cache['day_totals'][source, day_idx]
+        day_totals[mutated] = self._day_totals(children[mutated])
+        return {'day_totals': day_totals}
+
+    def _cached_fitness(self, cache, genes, target_total, days, rows=None):
+        """Fitness of genes (or of genes[rows]) from their cached day totals.
+
+        Variety needs the whole individual; sorting its 3 * days name IDs is
+        cheaper than maintaining per-individual name-count rows.
+        """
+        if rows is not None:
+            genes = genes[rows]
+            day_totals = cache['day_totals'][rows]
+        else:
+            day_totals = cache['day_totals']
+        fitness = self._combine(day_totals.sum(axis=1), self._distinct_names(genes), target_total, days)
+        if self.delta_check:
+            full = self._score(genes, target_total, days)
+            if not np.allclose(fitness, full, rtol=1e-9, atol=1e-12):
+                raise RuntimeError(
+                    f"Delta fitness differs from full recomputation by {np.max(np.abs(fitness - full))}"
+                )
+        return fitness
+
+    # Fitness memo. Elites are copied unchanged and converged populations are
+    # full of duplicates, so each run remembers the fitness of the chromosomes
+    # it has scored, keyed on a 64-bit hash of their meal indices.
+
+    @staticmethod
+    def _chromosome_keys(genes):
+        """(n, days, 3) genes -> n 64-bit hashes (a multiply-add over the slots, mod 2**64)."""
+        flat = np.ascontiguousarray(genes, dtype=np.int64).reshape(len(genes), -1).view(np.uint64)
+        return flat @ _hash_multipliers(flat.shape[1])
+
+    def _new_memo(self):
+        if self.fitness_memo_size <= 0:
+            return None
+        return {'entries': {}, 'hits': 0, 'misses': 0, 'max_size': self.fitness_memo_size}
+
+    @classmethod
+    def _memo_fitness(cls, memo, genes, score):
+        """Fitness of genes, calling score(rows) only for chromosomes missing from memo.
+
+        Duplicates within genes are scored once. When the memo outgrows
+        max_size the older half of its entries is dropped.
+        """
+        if memo is None:
+            return score(None)
+        keys = cls._chromosome_keys(genes).tolist()
+        entries = memo['entries']
+        fitness = list(map(entries.get, keys))
+        missing = [i for i, value in enumerate(fitness) if value is None]
+        first = {}  # missing key -> first row holding it
+        for i in missing:
+            first.setdefault(keys[i], i)
+        if first:
+            rows = None if len(first) == len(keys) else np.fromiter(first.values(), dtype=np.intp, count=len(first))
+            scored = dict(zip(first, score(rows).tolist()))
+            for i in missing:
+                fitness[i] = scored[keys[i]]
+            entries.update(scored)
+            if len(entries) > memo['max_size']:
+                # Dicts keep insertion order, so the newest entries are the tail
+                memo['entries'] = dict(itertools.islice(entries.items(), len(entries) // 2, None))
+        memo['hits'] += len(keys) - len(first)
+        memo['misses'] += len(first)
+        return np.array(fitness)
+
+    @staticmethod
+    def _memo_stats(memos):
+        memos = [memo for memo in memos if memo is not None]
+        hits = sum(memo['hits'] for memo in memos)
+        misses = sum(memo['misses'] for memo in memos)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'size': sum(len(memo['entries']) for memo in memos),
+            'max_size': sum(memo['max_size'] for memo in memos)
+        }
+
+    def calculate_fitness(self, individual, target_nutrition, days):
+        genes = self._encode_population([individual])
+        return float(self.population_fitness(genes, target_nutrition, days)[0])
+
+    # List-based operators on dict individuals, kept for callers outside evolve
+
     def tournament_selection(self):
         tournament = random.sample(list(enumerate(self.fitness_scores)), GA_TOURNAMENT_SIZE)
         winner_idx = max(tournament, key=lambda x: x[1])[0]
@@ -118,42 +398,636 @@ class MealPlanGeneticAlgorithm:
                     day[meal_type] = random.choice(valid_meal_indices)
         return mutated
 
-    def evolve(self, target_nutrition, dietary_restrictions, days=7):
-        valid_meal_indices = self._get_valid_meals(dietary_restrictions)
-        if not valid_meal_indices:
-            raise ValueError("No meals match the dietary restrictions.")
+    # Array-backed population engine: a population is a (population, days, 3)
+    # integer array of meal indices, columns ordered as MEAL_TYPES.
+
+    def _new_rngs(self, count):
+        """Independent generators per run (one per island) so concurrent evolve calls never share state."""
+        with self._rng_lock:
+            return [np.random.default_rng(child) for child in self._seed_sequence.spawn(count)]
+
+    @staticmethod
+    def _decode_individual(genes):
+        return [{meal_type: int(idx) for meal_type, idx in zip(MEAL_TYPES, day)} for day in genes]
+
+    def _random_population(self, days, valid, rng, daily_target=None):
+        """Initial population; with a (4,) daily_target the first seed_fraction
+        of it is built greedily (see _greedy_individuals)."""
+        population = valid[rng.integers(len(valid), size=(GA_POPULATION_SIZE, days, len(MEAL_TYPES)))]
+        seeds = self._seed_count() if daily_target is not None else 0
+        if seeds:
+            population[:seeds] = self._greedy_individuals(np.tile(daily_target, (seeds, 1)), days, valid, rng)
+        return population
+
+    def _seed_count(self):
+        return min(int(round(self.seed_fraction * GA_POPULATION_SIZE)), GA_POPULATION_SIZE)
+
+    def _greedy_individuals(self, daily_targets, days, valid, rng):
+        """One individual per row of (n, 4) daily_targets, built slot by slot.
+
+        Each slot takes a random one of the GA_SEED_CANDIDATES meals (out of
+        GA_SEED_SAMPLE sampled valid meals) closest, in L1 distance scaled by
+        the target, to an even split of what is left of that day's macros.
+        """
+        if self._macro_matrix is None:
+            self._get_nutrition_matrix()
+        count = len(daily_targets)
+        genes = np.empty((count, days, len(MEAL_TYPES)), dtype=np.int64)
+        remaining = np.repeat(np.asarray(daily_targets, dtype=float)[:, None, :], days, axis=1)
+        scale = len(MEAL_TYPES) / (np.asarray(daily_targets, dtype=float) + 1e-6)
+        for slot in range(len(MEAL_TYPES)):
+            sample = valid if len(valid) <= GA_SEED_SAMPLE else valid[rng.integers(len(valid), size=GA_SEED_SAMPLE)]
+            macros = self._macro_matrix[sample]
+            share = remaining / (len(MEAL_TYPES) - slot)
+            distance = np.zeros((count, days, len(sample)))
+            for key in range(len(MACRO_KEYS)):
+                distance += np.abs(share[:, :, key, None] - macros[:, key]) * scale[:, None, key, None]
+            k = min(GA_SEED_CANDIDATES, len(sample))
+            closest = np.argpartition(distance, k - 1, axis=2)[..., :k]
+            chosen = np.take_along_axis(closest, rng.integers(k, size=(count, days, 1)), axis=2)[..., 0]
+            genes[:, :, slot] = sample[chosen]
+            remaining -= macros[chosen]
+        return genes
+
+    def _select_parents(self, fitness, n, rng):
+        """Run n tournaments at once, each over GA_TOURNAMENT_SIZE distinct individuals.
+
+        fitness is (population,) or (blocks, population); tournaments never
+        cross block boundaries and indices are local to each block.
+        """
+        blocks = fitness.reshape(-1, fitness.shape[-1])
+        size = min(GA_TOURNAMENT_SIZE, blocks.shape[1])
+        contestants = np.argpartition(rng.random((len(blocks), n, blocks.shape[1])), size - 1, axis=2)[..., :size]
+        scores = blocks[np.arange(len(blocks))[:, None, None], contestants]
+        winners = np.take_along_axis(contestants, np.argmax(scores, axis=2)[..., None], axis=2)[..., 0]
+        return winners.reshape(*fitness.shape[:-1], n)
+
+    def _crossover_population(self, parents1, parents2, rng, return_swap=False):
+        """Uniform day crossover for every pair of parents at once.
+
+        With return_swap=True the (pairs, days) mask of days child1 took from
+        parents2 (and child2 from parents1) is returned as well.
+        """
+        crossing = rng.random(len(parents1)) < GA_CROSSOVER_RATE
+        day_swap = (rng.random(parents1.shape[:2]) >= 0.5) & crossing[:, None]
+        swap = day_swap[:, :, None]
+        children = np.where(swap, parents2, parents1), np.where(swap, parents1, parents2)
+        if return_swap:
+            return children + (day_swap,)
+        return children
+
+    def _mutate_population(self, genes, valid, rng):
+        """Replace each gene with a random valid meal with probability GA_MUTATION_RATE (in place)."""
+        mask = rng.random(genes.shape) < GA_MUTATION_RATE
+        genes[mask] = valid[rng.integers(len(valid), size=np.count_nonzero(mask))]
+        return genes
+
+    def _next_generation(self, population, fitness, valid, rng, clock=NULL_CLOCK):
+        return self._next_generation_blocks(population[None], fitness[None], valid, rng, clock)[0]
+
+    def _next_generation_blocks(self, population, fitness, valid, rng, clock=NULL_CLOCK):
+        """Breed (blocks, population, days, 3) populations independently but in one pass."""
+        return self._breed_blocks(population, fitness, valid, rng, clock)[0]
 
-        self.initialize_population(days, valid_meal_indices)
+    def _breed_blocks(self, population, fitness, valid, rng, clock=NULL_CLOCK):
+        """Next generation plus a (blocks, population, days) array giving, for each
+        day of each new individual, the block-local index of the parent that day
+        was copied from before mutation (elites: themselves).
 
-        for generation in range(GA_GENERATIONS):
-            self.fitness_scores = [
-                self.calculate_fitness(ind, target_nutrition, days)
-                for ind in self.population
+        clock is lapped after selection, crossover and mutation."""
+        blocks, size = fitness.shape
+        block_idx = np.arange(blocks)[:, None]
+        n_elite = min(GA_ELITISM_COUNT, size)
+        elite_idx = np.argsort(fitness, axis=1)[:, size - n_elite:]
+        elite = population[block_idx, elite_idx]
+
+        n_children = size - n_elite
+        n_pairs = (n_children + 1) // 2
+        parents = self._select_parents(fitness, 2 * n_pairs, rng)
+        clock.lap('selection')
+        individual_shape = population.shape[2:]
+        child1, child2, day_swap = self._crossover_population(
+            population[block_idx, parents[:, :n_pairs]].reshape(-1, *individual_shape),
+            population[block_idx, parents[:, n_pairs:]].reshape(-1, *individual_shape),
+            rng, return_swap=True
+        )
+        children = np.stack([child1.reshape(blocks, n_pairs, *individual_shape),
+                             child2.reshape(blocks, n_pairs, *individual_shape)], axis=2)
+        children = children.reshape(blocks, 2 * n_pairs, *individual_shape)[:, :n_children]
+        clock.lap('crossover')
+        self._mutate_population(children, valid, rng)
+        clock.lap('mutation')
+
+        days = individual_shape[0]
+        first = np.repeat(parents[:, :n_pairs, None], days, axis=2)
+        second = np.repeat(parents[:, n_pairs:, None], days, axis=2)
+        day_swap = day_swap.reshape(blocks, n_pairs, days)
+        source = np.stack([np.where(day_swap, second, first), np.where(day_swap, first, second)], axis=2)
+        source = source.reshape(blocks, 2 * n_pairs, days)[:, :n_children]
+        elite_source = np.repeat(elite_idx[:, :, None], days, axis=2)
+        return np.concatenate([elite, children], axis=1), np.concatenate([elite_source, source], axis=1)
+
+    @staticmethod
+    def population_diversity(population):
+        """Share of distinct individuals in a (population, days, 3) array."""
+        flat = population.reshape(len(population), -1)
+        return len(np.unique(flat, axis=0)) / len(flat)
+
+    # An island is one evolving sub-population. Its state is a plain dict so it
+    # can be shipped to a worker process between migrations.
+
+    def _new_island(self, target_nutrition, days, valid, rng):
+        target_total = self._target_total(target_nutrition, days)
+        population = self._random_population(days, valid, rng, target_total / days)
+        memo = self._new_memo()
+        cache = None
+        if self.delta_fitness:
+            cache = self._fitness_cache(population)
+            fitness = self._memo_fitness(
+                memo, population, lambda rows: self._cached_fitness(cache, population, target_total, days, rows)
+            )
+        else:
+            fitness = self._memo_fitness(
+                memo, population,
+                lambda rows: self._score(population if rows is None else population[rows], target_total, days)
+            )
+        state = {
+            'population': population,
+            'fitness': fitness,
+            'cache': cache,
+            'memo': memo,
+            'repairs': 0,
+            'rng': rng,
+            'generation': 1,
+            'best_genes': None,
+            'best_fitness': -float('inf'),
+            'stagnant': 0,
+            'stop_reason': None
+        }
+        self._record_best(state)
+        return state
+
+    @staticmethod
+    def _record_best(state):
+        fitness = state['fitness']
+        best_idx = int(np.argmax(fitness))
+        if fitness[best_idx] > state['best_fitness']:
+            state['best_fitness'] = float(fitness[best_idx])
+            state['best_genes'] = state['population'][best_idx].copy()
+            state['stagnant'] = 0
+        else:
+            state['stagnant'] += 1
+
+    def _repair(self, state, target_total, days, index):
+        """Local search on the repair_count best individuals, in place.
+
+        Each swaps the meal furthest from an even share of the target for the
+        best of the GA_REPAIR_CANDIDATES meals nearest to what would close its
+        macro gap, if that raises its fitness. Returns the number improved.
+        """
+        population, fitness = state['population'], state['fitness']
+        rows = np.argsort(fitness)[len(fitness) - min(self.repair_count, len(fitness)):]
+        genes = population[rows].reshape(len(rows), -1)
+        macros = self._macro_matrix[genes]
+        share = target_total / genes.shape[1]
+        worst = np.argmax((np.abs(macros - share) / (share + 1e-6)).sum(axis=2), axis=1)
+        row_idx = np.arange(len(rows))
+        wanted = np.maximum(macros[row_idx, worst] + target_total - macros.sum(axis=1), 0)
+        candidates = index.nearest(wanted, GA_REPAIR_CANDIDATES)
+
+        variants = np.repeat(genes[:, None], candidates.shape[1], axis=1)
+        variants[row_idx[:, None], np.arange(candidates.shape[1]), worst[:, None]] = candidates
+        scores = self._score(variants.reshape(-1, days, len(MEAL_TYPES)), target_total, days).reshape(len(rows), -1)
+        best = np.argmax(scores, axis=1)
+        improved = scores[row_idx, best] > fitness[rows]
+        if improved.any():
+            targets = rows[improved]
+            population[targets] = variants[row_idx[improved], best[improved]].reshape(-1, days, len(MEAL_TYPES))
+            fitness[targets] = scores[row_idx[improved], best[improved]]
+            if state.get('cache') is not None:
+                state['cache']['day_totals'][targets] = self._day_totals(population[targets])
+        return int(np.count_nonzero(improved))
+
+    def _stop_reason(self, best_fitness, stagnant, population, generation, criteria, deadline):
+        if criteria['fitness_target'] is not None and best_fitness >= criteria['fitness_target']:
+            return 'fitness_target'
+        if criteria['stagnation_generations'] and stagnant >= criteria['stagnation_generations']:
+            return 'stagnation'
+        if criteria['min_diversity'] is not None and \
+                self.population_diversity(population) < criteria['min_diversity']:
+            return 'diversity'
+        if generation >= GA_GENERATIONS:
+            return 'max_generations'
+        if deadline is not None and time.perf_counter() >= deadline:
+            return 'time_budget'
+        return None
+
+    def _advance_island(self, state, target_nutrition, days, valid, max_steps, criteria, time_left=None,
+                        progress_callback=None, observe=None):
+        """Breed and score up to max_steps more generations, or until a stopping criterion fires.
+
+        observe, if given, receives a generation record (see _generation_record)
+        after every generation.
+        """
+        deadline = time.perf_counter() + time_left if time_left is not None else None
+        target_total = self._target_total(target_nutrition, days)
+        index = self._macro_index(valid) if self.repair_count else None
+        for _ in range(max_steps):
+            clock = PhaseClock() if observe is not None else NULL_CLOCK
+            state['stop_reason'] = self._stop_reason(
+                state['best_fitness'], state['stagnant'], state['population'], state['generation'],
+                criteria, deadline
+            )
+            if state['stop_reason'] is not None:
+                break
+            clock.lap('stopping')
+            if self.delta_fitness:
+                if state.get('cache') is None:  # dropped by migration
+                    state['cache'] = self._fitness_cache(state['population'])
+                children, source = self._breed_blocks(
+                    state['population'][None], state['fitness'][None], valid, state['rng'], clock
+                )
+                children, source = children[0], source[0]
+                cache = self._delta_cache(state['cache'], state['population'], children, source)
+                state['cache'] = cache
+                score = lambda rows: self._cached_fitness(cache, children, target_total, days, rows)
+            else:
+                children = self._next_generation(state['population'], state['fitness'], valid, state['rng'],
+                                                 clock)
+                score = lambda rows: self._score(children if rows is None else children[rows], target_total, days)
+            state['population'] = children
+            state['fitness'] = self._memo_fitness(state['memo'], children, score)
+            clock.lap('fitness')
+            repairs = 0
+            if self.repair_count:
+                repairs = self._repair(state, target_total, days, index)
+                state['repairs'] += repairs
+                clock.lap('repair')
+            state['generation'] += 1
+            self._record_best(state)
+
+            if observe is not None:
+                observe(self._generation_record(state, clock, repairs))
+            if progress_callback is not None:
+                progress_callback(state['generation'], state['best_fitness'])
+            if GA_LOG_INTERVAL and (state['generation'] - 1) % GA_LOG_INTERVAL == 0:
+                logger.info("Gen %d, Best Fitness: %.4f", state['generation'] - 1, state['best_fitness'])
+        return state
+
+    def _generation_record(self, state, clock, repairs):
+        """What observers get per generation: fitness, diversity, repairs and ms per phase."""
+        return {
+            'island': state.get('island', 0),
+            'generation': state['generation'],
+            'best_fitness': state['best_fitness'],
+            'mean_fitness': float(np.mean(state['fitness'])),
+            'diversity': self.population_diversity(state['population']),
+            'repairs': repairs,
+            'phase_ms': {phase: seconds * 1000 for phase, seconds in clock.seconds.items()}
+        }
+
+    @staticmethod
+    def _migrate(states):
+        """Ring migration: each island's best GA_MIGRATION_SIZE replace the next island's worst."""
+        size = min(GA_MIGRATION_SIZE, len(states[0]['fitness']))
+        emigrants = []
+        for state in states:
+            best = np.argsort(state['fitness'])[len(state['fitness']) - size:]
+            emigrants.append((state['population'][best].copy(), state['fitness'][best].copy()))
+        for i, state in enumerate(states):
+            if state['stop_reason'] is not None:
+                continue
+            genes, fitness = emigrants[i - 1]
+            worst = np.argsort(state['fitness'])[:size]
+            state['population'][worst] = genes
+            state['fitness'][worst] = fitness
+            state['cache'] = None  # rebuilt from the population on the next generation
+            best_idx = int(np.argmax(fitness))
+            if fitness[best_idx] > state['best_fitness']:
+                state['best_fitness'] = float(fitness[best_idx])
+                state['best_genes'] = genes[best_idx].copy()
+
+    def _get_island_pool(self, workers):
+        with self._rng_lock:
+            if self._island_pool is None or self._island_pool_size != workers:
+                if self._island_pool is not None:
+                    self._island_pool.shutdown(wait=False)
+                # Workers receive the scoring arrays once, not the DataFrame per task;
+                # with a mapped catalog they just map the same files
+                if isinstance(self.meals, MealCatalog):
+                    initargs = (None, None, self.meals.directory)
+                else:
+                    initargs = (self._macro_matrix, self.meal_name_ids)
+                self._island_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_island_worker,
+                    initargs=initargs
+                )
+                self._island_pool_size = workers
+            return self._island_pool
+
+    def close(self):
+        """Shut down the island worker pool, if one was started."""
+        with self._rng_lock:
+            if self._island_pool is not None:
+                self._island_pool.shutdown()
+                self._island_pool = None
+
+    def _run_islands(self, states, target_nutrition, days, valid, criteria, time_left, progress_callback=None,
+                     observe=None):
+        pool = self._get_island_pool(min(len(states), os.cpu_count() or 1))
+        catalog_dir = self.meals.directory if isinstance(self.meals, MealCatalog) else None
+        settings = self._search_settings()
+        while any(state['stop_reason'] is None for state in states):
+            remaining = time_left() if time_left is not None else None
+            futures = [
+                pool.submit(_advance_island_task, state, target_nutrition, days, valid,
+                            GA_MIGRATION_INTERVAL, criteria, remaining, catalog_dir, observe is not None, settings)
+                if state['stop_reason'] is None else None
+                for state in states
             ]
+            states = [future.result() if future is not None else state for future, state in zip(futures, states)]
+            if observe is not None:
+                # Workers cannot call back into this process; they return their records instead
+                for state in states:
+                    for record in state.pop('records', None) or ():
+                        observe(record)
+            self._migrate(states)
+            if progress_callback is not None:
+                progress_callback(max(state['generation'] for state in states),
+                                  max(state['best_fitness'] for state in states))
+        return states
+
+    def add_observer(self, observer):
+        """Call observer(record) after every generation of evolve().
+
+        A record is a dict with the run number (one per evolve call), island,
+        generation, best_fitness, mean_fitness, diversity, repairs and
+        phase_ms, the milliseconds spent in stopping checks, selection,
+        crossover, mutation, fitness evaluation and repair. In island mode
+        records arrive once per migration round. Observers run on the
+        evolving thread and should be quick; models.observers has a
+        collector that aggregates them.
+        """
+        self.observers.append(observer)
 
-            best_idx = np.argmax(self.fitness_scores)
-            if self.fitness_scores[best_idx] > self.best_fitness:
-                self.best_fitness = self.fitness_scores[best_idx]
-                self.best_solution = copy.deepcopy(self.population[best_idx])  # <-- DEEP COPY
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
 
-            # Elitism - deep copy elites
-            elite_indices = np.argsort(self.fitness_scores)[-GA_ELITISM_COUNT:]
-            new_population = [copy.deepcopy(self.population[i]) for i in elite_indices]
-            # valid meal filter population initialz, best solution return
-            while len(new_population) < GA_POPULATION_SIZE:
-                parent1 = self.tournament_selection()
-                parent2 = self.tournament_selection()
-                child1, child2 = self.crossover(parent1, parent2)
-                child1 = self.mutate(child1, valid_meal_indices)
-                child2 = self.mutate(child2, valid_meal_indices)
-                new_population.extend([child1, child2])
+    def _observe(self):
+        """Callback fanning a run's generation records out to the observers, or None without any."""
+        observers = tuple(self.observers)
+        if not observers:
+            return None
+        run = next(self._run_ids)
+
+        def observe(record):
+            record['run'] = run
+            for observer in observers:
+                observer(record)
+        return observe
+
+    def evolve(self, target_nutrition, dietary_restrictions, days=7, return_stats=False,
+               stagnation_generations=GA_STAGNATION_GENERATIONS, fitness_target=GA_FITNESS_TARGET,
+               min_diversity=GA_MIN_DIVERSITY, time_budget_ms=GA_TIME_BUDGET_MS, islands=None,
+               progress_callback=None):
+        """Evolve a meal plan, stopping early once the search has converged.
+
+        The run ends after GA_GENERATIONS, or earlier when the best fitness has
+        not improved for stagnation_generations, reaches fitness_target, or the
+        population diversity drops below min_diversity. With time_budget_ms the
+        best plan found so far is returned once that much wall-clock time has
+        passed (at least one generation always runs). With return_stats=True
+        the (solution, stats) pair is returned; stats are also kept in
+        last_run_stats.
+
+        With islands > 1 (default: the instance's island_count) that many
+        sub-populations evolve in a process pool, exchanging their best
+        individuals every GA_MIGRATION_INTERVAL generations; the global best
+        is returned. A single island runs in-process and is the serial GA.
+
+        progress_callback(generation, best_fitness), if given, is called after
+        every generation (after every migration round in island mode). For
+        per-generation timings and population statistics see add_observer().
+        """
+        start = time.perf_counter()
+        time_left = None
+        if time_budget_ms is not None:
+            time_left = lambda: time_budget_ms / 1000 - (time.perf_counter() - start)
+
+        valid = self._valid_meal_array(dietary_restrictions)
+        if not len(valid):
+            raise ValueError("No meals match the dietary restrictions.")
 
-            self.population = new_population[:GA_POPULATION_SIZE]
+        islands = islands or self.island_count
+        criteria = {
+            'stagnation_generations': stagnation_generations,
+            'fitness_target': fitness_target,
+            'min_diversity': min_diversity
+        }
 
-            if generation % 20 == 0:
-                print(f"Gen {generation}, Best Fitness: {self.best_fitness:.4f}")
+        # Run state stays local so a shared instance can serve concurrent requests
+        states = [
+            self._new_island(target_nutrition, days, valid, rng)
+            for rng in self._new_rngs(islands)
+        ]
+        for island, state in enumerate(states):
+            state['island'] = island
+        observe = self._observe()
+        if islands == 1:
+            self._advance_island(states[0], target_nutrition, days, valid, GA_GENERATIONS, criteria,
+                                 time_left() if time_left is not None else None, progress_callback, observe)
+        else:
+            states = self._run_islands(states, target_nutrition, days, valid, criteria, time_left,
+                                       progress_callback, observe)
 
-        return self.best_solution
+        best = max(states, key=lambda state: state['best_fitness'])
+        stop_reason = states[-1]['stop_reason'] if islands == 1 else \
+            max(states, key=lambda state: state['generation'])['stop_reason']
+
+        solution = self._decode_individual(best['best_genes'])
+        stats = {
+            'generations': max(state['generation'] for state in states),
+            'max_generations': GA_GENERATIONS,
+            'stop_reason': stop_reason,
+            'budget_exhausted': any(state['stop_reason'] == 'time_budget' for state in states),
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+            'best_fitness': best['best_fitness'],
+            'islands': islands,
+            'fitness_memo': self._memo_stats(state['memo'] for state in states),
+            'repairs': sum(state['repairs'] for state in states)
+        }
+        # Informational copies of the latest run; concurrent runs on a shared
+        # instance overwrite them, so callers use the returned values
+        self.population = best['population']
+        self.fitness_scores = best['fitness']
+        self.best_fitness = best['best_fitness']
+        self.best_solution = solution
+        self.last_run_stats = stats
+        if return_stats:
+            return solution, stats
+        return solution
+
+    def evolve_batch(self, targets, dietary_restrictions, days=7,
+                     stagnation_generations=GA_STAGNATION_GENERATIONS, fitness_target=GA_FITNESS_TARGET,
+                     min_diversity=GA_MIN_DIVERSITY, time_budget_ms=GA_TIME_BUDGET_MS):
+        """Evolve one plan per nutrition target for users sharing restrictions and day count.
+
+        Valid meals are resolved once and all populations evolve together as a
+        (users, population, days, 3) array; each user keeps its own target,
+        elites, tournaments and stopping criteria. Returns a list of
+        (solution, stats) pairs in the order of targets.
+        """
+        start = time.perf_counter()
+        deadline = start + time_budget_ms / 1000 if time_budget_ms is not None else None
+
+        valid = self._valid_meal_array(dietary_restrictions)
+        if not len(valid):
+            raise ValueError("No meals match the dietary restrictions.")
+
+        criteria = {
+            'stagnation_generations': stagnation_generations,
+            'fitness_target': fitness_target,
+            'min_diversity': min_diversity
+        }
+        users = len(targets)
+        target_totals = np.array([self._target_total(target, days) for target in targets])
+        rng = self._new_rngs(1)[0]
+
+        population = valid[rng.integers(len(valid), size=(users, GA_POPULATION_SIZE, days, len(MEAL_TYPES)))]
+        seeds = self._seed_count()
+        if seeds:
+            population[:, :seeds] = self._greedy_individuals(
+                np.repeat(target_totals / days, seeds, axis=0), days, valid, rng
+            ).reshape(users, seeds, days, len(MEAL_TYPES))
+        fitness = self._score_blocks(population, target_totals, days)
+        best_fitness = np.full(users, -np.inf)
+        best_genes = np.empty((users, days, len(MEAL_TYPES)), dtype=population.dtype)
+        stagnant = np.zeros(users, dtype=int)
+        generations = np.ones(users, dtype=int)
+        stop_reasons = [None] * users
+        active = np.arange(users)
+
+        while True:
+            # Best-so-far update for the blocks that were just scored
+            best_idx = np.argmax(fitness[active], axis=1)
+            block_best = fitness[active, best_idx]
+            improved = block_best > best_fitness[active]
+            best_fitness[active[improved]] = block_best[improved]
+            best_genes[active[improved]] = population[active[improved], best_idx[improved]]
+            stagnant[active] = np.where(improved, 0, stagnant[active] + 1)
+
+            for user in active:
+                stop_reasons[user] = self._stop_reason(
+                    best_fitness[user], stagnant[user], population[user], generations[user], criteria, deadline
+                )
+            active = np.array([user for user in active if stop_reasons[user] is None], dtype=int)
+            if not len(active):
+                break
+
+            population[active] = self._next_generation_blocks(population[active], fitness[active], valid, rng)
+            fitness[active] = self._score_blocks(population[active], target_totals[active], days)
+            generations[active] += 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return [
+            (self._decode_individual(best_genes[user]), {
+                'generations': int(generations[user]),
+                'max_generations': GA_GENERATIONS,
+                'stop_reason': stop_reasons[user],
+                'budget_exhausted': stop_reasons[user] == 'time_budget',
+                'elapsed_ms': elapsed_ms,
+                'best_fitness': float(best_fitness[user]),
+                'batch_size': users
+            })
+            for user in range(users)
+        ]
+
+    def replan(self, plan, slots, target_nutrition, dietary_restrictions, return_stats=False,
+               generations=GA_REPLAN_GENERATIONS, stagnation_generations=GA_STAGNATION_GENERATIONS):
+        """Re-plan some slots of an existing plan, keeping every other meal fixed.
+
+        plan is a list of {'breakfast','lunch','dinner'} day dicts of meal
+        indices, as evolve returns; slots is a list of (day, meal_type) pairs
+        with 0-based days, where a meal_type of None frees the whole day. The
+        meals currently in the freed slots are not offered again. The fixed
+        meals still count towards the totals and variety, so the new plan as
+        a whole is scored against the target.
+
+        A single free slot is solved exactly by scoring every candidate meal;
+        more slots run a short GA (at most generations) over the free slots only.
+        """
+        start = time.perf_counter()
+        genes = self._encode_population([plan])[0]
+        days = len(genes)
+        if not days or genes.min() < 0 or genes.max() >= len(self.meals):
+            raise ValueError("Plan refers to meals outside the catalog.")
+
+        free = np.zeros(genes.shape, dtype=bool)
+        for day, meal_type in slots:
+            if not 0 <= day < days:
+                raise ValueError(f"Day {day + 1} is outside the {days}-day plan.")
+            if meal_type is None:
+                free[day] = True
+            elif meal_type in MEAL_TYPES:
+                free[day, MEAL_TYPES.index(meal_type)] = True
+            else:
+                raise ValueError(f"Unknown meal type '{meal_type}'.")
+        if not free.any():
+            raise ValueError("No slots to re-plan.")
+
+        candidates = np.setdiff1d(self._valid_meal_array(dietary_restrictions), genes[free])
+        if not len(candidates):
+            raise ValueError("No other meals match the dietary restrictions.")
+        target_total = self._target_total(target_nutrition, days)
+
+        state = {'best_genes': None, 'best_fitness': -float('inf'), 'stagnant': 0, 'generation': 1}
+        if np.count_nonzero(free) == 1:
+            for offset in range(0, len(candidates), GA_REPLAN_CHUNK_SIZE):
+                chunk = candidates[offset:offset + GA_REPLAN_CHUNK_SIZE]
+                state['population'] = self._fill_slots(genes, free, chunk[:, None])
+                state['fitness'] = self._score(state['population'], target_total, days)
+                self._record_best(state)
+            stop_reason = 'exhaustive'
+        else:
+            rng = self._new_rngs(1)[0]
+            picks = rng.integers(len(candidates), size=(GA_POPULATION_SIZE, np.count_nonzero(free)))
+            state['population'] = self._fill_slots(genes, free, candidates[picks])
+            state['fitness'] = self._score(state['population'], target_total, days)
+            self._record_best(state)
+            stop_reason = 'max_generations'
+            while state['generation'] < generations:
+                if stagnation_generations and state['stagnant'] >= stagnation_generations:
+                    stop_reason = 'stagnation'
+                    break
+                population = self._next_generation(state['population'], state['fitness'], candidates, rng)
+                population[:, ~free] = genes[~free]  # undo mutations of fixed meals
+                state['population'] = population
+                state['fitness'] = self._score(population, target_total, days)
+                state['generation'] += 1
+                self._record_best(state)
+
+        solution = self._decode_individual(state['best_genes'])
+        stats = {
+            'generations': state['generation'],
+            'max_generations': generations,
+            'stop_reason': stop_reason,
+            'budget_exhausted': False,
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+            'best_fitness': state['best_fitness'],
+            'slots': int(np.count_nonzero(free)),
+            'candidates': len(candidates)
+        }
+        if return_stats:
+            return solution, stats
+        return solution
+
+    @staticmethod
+    def _fill_slots(genes, free, values):
+        """Copies of one (days, 3) individual, the i-th with values[i] in its free slots."""
+        population = np.repeat(genes[None], len(values), axis=0)
+        population[:, free] = values
+        return population
 
     def save_model(self):
         with open(MODEL_SAVE_PATH, 'wb') as f:
@@ -162,3 +1036,39 @@ class MealPlanGeneticAlgorithm:
                 'best_fitness': self.best_fitness
             }, f)
         print("Model saved.")
+
+
+# Island worker processes keep one search-only GA built from the shared arrays
+# (for a MealCatalog, from the catalog directory the task names).
+_island_ga = None
+_island_catalog_dir = None
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_multipliers(slots):
+    # Fixed odd multipliers, so every process hashes a chromosome the same way
+    multipliers = np.random.default_rng(0x5EED).integers(0, 2 ** 63, size=slots, dtype=np.uint64)
+    return multipliers * np.uint64(2) + np.uint64(1)
+
+
+def _init_island_worker(macro_matrix, meal_name_ids, catalog_dir=None):
+    global _island_ga, _island_catalog_dir
+    if catalog_dir is not None:
+        catalog = MealCatalog(catalog_dir)
+        macro_matrix, meal_name_ids = catalog.macro_matrix, catalog.name_ids
+    _island_ga = MealPlanGeneticAlgorithm._search_only(macro_matrix, meal_name_ids)
+    _island_catalog_dir = catalog_dir
+
+
+def _advance_island_task(state, target_nutrition, days, valid, max_steps, criteria, time_left, catalog_dir=None,
+                         observe=False, settings=None):
+    if catalog_dir != _island_catalog_dir:
+        _init_island_worker(None, None, catalog_dir)
+    for name, value in (settings or {}).items():  # the submitting instance's SEARCH_SETTINGS
+        setattr(_island_ga, name, value)
+    records = [] if observe else None
+    state = _island_ga._advance_island(state, target_nutrition, days, valid, max_steps, criteria, time_left,
+                                       observe=records.append if observe else None)
+    if observe:
+        state['records'] = records
+    return state
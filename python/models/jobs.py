@@ -0,0 +1,91 @@
+# jobs.py
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import JOB_WORKERS, JOB_MAX_PENDING, JOB_RESULT_TTL
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when too many jobs are already queued or running."""
+
+
+class JobManager:
+    """Runs long tasks on a bounded local thread pool and tracks their state.
+
+    A task is a callable taking a progress(**fields) reporter and returning
+    a JSON-serializable result. Finished jobs are kept for ttl seconds.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, ttl=JOB_RESULT_TTL,
+                 clock=time.time):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='plan-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, task):
+        with self._lock:
+            self._purge_expired()
+            pending = sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': 'queued',
+                'progress': {},
+                'result': None,
+                'error': None,
+                'created_at': self._clock(),
+                'finished_at': None,
+                'done': threading.Event()
+            }
+        self._executor.submit(self._run, job_id, task)
+        return job_id
+
+    def _run(self, job_id, task):
+        job = self._jobs[job_id]
+        job['status'] = 'running'
+
+        def progress(**fields):
+            job['progress'] = fields
+
+        try:
+            job['result'] = task(progress)
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'failed'
+        finally:
+            job['finished_at'] = self._clock()
+            job['done'].set()
+
+    def _purge_expired(self):
+        now = self._clock()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished_at'] is not None and now - job['finished_at'] >= self.ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id, wait=0):
+        """Snapshot of a job, optionally blocking up to wait seconds for it to finish.
+
+        Returns None for unknown or expired jobs.
+        """
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if wait > 0:
+            job['done'].wait(wait)
+        return {key: value for key, value in job.items() if key != 'done'}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,33 @@
+# macro_index.py
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class MacroIndex:
+    """KD-tree over the (calories, protein, fat, carbs) vectors of a set of meals.
+
+    Answers "which of these meals best fills this macro gap" without a scan.
+    Each macro is divided by its median over the indexed meals so kcal and
+    grams weigh alike, and distances are L1 in that scaled space.
+    """
+
+    def __init__(self, macro_matrix, meal_ids):
+        self.meal_ids = np.asarray(meal_ids)
+        points = np.asarray(macro_matrix[self.meal_ids], dtype=float)
+        scale = np.median(points, axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.tree = cKDTree(points / self.scale)
+
+    def __len__(self):
+        return len(self.meal_ids)
+
+    def nearest(self, macros, k=1):
+        """Meal ids of the k meals closest to each (..., 4) macro vector, nearest first.
+
+        Returns an (..., k) array; k is capped at the number of indexed meals.
+        """
+        macros = np.asarray(macros, dtype=float)
+        k = min(k, len(self.meal_ids))
+        _, idx = self.tree.query(macros / self.scale, k=k, p=1)
+        return self.meal_ids[np.asarray(idx).reshape(*macros.shape[:-1], k)]
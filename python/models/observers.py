@@ -0,0 +1,88 @@
+# observers.py
+
+import threading
+import time
+import numpy as np
+
+
+class PhaseClock:
+    """Wall time per phase of one generation, split by successive lap() calls."""
+
+    def __init__(self):
+        self.seconds = {}
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Charge the time since the previous lap (or since creation) to phase."""
+        now = time.perf_counter()
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + now - self._last
+        self._last = now
+
+
+class _NullClock:
+    """Stands in for PhaseClock when nobody is observing, so timing costs a no-op call."""
+
+    def lap(self, phase):
+        pass
+
+
+NULL_CLOCK = _NullClock()
+
+
+class GenerationCollector:
+    """Observer that keeps every generation record of the runs it watches.
+
+    Attach it with MealPlanGeneticAlgorithm.add_observer(); it is safe to
+    share between concurrent runs (records carry their run and island).
+    summary() aggregates the records for profiling.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    def summary(self):
+        """Totals and per-generation means of each phase's time, its share of all
+        phase time, and the convergence curve: best and mean fitness and
+        diversity by generation, averaged over runs and islands."""
+        with self._lock:
+            records = list(self.records)
+        if not records:
+            return {'runs': 0, 'generations': 0, 'phase_ms': {}, 'convergence': []}
+
+        totals = {}
+        for record in records:
+            for phase, ms in record['phase_ms'].items():
+                totals[phase] = totals.get(phase, 0.0) + ms
+        all_ms = sum(totals.values()) or 1.0
+
+        by_generation = {}
+        for record in records:
+            by_generation.setdefault(record['generation'], []).append(record)
+        convergence = [
+            {
+                'generation': generation,
+                'best_fitness': float(np.mean([record['best_fitness'] for record in group])),
+                'mean_fitness': float(np.mean([record['mean_fitness'] for record in group])),
+                'diversity': float(np.mean([record['diversity'] for record in group]))
+            }
+            for generation, group in sorted(by_generation.items())
+        ]
+
+        return {
+            'runs': len({record['run'] for record in records}),
+            'generations': len(records),
+            'phase_ms': {
+                phase: {'total': total, 'mean': total / len(records), 'share': total / all_ms}
+                for phase, total in sorted(totals.items(), key=lambda item: -item[1])
+            },
+            'convergence': convergence
+        }
@@ -0,0 +1,94 @@
+# restriction_index.py
+
+import numpy as np
+from config import COMMON_ALLERGENS, HEALTH_RISK_THRESHOLDS, NUTRITION_COLS
+
+DIET_FLAGS = ['vegetarian', 'vegan', 'keto', 'paleo', 'gluten_free', 'mediterranean']
+
+
+def restriction_profile_key(dietary_restrictions):
+    """Canonical, hashable form of a restriction profile.
+
+    Allergy and health-risk order (and allergy case) do not matter, and
+    entries the index ignores are dropped, so equivalent profiles share a key.
+    """
+    diets = tuple(diet for diet in DIET_FLAGS if dietary_restrictions.get(diet, False))
+    allergies = tuple(sorted({
+        allergy.lower() for allergy in dietary_restrictions.get('allergies', [])
+        if allergy.lower() in COMMON_ALLERGENS
+    }))
+    health_risks = tuple(sorted({
+        risk for risk in dietary_restrictions.get('health_risks', [])
+        if risk in HEALTH_RISK_THRESHOLDS
+    }))
+    return diets, allergies, health_risks
+
+
+class RestrictionIndex:
+    """Precomputed boolean masks over the meal catalog, one per restriction.
+
+    Every diet flag, allergen and health-risk rule gets a vector marking the
+    meals that satisfy it, so a restriction profile resolves to valid meal
+    indices with a handful of vectorized ANDs instead of row-wise scans.
+    """
+
+    def __init__(self, meals_df, nutrition_matrix=None, nutrition_cols=NUTRITION_COLS, live=None):
+        # meals_df may be a DataFrame or a MealCatalog; only len(), .columns
+        # and column lookup are used. live marks the meals that may be served
+        # at all (a catalog's removed meals are False).
+        self.size = len(meals_df)
+        self.live = live
+
+        # Meals that satisfy the diet (flag == 1)
+        self.diet_masks = {
+            diet: np.asarray(meals_df[diet]) == 1
+            for diet in DIET_FLAGS if diet in meals_df.columns
+        }
+
+        # Meals free of the allergen (flag == 0)
+        self.allergen_masks = {
+            allergen: np.asarray(meals_df[allergen]) == 0
+            for allergen in COMMON_ALLERGENS if allergen in meals_df.columns
+        }
+
+        # Health-risk rules need denormalized values; they are only available
+        # once a fitted scaler has produced the nutrition matrix.
+        self.health_risk_masks = None
+        if nutrition_matrix is not None:
+            self.health_risk_masks = {}
+            for risk, thresholds in HEALTH_RISK_THRESHOLDS.items():
+                mask = np.ones(self.size, dtype=bool)
+                for col, thresh in thresholds.items():
+                    if col in meals_df.columns and col in nutrition_cols:
+                        values = nutrition_matrix[:, list(nutrition_cols).index(col)]
+                        mask &= (values >= thresh) if 'omega3' in col else (values <= thresh)
+                self.health_risk_masks[risk] = mask
+
+    def needs_nutrition(self, dietary_restrictions):
+        return self.health_risk_masks is None and any(
+            risk in HEALTH_RISK_THRESHOLDS for risk in dietary_restrictions.get('health_risks', [])
+        )
+
+    def resolve_mask(self, dietary_restrictions):
+        valid_mask = np.ones(self.size, dtype=bool) if self.live is None else self.live.copy()
+
+        for diet in DIET_FLAGS:
+            if dietary_restrictions.get(diet, False) and diet in self.diet_masks:
+                valid_mask &= self.diet_masks[diet]
+
+        for allergy in dietary_restrictions.get('allergies', []):
+            allergy = allergy.lower()
+            if allergy in self.allergen_masks:
+                valid_mask &= self.allergen_masks[allergy]
+
+        for risk in dietary_restrictions.get('health_risks', []):
+            if risk in HEALTH_RISK_THRESHOLDS:
+                if self.health_risk_masks is None:
+                    raise ValueError("Health-risk filtering needs denormalized nutrition values.")
+                valid_mask &= self.health_risk_masks[risk]
+
+        return valid_mask
+
+    def resolve(self, dietary_restrictions):
+        """Return the sorted array of meal indices satisfying every restriction."""
+        return np.flatnonzero(self.resolve_mask(dietary_restrictions))
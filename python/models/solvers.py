@@ -0,0 +1,320 @@
+# solvers.py
+
+import time
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+from config import (
+    GA_GENERATIONS, FITNESS_WEIGHTS, MEAL_TYPES, SOLVER_ENGINE, SOLVER_MILP_MAX_MEALS, SOLVER_MILP_TIME_LIMIT_MS,
+    SOLVER_MILP_GAP, SOLVER_ANNEAL_STEPS, SOLVER_ANNEAL_MOVES, SOLVER_ANNEAL_START_TEMP, SOLVER_ANNEAL_END_TEMP,
+    SOLVER_ANNEAL_MAX_DAYS
+)
+from models.catalog import MACRO_KEYS
+
+MATCH_WEIGHTS = ['calorie_match', 'protein_match', 'fat_match', 'carb_match']  # in MACRO_KEYS order
+SOLVER_NAMES = ('auto', 'ga', 'milp', 'anneal')  # values a request may ask for
+
+
+class GeneticSolver:
+    """The genetic algorithm as a planning engine."""
+
+    name = 'ga'
+    max_generations = GA_GENERATIONS
+
+    def __init__(self, ga):
+        self.ga = ga
+
+    def solve(self, target_nutrition, dietary_restrictions, days, time_budget_ms=None, progress_callback=None):
+        solution, stats = self.ga.evolve(
+            target_nutrition, dietary_restrictions, days, return_stats=True,
+            time_budget_ms=time_budget_ms, progress_callback=progress_callback
+        )
+        return solution, dict(stats, solver=self.name)
+
+    def solve_batch(self, targets, dietary_restrictions, days, time_budget_ms=None):
+        results = self.ga.evolve_batch(targets, dietary_restrictions, days, time_budget_ms=time_budget_ms)
+        return [(solution, dict(stats, solver=self.name)) for solution, stats in results]
+
+
+class MilpSolver:
+    """Exact planner: an integer program over how often each valid meal is used.
+
+    Fitness does not depend on which day or slot a meal sits in, so the
+    program picks integer counts n_m summing to 3 * days that minimize the
+    weighted relative macro deviation minus the variety bonus; variety is
+    modelled exactly by a continuous y_g <= min(1, uses of name g) per meal
+    name. Deviations are not capped at 100% as in the fitness function,
+    which only matters for plans off by more than the target itself.
+
+    The chosen meals are then spread over the days, heaviest first into the
+    day with the fewest calories so far, and ordered lightest to heaviest
+    within each day. Runs are deterministic; HiGHS stops at the time limit
+    with its best plan so far.
+    """
+
+    name = 'milp'
+    max_generations = 1  # a single solve
+
+    def __init__(self, ga):
+        self.ga = ga
+
+    def solve(self, target_nutrition, dietary_restrictions, days, time_budget_ms=None, progress_callback=None):
+        start = time.perf_counter()
+        valid = self.ga._valid_meal_array(dietary_restrictions)
+        if not len(valid):
+            raise ValueError("No meals match the dietary restrictions.")
+        if self.ga._macro_matrix is None:
+            self.ga._get_nutrition_matrix()
+        time_limit_ms = time_budget_ms if time_budget_ms is not None else SOLVER_MILP_TIME_LIMIT_MS
+
+        counts, status = self._solve_counts(valid, self.ga._target_total(target_nutrition, days), days,
+                                            start + time_limit_ms / 1000)
+        if counts is None:
+            return None, {'solver': self.name, 'stop_reason': status,
+                          'elapsed_ms': (time.perf_counter() - start) * 1000}
+
+        genes = self._assign_days(np.repeat(valid, counts), days)
+        best_fitness = float(self.ga.population_fitness(genes[None], target_nutrition, days)[0])
+        if progress_callback is not None:
+            progress_callback(1, best_fitness)
+        return self.ga._decode_individual(genes), {
+            'generations': 1,
+            'max_generations': self.max_generations,
+            'stop_reason': status,
+            'budget_exhausted': status == 'time_limit' and time_budget_ms is not None,
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+            'best_fitness': best_fitness,
+            'solver': self.name
+        }
+
+    def solve_batch(self, targets, dietary_restrictions, days, time_budget_ms=None):
+        return [self.solve(target, dietary_restrictions, days, time_budget_ms) for target in targets]
+
+    def _solve_counts(self, valid, target_total, days, deadline):
+        """(per-meal counts, 'optimal' or 'time_limit'), or (None, reason) without a feasible plan.
+
+        HiGHS gets whatever is left before deadline (a perf_counter time)
+        once the program is built.
+        """
+        if time.perf_counter() >= deadline:
+            return None, 'time_limit'
+        slots = days * len(MEAL_TYPES)
+        macros = self.ga._macro_matrix[valid]
+        _, name_idx = np.unique(self.ga.meal_name_ids[valid], return_inverse=True)
+        meals, names, keys = len(valid), name_idx.max() + 1, len(MACRO_KEYS)
+        weights = np.array([FITNESS_WEIGHTS[key] for key in MATCH_WEIGHTS]) / (target_total + 1e-6)
+
+        # Columns: meal counts, name indicators, macro overshoot, macro shortfall, and
+        # a variable fixed at 1. The objective is near zero for a good plan, where a
+        # relative gap never closes; the constant 1 lets SOLVER_MILP_GAP act on fitness.
+        def row_block(count, counts=None, indicators=None, over=None, under=None):
+            return sparse.hstack([
+                counts if counts is not None else sparse.csr_matrix((count, meals)),
+                indicators if indicators is not None else sparse.csr_matrix((count, names)),
+                over if over is not None else sparse.csr_matrix((count, keys)),
+                under if under is not None else sparse.csr_matrix((count, keys)),
+                sparse.csr_matrix((count, 1))
+            ])
+
+        uses = sparse.csr_matrix((np.ones(meals), (name_idx, np.arange(meals))), shape=(names, meals))
+        constraints = [
+            LinearConstraint(row_block(1, counts=np.ones((1, meals))), slots, slots),
+            LinearConstraint(row_block(keys, counts=macros.T, over=-sparse.eye(keys), under=sparse.eye(keys)),
+                             target_total, target_total),
+            LinearConstraint(row_block(names, counts=-uses, indicators=sparse.eye(names)), -np.inf, 0)
+        ]
+        cost = np.concatenate([
+            np.zeros(meals), np.full(names, -FITNESS_WEIGHTS['variety'] / slots), weights, weights, [1.0]
+        ])
+        bounds = Bounds(
+            np.concatenate([np.zeros(meals + names + 2 * keys), [1]]),
+            np.concatenate([np.full(meals, slots), np.ones(names), np.full(2 * keys, np.inf), [1]])
+        )
+        integrality = np.concatenate([np.ones(meals), np.zeros(names + 2 * keys + 1)])
+
+        time_limit = deadline - time.perf_counter()
+        if time_limit <= 0:
+            return None, 'time_limit'
+        result = milp(cost, constraints=constraints, integrality=integrality, bounds=bounds,
+                      options={'time_limit': time_limit, 'mip_rel_gap': SOLVER_MILP_GAP})
+        if result.x is None:
+            return None, 'infeasible' if result.status == 2 else 'time_limit'
+        return np.round(result.x[:meals]).astype(np.int64), 'optimal' if result.status == 0 else 'time_limit'
+
+    def _assign_days(self, meals, days):
+        """(days, 3) genes from 3 * days chosen meals with balanced daily calories."""
+        calories = self.ga._macro_matrix[meals, 0]
+        genes = np.empty((days, len(MEAL_TYPES)), dtype=np.int64)
+        day_calories = np.zeros(days)
+        filled = np.zeros(days, dtype=int)
+        for meal in np.argsort(-calories, kind='stable'):
+            open_days = np.flatnonzero(filled < len(MEAL_TYPES))
+            day = open_days[np.argmin(day_calories[open_days])]
+            genes[day, filled[day]] = meals[meal]
+            day_calories[day] += calories[meal]
+            filled[day] += 1
+        order = np.argsort(self.ga._macro_matrix[genes, 0], axis=1, kind='stable')
+        return np.take_along_axis(genes, order, axis=1)
+
+
+class AnnealingSolver:
+    """Simulated annealing over single meal swaps, for small low-latency requests.
+
+    One plan, seeded greedily, is improved move by move. Each step draws
+    SOLVER_ANNEAL_MOVES random (slot, meal) swaps and scores them together
+    from the plan's running macro totals and meal-name counts with the GA's
+    fitness, so a move costs the same whatever the plan length. The best
+    swap is taken if it does not lower fitness, otherwise with probability
+    exp(delta / temperature); the temperature falls geometrically from
+    SOLVER_ANNEAL_START_TEMP to SOLVER_ANNEAL_END_TEMP over the run.
+    """
+
+    name = 'anneal'
+
+    def __init__(self, ga, steps=SOLVER_ANNEAL_STEPS, moves=SOLVER_ANNEAL_MOVES):
+        self.ga = ga
+        self.steps = steps
+        self.moves = moves
+
+    @property
+    def max_generations(self):
+        return self.steps
+
+    def solve(self, target_nutrition, dietary_restrictions, days, time_budget_ms=None, progress_callback=None):
+        start = time.perf_counter()
+        deadline = start + time_budget_ms / 1000 if time_budget_ms is not None else None
+        ga = self.ga
+        valid = ga._valid_meal_array(dietary_restrictions)
+        if not len(valid):
+            raise ValueError("No meals match the dietary restrictions.")
+        if ga._macro_matrix is None:
+            ga._get_nutrition_matrix()
+        macros, names = ga._macro_matrix, ga.meal_name_ids
+        rng = ga._new_rngs(1)[0]
+        target_total = ga._target_total(target_nutrition, days)
+
+        plan = ga._greedy_individuals((target_total / days)[None], days, valid, rng)[0].reshape(-1)
+        totals = macros[plan].sum(axis=0)
+        name_counts = np.bincount(names[plan], minlength=int(names.max()) + 1)
+        distinct = np.count_nonzero(name_counts)
+        fitness = ga._combine(totals[None], np.array([distinct]), target_total, days)[0]
+        best_fitness, best_plan = fitness, plan.copy()
+
+        # All random draws up front; a step is then a handful of small array operations
+        slots = rng.integers(len(plan), size=(self.steps, self.moves))
+        meals = valid[rng.integers(len(valid), size=(self.steps, self.moves))]
+        accept = np.log(rng.random(self.steps))
+        temperatures = np.geomspace(SOLVER_ANNEAL_START_TEMP, SOLVER_ANNEAL_END_TEMP, self.steps)
+
+        stop_reason, step = 'max_steps', 0
+        for step in range(self.steps):
+            if deadline is not None and time.perf_counter() >= deadline:
+                stop_reason = 'time_budget'
+                break
+            old, new = plan[slots[step]], meals[step]
+            old_names, new_names = names[old], names[new]
+            candidate_totals = totals + macros[new] - macros[old]
+            candidate_distinct = distinct + (old_names != new_names) * (
+                (name_counts[new_names] == 0).astype(int) - (name_counts[old_names] == 1)
+            )
+            candidate_fitness = ga._combine(candidate_totals, candidate_distinct, target_total, days)
+            move = int(np.argmax(candidate_fitness))
+            delta = candidate_fitness[move] - fitness
+            if delta >= 0 or accept[step] < delta / temperatures[step]:
+                name_counts[old_names[move]] -= 1
+                name_counts[new_names[move]] += 1
+                plan[slots[step, move]] = new[move]
+                totals, distinct, fitness = candidate_totals[move], candidate_distinct[move], candidate_fitness[move]
+                if fitness > best_fitness:
+                    best_fitness, best_plan = fitness, plan.copy()
+        else:
+            step = self.steps
+
+        genes = best_plan.reshape(days, len(MEAL_TYPES))
+        # Report the fitness as calculate_fitness computes it, free of accumulated rounding
+        best_fitness = float(ga.population_fitness(genes[None], target_nutrition, days)[0])
+        if progress_callback is not None:
+            progress_callback(step, best_fitness)
+        return ga._decode_individual(genes), {
+            'generations': step,
+            'max_generations': self.steps,
+            'stop_reason': stop_reason,
+            'budget_exhausted': stop_reason == 'time_budget',
+            'elapsed_ms': (time.perf_counter() - start) * 1000,
+            'best_fitness': best_fitness,
+            'solver': self.name
+        }
+
+    def solve_batch(self, targets, dietary_restrictions, days, time_budget_ms=None):
+        return [self.solve(target, dietary_restrictions, days, time_budget_ms) for target in targets]
+
+
+class Planner:
+    """Picks a planning engine per request and falls back to the GA.
+
+    With engine 'auto' the MILP engine serves profiles whose valid-meal pool
+    has at most SOLVER_MILP_MAX_MEALS meals, annealing serves other plans of
+    at most SOLVER_ANNEAL_MAX_DAYS days and the GA the rest; 'ga', 'milp'
+    or 'anneal' forces one engine. All share the GA's restriction filtering
+    and return (solution, stats) like evolve(return_stats=True), with the
+    engine named in stats['solver']. An engine that finds no plan hands the
+    rest of the time budget to the GA. progress_callback, if given, is called
+    as progress_callback(generation, best_fitness, max_generations) with the
+    running engine's own generation limit.
+    """
+
+    def __init__(self, ga, engine=SOLVER_ENGINE):
+        self.ga = ga
+        self.engine = engine
+        self.engines = {
+            solver.name: solver for solver in (GeneticSolver(ga), MilpSolver(ga), AnnealingSolver(ga))
+        }
+
+    def choose(self, dietary_restrictions, days=None, engine=None):
+        engine = engine or self.engine
+        if engine == 'auto':
+            valid = self.ga._valid_meal_array(dietary_restrictions)
+            if 0 < len(valid) <= SOLVER_MILP_MAX_MEALS:
+                engine = 'milp'
+            elif days is not None and days <= SOLVER_ANNEAL_MAX_DAYS:
+                engine = 'anneal'
+            else:
+                engine = 'ga'
+        if engine not in self.engines:
+            raise ValueError(f"Unknown solver '{engine}'.")
+        return self.engines[engine]
+
+    def solve(self, target_nutrition, dietary_restrictions, days, time_budget_ms=None, progress_callback=None,
+              engine=None):
+        solver = self.choose(dietary_restrictions, days, engine)
+        solution, stats = solver.solve(target_nutrition, dietary_restrictions, days, time_budget_ms,
+                                       self._progress(solver, progress_callback))
+        if solution is None:
+            if time_budget_ms is not None:
+                time_budget_ms = max(time_budget_ms - stats['elapsed_ms'], 0)
+            fallback = self.engines['ga']
+            return fallback.solve(target_nutrition, dietary_restrictions, days, time_budget_ms,
+                                  self._progress(fallback, progress_callback))
+        return solution, stats
+
+    @staticmethod
+    def _progress(solver, progress_callback):
+        """The engine-level (generation, best_fitness) callback reporting solver's max_generations."""
+        if progress_callback is None:
+            return None
+        return lambda generation, best_fitness: progress_callback(generation, best_fitness, solver.max_generations)
+
+    def solve_batch(self, targets, dietary_restrictions, days, time_budget_ms=None, engine=None):
+        solver = self.choose(dietary_restrictions, days, engine)
+        if solver.name == 'ga':
+            return solver.solve_batch(targets, dietary_restrictions, days, time_budget_ms)
+        # Other engines solve one target at a time against one deadline for the
+        # whole group, so the batch stays within the budget like the GA's
+        start = time.perf_counter()
+        results = []
+        for target in targets:
+            remaining = None
+            if time_budget_ms is not None:
+                remaining = max(time_budget_ms - (time.perf_counter() - start) * 1000, 0)
+            results.append(self.solve(target, dietary_restrictions, days, remaining, engine=solver.name))
+        return results
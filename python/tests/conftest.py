@@ -66,3 +66,14 @@ def dietary_restrictions():
         'allergies': ['dairy'],
         'health_risks': ['High blood pressure']
     }
+
+@pytest.fixture
+def fitted_ga(sample_meal_data):
+    """Genetic algorithm over the preprocessed sample data with its fitted scaler"""
+    from models.data_preprocessor import DataPreprocessor
+    from models.genetic_algorithm import MealPlanGeneticAlgorithm
+
+    preprocessor = DataPreprocessor()
+    preprocessor.df = sample_meal_data.copy()
+    df_processed, scaler, _, _ = preprocessor.preprocess_data()
+    return MealPlanGeneticAlgorithm(df_processed, scaler=scaler)
@@ -0,0 +1,274 @@
+import shutil
+
+import pytest
+
+app_module = pytest.importorskip('app')
+
+
+@pytest.fixture
+def client():
+    app_module.plan_cache.clear()
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def plan_payload():
+    return {
+        'adjustedCalories': 2010,
+        'goal': 'Lose Weight',
+        'dietType': 'Vegetarian',
+        'allergies': ['Dairy'],
+        'healthRisks': ['High blood pressure'],
+        'days': 2
+    }
+
+
+class TestGenerateMealPlan:
+
+    def test_generate_meal_plan_structure(self, client, plan_payload):
+        """Endpoint returns one entry per day with breakfast, lunch and dinner"""
+        response = client.post('/generate-meal-plan', json=plan_payload)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert len(data['mealPlan']) == 2
+        for day in data['mealPlan']:
+            assert [list(meal)[0] for meal in day['meals']] == ['breakfast', 'lunch', 'dinner']
+        assert data['nutritionSummary']['totalDays'] == 2
+        assert data['searchStats']['generations'] <= data['searchStats']['maxGenerations']
+        assert data['searchStats']['solver'] in ('ga', 'milp', 'anneal')
+
+    def test_repeated_request_is_served_from_cache(self, client, plan_payload):
+        """Equivalent requests within one calorie bucket reuse the cached plan"""
+        first = client.post('/generate-meal-plan', json=plan_payload)
+        plan_payload['adjustedCalories'] = 1990
+        plan_payload['allergies'] = ['dairy']
+        second = client.post('/generate-meal-plan', json=plan_payload)
+
+        assert first.headers['X-Plan-Cache'] == 'miss'
+        assert second.headers['X-Plan-Cache'] == 'hit'
+        assert first.get_json() == second.get_json()
+
+    def test_server_timing_reports_phases(self, client, plan_payload):
+        """Misses report the search phases, hits only the cache lookup"""
+        miss = client.post('/generate-meal-plan', json=plan_payload)
+        hit = client.post('/generate-meal-plan', json=plan_payload)
+
+        def phases(response):
+            return [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+
+        assert phases(miss) == ['prepare', 'cache', 'solve', 'build', 'serialize', 'total']
+        assert phases(hit) == ['prepare', 'cache', 'serialize', 'total']
+
+    def test_different_days_is_a_cache_miss(self, client, plan_payload):
+        """Day count is part of the cache key"""
+        client.post('/generate-meal-plan', json=plan_payload)
+        plan_payload['days'] = 3
+        response = client.post('/generate-meal-plan', json=plan_payload)
+
+        assert response.headers['X-Plan-Cache'] == 'miss'
+        assert len(response.get_json()['mealPlan']) == 3
+
+    def test_time_budget_cut_short_plan_is_not_cached(self, client, plan_payload):
+        """Budget-limited plans report the cut-off and are not cached"""
+        plan_payload['timeBudgetMs'] = 1e-6
+        first = client.post('/generate-meal-plan', json=plan_payload)
+        second = client.post('/generate-meal-plan', json=plan_payload)
+
+        assert first.status_code == 200
+        assert first.get_json()['searchStats']['budgetExhausted'] is True
+        assert second.headers['X-Plan-Cache'] == 'miss'
+
+    def test_wrongly_typed_fields_are_rejected(self, client, plan_payload):
+        """Type errors in the payload are a JSON 400, not a server error"""
+        for field, value in (('adjustedCalories', '2000'), ('adjustedCalories', float('nan')),
+                             ('adjustedCalories', float('inf')), ('days', 0), ('days', 'two'), ('allergies', [1])):
+            response = client.post('/generate-meal-plan', json=dict(plan_payload, **{field: value}))
+
+            assert response.status_code == 400
+            assert field in response.get_json()['error']
+
+    def test_invalid_time_budget_is_rejected(self, client, plan_payload):
+        """Non-positive, non-finite and boolean budgets are a client error"""
+        for budget in (-5, float('nan'), float('inf'), True):
+            response = client.post('/generate-meal-plan', json=dict(plan_payload, timeBudgetMs=budget))
+
+            assert response.status_code == 400
+
+    def test_requested_solver_is_used(self, client, plan_payload):
+        """A request may pick the planning engine; unknown engines are a client error"""
+        plan_payload['solver'] = 'anneal'
+        response = client.post('/generate-meal-plan', json=plan_payload)
+        plan_payload['solver'] = 'simplex'
+        rejected = client.post('/generate-meal-plan', json=plan_payload)
+
+        assert response.get_json()['searchStats']['solver'] == 'anneal'
+        assert rejected.status_code == 400
+
+
+class TestReplanMealPlan:
+
+    def test_replan_replaces_only_requested_slots(self, client, plan_payload):
+        """A rejected dinner gets a new meal; the rest of the plan is kept"""
+        plan = client.post('/generate-meal-plan', json=plan_payload).get_json()['mealPlan']
+        ids = [{meal_type: meal[meal_type]['meal_id'] for meal in day['meals'] for meal_type in meal} for day in plan]
+
+        response = client.post('/replan-meal-plan', json=dict(
+            plan_payload, plan=ids, replace=[{'day': 2, 'meal': 'dinner'}]
+        ))
+
+        assert response.status_code == 200
+        data = response.get_json()
+        new_ids = [{meal_type: meal[meal_type]['meal_id'] for meal in day['meals'] for meal_type in meal}
+                   for day in data['mealPlan']]
+        assert new_ids[0] == ids[0]
+        assert new_ids[1]['breakfast'] == ids[1]['breakfast'] and new_ids[1]['lunch'] == ids[1]['lunch']
+        assert new_ids[1]['dinner'] != ids[1]['dinner']
+        assert data['searchStats']['stopReason'] == 'exhaustive'
+
+    def test_invalid_slots_are_rejected(self, client, plan_payload):
+        plan = [{'breakfast': 0, 'lunch': 1, 'dinner': 2}]
+        assert client.post('/replan-meal-plan', json=dict(plan_payload, plan=plan)).status_code == 400
+        assert client.post('/replan-meal-plan', json=dict(
+            plan_payload, plan=plan, replace=[{'day': 3}]
+        )).status_code == 400
+
+
+class TestGenerateMealPlans:
+
+    def test_batch_returns_plan_or_error_per_user(self, client, plan_payload):
+        """One bad payload does not fail the rest of the batch"""
+        vegan = dict(plan_payload, dietType='Vegan', adjustedCalories=2500)
+        other_order = dict(plan_payload, adjustedCalories=2600, allergies=['dairy'])
+        payloads = [plan_payload, {'goal': 'Lose Weight'}, vegan, other_order]
+
+        response = client.post('/generate-meal-plans', json=payloads)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        results = data['results']
+        assert [r['index'] for r in results] == [0, 1, 2, 3]
+        assert 'adjustedCalories' in results[1]['error']
+        for result in (results[0], results[2], results[3]):
+            assert len(result['mealPlan']) == plan_payload['days']
+        # Vegetarian users share one group, the vegan user gets another
+        assert data['groups'] == 2
+
+    def test_batch_reports_wrongly_typed_payloads(self, client, plan_payload):
+        """Wrong field types are per-user errors, not a failed batch"""
+        payloads = [
+            plan_payload,
+            dict(plan_payload, adjustedCalories='2000'),
+            dict(plan_payload, allergies=[1]),
+            dict(plan_payload, days=0),
+            dict(plan_payload, healthRisks='Diabetes')
+        ]
+
+        response = client.post('/generate-meal-plans', json=payloads)
+
+        assert response.status_code == 200
+        results = response.get_json()['results']
+        assert len(results[0]['mealPlan']) == plan_payload['days']
+        for result, field in zip(results[1:], ['adjustedCalories', 'allergies', 'days', 'healthRisks']):
+            assert field in result['error']
+
+    def test_batch_rejects_non_list_body(self, client):
+        """The batch body must be a list of payloads"""
+        response = client.post('/generate-meal-plans', json={'adjustedCalories': 2000})
+
+        assert response.status_code == 400
+
+
+class TestMealPlanJobs:
+
+    def test_submit_and_poll_job(self, client, plan_payload):
+        """POST /jobs returns an id at once; long-polling GET returns the plan"""
+        submitted = client.post('/jobs', json=plan_payload)
+
+        assert submitted.status_code == 202
+        job_id = submitted.get_json()['jobId']
+
+        job = client.get(f'/jobs/{job_id}?wait=10').get_json()
+        assert job['status'] == 'done'
+        assert len(job['result']['mealPlan']) == plan_payload['days']
+        assert job['progress'] == {} or job['progress']['generation'] >= 1
+
+    def test_job_progress_uses_the_solver_limit(self, client, plan_payload):
+        """Job progress reports the generation limit of the engine that ran"""
+        from config import SOLVER_ANNEAL_STEPS
+        payload = dict(plan_payload, solver='anneal', adjustedCalories=1850)
+        job_id = client.post('/jobs', json=payload).get_json()['jobId']
+
+        job = client.get(f'/jobs/{job_id}?wait=10').get_json()
+        assert job['status'] == 'done'
+        assert job['progress']['maxGenerations'] == SOLVER_ANNEAL_STEPS
+
+    def test_unknown_job_is_404(self, client):
+        """Unknown job ids are reported as not found"""
+        assert client.get('/jobs/does-not-exist').status_code == 404
+
+    def test_invalid_job_payload_is_rejected(self, client):
+        """Payload validation happens before a job is queued"""
+        assert client.post('/jobs', json={'goal': 'Lose Weight'}).status_code == 400
+
+
+class TestCatalogSwitching:
+
+    def test_missing_catalog_keeps_the_snapshot(self, client, plan_payload, monkeypatch, tmp_path):
+        """A catalog pointer whose target was deleted leaves the running snapshot in place"""
+        old = app_module.current_snapshot()
+        monkeypatch.setattr(app_module.preprocessor, 'catalog_home', str(tmp_path / 'deleted'))
+        monkeypatch.setattr(app_module, 'snapshot', old)
+
+        assert app_module.current_snapshot() is old
+        assert client.post('/generate-meal-plan', json=plan_payload).status_code == 200
+
+
+class TestAdminMeals:
+
+    @pytest.fixture
+    def admin_headers(self, monkeypatch, tmp_path):
+        """Admin token set and catalog updates redirected to a scratch copy of the catalog"""
+        home = tmp_path / 'catalog'
+        shutil.copytree(app_module.snapshot.catalog.directory, home / 'mapped')
+        monkeypatch.setattr(app_module.preprocessor, 'catalog_home', str(home))
+        monkeypatch.setattr(app_module, 'snapshot', app_module.snapshot)
+        monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'secret')
+        return {'X-Admin-Token': 'secret'}
+
+    def test_requires_admin_token(self, client):
+        """Without the configured token the endpoint refuses changes"""
+        assert client.post('/admin/meals', json={'remove': [0]}).status_code == 403
+
+    def test_add_and_remove_meals(self, client, admin_headers, plan_payload):
+        """Updates swap in a new catalog version that new requests use"""
+        old = app_module.current_snapshot()
+        meal = dict(old.catalog.record(0), meal_name='Test Bowl')
+
+        response = client.post('/admin/meals', json={'add': [meal], 'remove': [1]}, headers=admin_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        new = app_module.current_snapshot()
+        assert data['catalogVersion'] == new.version != old.version
+        assert data['addedIds'] == [len(old.catalog)]
+        assert data['meals'] == old.catalog.live_count
+        assert new.catalog.row(data['addedIds'][0])['meal_name'] == 'Test Bowl'
+        assert 1 not in new.ga._valid_meal_array({'allergies': [], 'health_risks': []})
+        assert client.post('/generate-meal-plan', json=plan_payload).status_code == 200
+
+    def test_remove_only_update(self, client, admin_headers):
+        """A meal can be retired without adding anything in the same call"""
+        old = app_module.current_snapshot()
+
+        response = client.post('/admin/meals', json={'remove': [0]}, headers=admin_headers)
+
+        assert response.status_code == 200
+        assert response.get_json()['meals'] == old.catalog.live_count - 1
+        assert 0 not in app_module.current_snapshot().ga._valid_meal_array({'allergies': [], 'health_risks': []})
+
+    def test_unknown_meal_is_404(self, client, admin_headers):
+        """Updating a meal id that does not exist is reported as not found"""
+        response = client.post('/admin/meals', json={'update': {'999999': {'calories': 100}}}, headers=admin_headers)
+
+        assert response.status_code == 404
@@ -0,0 +1,134 @@
+from models.cache import LRUCache
+from models.restriction_index import restriction_profile_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache:
+
+    def test_hit_and_miss_counts(self):
+        """Lookups are counted as hits or misses"""
+        cache = LRUCache(max_size=10, ttl=60)
+
+        assert cache.get('a') is None
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_evicts_least_recently_used(self):
+        """Cache stays within max_size, dropping the oldest unused entry"""
+        cache = LRUCache(max_size=2, ttl=None)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        assert len(cache) == 2
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.stats()['evictions'] == 1
+
+    def test_weighted_entries_bound_total_weight(self):
+        """With weigh, eviction keeps the summed weight of the values within max_size"""
+        cache = LRUCache(max_size=10, ttl=None, weigh=len)
+        cache.set('a', [0] * 4)
+        cache.set('b', [0] * 4)
+        cache.set('a', [0] * 2)  # replacing an entry swaps its weight
+        cache.set('c', [0] * 4)
+
+        assert len(cache) == 3
+        cache.set('d', [0] * 5)
+
+        assert cache.get('a') is None and cache.get('b') is None
+        assert len(cache) == 2
+        cache.set('e', [0] * 11)  # heavier than the whole cache: not kept
+        assert len(cache) == 0
+
+    def test_entries_expire_after_ttl(self):
+        """Entries older than the TTL are treated as misses"""
+        clock = FakeClock()
+        cache = LRUCache(max_size=10, ttl=5, clock=clock)
+        cache.set('a', 1)
+
+        clock.now = 4.9
+        assert cache.get('a') == 1
+        clock.now = 5.0
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+    def test_get_or_compute_only_computes_on_miss(self):
+        """get_or_compute calls the function once per key"""
+        cache = LRUCache(max_size=10, ttl=60)
+        calls = []
+
+        for _ in range(3):
+            value = cache.get_or_compute('k', lambda: calls.append(1) or 42)
+
+        assert value == 42
+        assert len(calls) == 1
+
+
+class TestRestrictionProfileKey:
+
+    def test_key_is_order_and_case_insensitive(self):
+        """Equivalent restriction profiles share one cache key"""
+        a = {'vegan': True, 'keto': False, 'allergies': ['nuts', 'Dairy'],
+             'health_risks': ['Diabetes', 'High blood pressure']}
+        b = {'vegan': True, 'allergies': ['dairy', 'nuts', 'nuts', 'unknown'],
+             'health_risks': ['High blood pressure', 'Diabetes']}
+
+        assert restriction_profile_key(a) == restriction_profile_key(b)
+        assert restriction_profile_key(a) != restriction_profile_key({'allergies': ['dairy']})
+
+
+def test_valid_meals_are_cached_per_profile(fitted_ga):
+    """The GA resolves each restriction profile once"""
+    fitted_ga._get_valid_meals({'vegetarian': True, 'allergies': ['dairy', 'soy']})
+    fitted_ga._get_valid_meals({'vegetarian': True, 'allergies': ['soy', 'dairy']})
+
+    stats = fitted_ga.valid_meals_cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+
+class TestDiskCache:
+
+    def test_values_survive_a_new_instance(self, tmp_path):
+        """Entries persist on disk across cache instances"""
+        from models.cache import DiskCache
+        DiskCache(str(tmp_path), ttl=60).set(('plan', 2000), {'mealPlan': [1, 2]})
+
+        assert DiskCache(str(tmp_path), ttl=60).get(('plan', 2000)) == {'mealPlan': [1, 2]}
+
+    def test_expired_and_excess_entries_are_dropped(self, tmp_path):
+        """Disk tier honours TTL and size bounds"""
+        from models.cache import DiskCache
+        expired = DiskCache(str(tmp_path / 'a'), ttl=-1)
+        expired.set('k', 1)
+        assert expired.get('k') is None
+
+        bounded = DiskCache(str(tmp_path / 'b'), max_size=2, ttl=60)
+        for key in range(4):
+            bounded.set(key, key)
+        assert len(list((tmp_path / 'b').glob('*.json'))) == 2
+
+    def test_tiered_cache_promotes_disk_hits(self, tmp_path):
+        """A value found only on disk is copied into memory"""
+        from models.cache import DiskCache, TieredCache
+        disk = DiskCache(str(tmp_path), ttl=60)
+        disk.set('k', 'v')
+        cache = TieredCache(LRUCache(max_size=10, ttl=60), disk)
+
+        assert cache.get('k') == 'v'
+        assert cache.memory.get('k') == 'v'
+        assert cache.stats()['disk_hits'] == 1
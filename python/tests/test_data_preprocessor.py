@@ -1,7 +1,9 @@
+import os
 import pytest
 import pandas as pd
 import numpy as np
 from models.data_preprocessor import DataPreprocessor
+from models.catalog import MealCatalog
 from unittest.mock import patch, mock_open
 
 class TestDataPreprocessor:
@@ -80,3 +82,247 @@ class TestDataPreprocessor:
 
         result = preprocessor.validate_data()
         assert result == False
+
+    def test_feature_extraction_matches_rowwise(self):
+        """Vectorized vitamin and allergen columns equal the per-row regex/apply results"""
+        import re
+        from config import COMMON_ALLERGENS
+        from models.data_preprocessor import vitamin_features, allergen_features
+
+        vitamins = pd.Series(['A, C', 'B6, B12', None, 'C, K, A', 'Niacin', 'B1'])
+        ingredients = pd.Series(['Oats, Milk', 'eggplant, salt', None, 'tofu, peanut butter', 'crab', '']).astype(str).str.lower()
+
+        names, vitamin_cols = vitamin_features(vitamins)
+        assert names == sorted({v.strip() for x in vitamins.dropna() for v in x.split(', ')})
+        for name in names:
+            expected = [1 if pd.notna(x) and name in str(x) else 0 for x in vitamins]
+            assert vitamin_cols[name].tolist() == expected
+
+        allergen_cols = allergen_features(ingredients)
+        for allergen, keywords in COMMON_ALLERGENS.items():
+            expected = [1 if re.search('|'.join(keywords), str(x)) else 0 for x in ingredients]
+            assert allergen_cols[allergen].tolist() == expected
+
+    def test_catalog_artifact_round_trip(self, sample_meal_data, tmp_path, monkeypatch):
+        """Second load comes from the compiled artifact and matches the fresh build"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        artifact_dir = str(tmp_path / 'catalog')
+
+        built_df, built_scaler, built_vitamins, _ = DataPreprocessor().load_or_build_catalog(artifact_dir)
+
+        with patch('pandas.read_csv') as mock_read_csv:
+            loaded = DataPreprocessor()
+            loaded_df, loaded_scaler, loaded_vitamins, _ = loaded.load_or_build_catalog(artifact_dir)
+            mock_read_csv.assert_not_called()
+
+        pd.testing.assert_frame_equal(built_df, loaded_df)
+        assert loaded_vitamins == built_vitamins
+        cols = list(built_scaler.feature_names_in_)
+        np.testing.assert_array_equal(built_scaler.inverse_transform(built_df[cols]),
+                                      loaded_scaler.inverse_transform(loaded_df[cols]))
+
+    def test_catalog_artifact_rebuilt_when_csv_changes(self, sample_meal_data, tmp_path, monkeypatch):
+        """Editing the CSV changes the fingerprint and replaces the old artifact"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        artifact_dir = tmp_path / 'catalog'
+
+        DataPreprocessor().load_or_build_catalog(str(artifact_dir))
+        old_fingerprint = DataPreprocessor().catalog_fingerprint()
+        sample_meal_data.iloc[:3].to_csv(csv_path, index=False)
+        df, _, _, _ = DataPreprocessor().load_or_build_catalog(str(artifact_dir))
+
+        assert DataPreprocessor().catalog_fingerprint() != old_fingerprint
+        assert len(df) == 3
+        assert len([p for p in artifact_dir.iterdir() if not p.name.startswith('.')]) == 1
+
+    def test_streamed_catalog_matches_batch(self, sample_meal_data, tmp_path, monkeypatch):
+        """Chunked ingestion writes the same catalog store as preprocessing the whole frame"""
+        from models.catalog import MealCatalog
+        data = pd.concat([sample_meal_data, sample_meal_data.iloc[:2]], ignore_index=True)
+        data.loc[5, 'meal_name'] = None
+        csv_path = tmp_path / 'meals.csv'
+        data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+
+        batch = DataPreprocessor()
+        batch.load_data()
+        df, scaler, vitamins, _ = batch.preprocess_data()
+        expected = MealCatalog.write(str(tmp_path / 'batch'), df, scaler)
+
+        streamed = DataPreprocessor()
+        catalog = streamed.stream_catalog(str(tmp_path / 'streamed'), chunksize=4)
+
+        assert streamed.vitamins == vitamins
+        np.testing.assert_array_equal(streamed.scaler.data_max_, scaler.data_max_)
+        for name in ['nutrition', 'nutrition_matrix', 'macro_matrix', 'flags', 'name_ids']:
+            np.testing.assert_array_equal(getattr(catalog, name), getattr(expected, name))
+        assert catalog.flag_cols == expected.flag_cols
+        assert catalog.text == expected.text
+
+    def test_streamed_artifact_is_kept(self, sample_meal_data, tmp_path, monkeypatch):
+        """Loading the frame over a streamed artifact preprocesses the CSV without replacing the artifact"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        monkeypatch.setattr('models.data_preprocessor.CATALOG_STREAMING', True)
+        artifact_dir = str(tmp_path / 'catalog')
+        catalog = DataPreprocessor().load_mapped_catalog(artifact_dir)
+        assert catalog._text is None  # the text fields are not loaded until needed
+
+        df, _, _, _ = DataPreprocessor().load_or_build_catalog(artifact_dir)
+
+        assert len(df) == len(catalog)
+        assert DataPreprocessor().load_mapped_catalog(artifact_dir).directory == catalog.directory
+        assert not os.path.exists(os.path.join(os.path.dirname(catalog.directory), 'catalog.pkl'))
+
+    def test_update_catalog_matches_rebuild(self, sample_meal_data, tmp_path, monkeypatch):
+        """Adding, updating and removing meals gives the values a full rebuild would"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        preprocessor = DataPreprocessor()
+        base = preprocessor.load_mapped_catalog(str(tmp_path / 'catalog'))
+
+        new_meal = dict(sample_meal_data.iloc[1], meal_name='Cheese Omelette', calories=900,
+                        ingredients='eggs, cheese, butter', vegetarian=1)
+        catalog, added_ids = preprocessor.update_catalog(add=[new_meal], update={0: {'calories': 180}},
+                                                         remove=[3])
+
+        assert len(catalog) == 5 and catalog.live.tolist() == [True, True, True, False, True]
+        assert added_ids == [4]
+        assert preprocessor.current_catalog_dir() == catalog.directory
+        assert catalog.fingerprint != base.fingerprint
+        # The new maximum moved the calorie range
+        assert catalog.scaler.data_max_[0] == 900
+
+        live_meals = sample_meal_data.iloc[[0, 1, 2]].copy()
+        live_meals.loc[0, 'calories'] = 180
+        expected_df = pd.concat([live_meals, pd.DataFrame([new_meal])], ignore_index=True)
+        expected = DataPreprocessor()
+        expected.df = expected_df
+        df, scaler, _, _ = expected.preprocess_data()
+        rebuilt = MealCatalog.write(str(tmp_path / 'rebuilt'), df, scaler)
+
+        rows = [0, 1, 2, 4]
+        np.testing.assert_allclose(catalog.nutrition_matrix[rows], rebuilt.nutrition_matrix)
+        np.testing.assert_allclose(catalog.nutrition[rows], rebuilt.nutrition, atol=1e-12)
+        np.testing.assert_array_equal(catalog.flags[rows], rebuilt.flags)
+        assert [catalog.row(i)['meal_name'] for i in rows] == rebuilt.text['meal_name']
+
+    def test_update_catalog_remove_only(self, sample_meal_data, tmp_path, monkeypatch):
+        """Retiring meals needs no added or updated rows and keeps the others unchanged"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        preprocessor = DataPreprocessor()
+        base = preprocessor.load_mapped_catalog(str(tmp_path / 'catalog'))
+
+        catalog, added_ids = preprocessor.update_catalog(remove=[3])
+
+        assert catalog.live.tolist() == [True, True, True, False] and added_ids == []
+        np.testing.assert_array_equal(catalog.nutrition_matrix, base.nutrition_matrix)
+        np.testing.assert_array_equal(catalog.flags, base.flags)
+
+    def test_rebuild_keeps_catalog_versions(self, sample_meal_data, tmp_path, monkeypatch):
+        """Recompiling the artifact swaps in a new build without dropping updated versions"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        preprocessor = DataPreprocessor()
+        base = preprocessor.load_mapped_catalog(str(tmp_path / 'catalog'))
+        updated, _ = preprocessor.update_catalog(remove=[3])
+
+        rebuilt = DataPreprocessor()
+        rebuilt.load_data()
+        rebuilt.preprocess_data()
+        rebuilt._save_artifact(str(tmp_path / 'catalog'), preprocessor.catalog_home, base.fingerprint)
+
+        assert preprocessor.current_catalog_dir() == updated.directory
+        assert MealCatalog(updated.directory).live.tolist() == [True, True, True, False]
+        # The replaced build is still mapped by base, so it is kept
+        assert os.path.exists(base.directory)
+
+    def test_updates_survive_a_new_fingerprint(self, sample_meal_data, tmp_path, monkeypatch):
+        """Logged changes are replayed onto the catalog rebuilt from an edited CSV"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        preprocessor = DataPreprocessor()
+        preprocessor.load_mapped_catalog(str(tmp_path / 'catalog'))
+        new_meal = dict(sample_meal_data.iloc[1], meal_name='Cheese Omelette', calories=900)
+        preprocessor.update_catalog(add=[new_meal], remove=[0])
+        preprocessor.update_catalog(update={4: {'calories': 950}})
+
+        pd.concat([sample_meal_data, sample_meal_data.iloc[[2]]]).to_csv(csv_path, index=False)
+        rebuilt = DataPreprocessor()
+        catalog = rebuilt.load_mapped_catalog(str(tmp_path / 'catalog'))
+
+        assert rebuilt.catalog_home != preprocessor.catalog_home
+        assert catalog.live.tolist() == [False, True, True, True, True, True]
+        # The added meal follows the CSV's new row
+        assert catalog.row(5)['meal_name'] == 'Cheese Omelette'
+        assert catalog.nutrition_matrix[5, 0] == 950
+        # Opening the home again does not apply the changes twice
+        assert len(DataPreprocessor().load_mapped_catalog(str(tmp_path / 'catalog'))) == 6
+
+    def test_rebuild_keeps_homes_in_use(self, sample_meal_data, tmp_path, monkeypatch):
+        """A new fingerprint only removes older artifacts no process has open"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        artifact_dir = str(tmp_path / 'catalog')
+        running = DataPreprocessor()
+        catalog = running.load_mapped_catalog(artifact_dir)
+
+        sample_meal_data.iloc[:3].to_csv(csv_path, index=False)
+        DataPreprocessor().load_mapped_catalog(artifact_dir)
+        assert os.path.exists(catalog.directory)
+
+        del catalog
+        sample_meal_data.iloc[:2].to_csv(csv_path, index=False)
+        DataPreprocessor().load_mapped_catalog(artifact_dir)
+        assert not os.path.exists(running.catalog_home)
+
+    def test_update_catalog_keeps_versions_in_use(self, sample_meal_data, tmp_path, monkeypatch):
+        """Superseded versions are only deleted once no catalog has them open"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        preprocessor = DataPreprocessor()
+        preprocessor.load_mapped_catalog(str(tmp_path / 'catalog'))
+        first, _ = preprocessor.update_catalog(remove=[0])
+        second, _ = preprocessor.update_catalog(remove=[1])
+        released = second.directory
+        del second
+
+        preprocessor.update_catalog(remove=[2])
+        preprocessor.update_catalog(remove=[3])
+
+        assert first.live.tolist() == [False, True, True, True]
+        assert os.path.exists(first.directory)
+        assert not os.path.exists(released)
+
+    def test_update_catalog_rejects_unknown_meal(self, sample_meal_data, tmp_path, monkeypatch):
+        """Updating or removing a meal id outside the catalog fails without publishing a version"""
+        csv_path = tmp_path / 'meals.csv'
+        sample_meal_data.to_csv(csv_path, index=False)
+        monkeypatch.setattr('models.data_preprocessor.DATA_PATH', str(csv_path))
+        monkeypatch.setattr('models.data_preprocessor.SCALER_SAVE_PATH', str(tmp_path / 'scaler.pkl'))
+        preprocessor = DataPreprocessor()
+        base = preprocessor.load_mapped_catalog(str(tmp_path / 'catalog'))
+
+        with pytest.raises(KeyError):
+            preprocessor.update_catalog(remove=[10])
+        assert preprocessor.current_catalog_dir() == base.directory
@@ -4,6 +4,8 @@ import numpy as np
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from models.genetic_algorithm import MealPlanGeneticAlgorithm
+from models.observers import GenerationCollector
+from config import GA_POPULATION_SIZE
 
 class TestGeneticAlgorithm:
 
@@ -139,3 +141,432 @@ class TestGeneticAlgorithm:
 
         assert len(mutated) == len(individual)
         assert isinstance(mutated, list)
+
+    def test_population_fitness_matches_per_meal_scoring(self, fitted_ga, target_nutrition):
+        """Batched fitness gives the same scores as scoring meal by meal"""
+        ga = fitted_ga
+        days = 2
+        population = [
+            [{'breakfast': 0, 'lunch': 1, 'dinner': 2}, {'breakfast': 3, 'lunch': 1, 'dinner': 0}],
+            [{'breakfast': 2, 'lunch': 2, 'dinner': 2}, {'breakfast': 2, 'lunch': 2, 'dinner': 2}],
+            [{'breakfast': 3, 'lunch': 0, 'dinner': 1}, {'breakfast': 1, 'lunch': 3, 'dinner': 2}],
+        ]
+
+        def reference_fitness(individual):
+            total = {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
+            meal_names = set()
+            for day_meals in individual:
+                for meal_idx in day_meals.values():
+                    meal = ga.meals.iloc[meal_idx]
+                    denorm = ga._denormalize_row(meal)
+                    for key in total:
+                        total[key] += denorm[key]
+                    meal_names.add(meal['meal_name'])
+            weights = {'calories': 0.4, 'protein': 0.3, 'fat': 0.1, 'carbs': 0.1}
+            fitness = 0
+            for key, weight in weights.items():
+                target = target_nutrition[key] * days
+                fitness += weight * max(0, 1 - abs(total[key] - target) / (target + 1e-6))
+            return fitness + 0.05 * len(meal_names) / (days * 3)
+
+        scores = ga.population_fitness(ga._encode_population(population), target_nutrition, days)
+
+        assert scores.shape == (3,)
+        for individual, score in zip(population, scores):
+            assert score == pytest.approx(reference_fitness(individual), rel=1e-12)
+            assert ga.calculate_fitness(individual, target_nutrition, days) == score
+
+    def test_evolve_array_engine(self, fitted_ga, target_nutrition):
+        """Array engine returns the day/meal-type structure and is reproducible with a seed"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        days = 3
+
+        plan = fitted_ga.evolve(target_nutrition, restrictions, days)
+
+        assert len(plan) == days
+        for day_meals in plan:
+            assert list(day_meals) == ['breakfast', 'lunch', 'dinner']
+            assert all(isinstance(idx, int) for idx in day_meals.values())
+        assert fitted_ga.population.shape[1:] == (days, 3)
+        assert fitted_ga.best_fitness == pytest.approx(
+            fitted_ga.calculate_fitness(plan, target_nutrition, days)
+        )
+
+        ga_a = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=7)
+        ga_b = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=7)
+        assert ga_a.evolve(target_nutrition, restrictions, days) == ga_b.evolve(target_nutrition, restrictions, days)
+
+    def test_population_operators_keep_shape(self, fitted_ga):
+        """Batched selection, crossover and mutation keep genes within the valid pool"""
+        rng = np.random.default_rng(0)
+        valid = np.array([1, 3])
+        population = valid[rng.integers(2, size=(10, 4, 3))]
+        fitness = rng.random(10)
+
+        next_population = fitted_ga._next_generation(population, fitness, valid, rng)
+
+        assert next_population.shape == population.shape
+        assert np.isin(next_population, valid).all()
+        # Elites are carried over unchanged
+        best = population[np.argmax(fitness)]
+        assert any((ind == best).all() for ind in next_population)
+
+    def test_get_valid_meals_with_health_risks(self, fitted_ga):
+        """Restriction index matches filtering each row on denormalized values"""
+        ga = fitted_ga
+        restrictions = {
+            'vegetarian': False,
+            'allergies': ['Soy'],
+            'health_risks': ['High blood pressure', 'Depression', 'Unknown risk']
+        }
+
+        expected = []
+        for idx in range(len(ga.meals)):
+            row = ga.meals.iloc[idx]
+            denorm = ga._denormalize_row(row)
+            if row['soy'] == 0 and denorm['sodium_mg'] <= 500 and denorm['omega3_g'] >= 0.5:
+                expected.append(idx)
+
+        assert ga._get_valid_meals(restrictions) == expected == [2]
+
+    def test_get_valid_meals_health_risks_need_fitted_scaler(self, sample_meal_data):
+        """Health-risk filtering without a fitted scaler still fails loudly"""
+        from sklearn.exceptions import NotFittedError
+        ga = MealPlanGeneticAlgorithm(sample_meal_data)
+
+        with pytest.raises(NotFittedError):
+            ga._get_valid_meals({'allergies': [], 'health_risks': ['Diabetes']})
+
+    def test_evolve_stops_early(self, fitted_ga, target_nutrition):
+        """Convergence criteria end the run early and report why"""
+        restrictions = {'allergies': [], 'health_risks': []}
+
+        _, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True,
+                                    stagnation_generations=3)
+        assert stats['stop_reason'] == 'stagnation'
+        assert stats['generations'] < stats['max_generations']
+        assert fitted_ga.last_run_stats == stats
+
+        _, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True,
+                                    stagnation_generations=None, fitness_target=0.0)
+        assert stats == dict(stats, generations=1, stop_reason='fitness_target')
+
+        _, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True,
+                                    stagnation_generations=None, min_diversity=1.1)
+        assert stats['stop_reason'] == 'diversity'
+
+        _, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True,
+                                    stagnation_generations=None)
+        assert stats['stop_reason'] == 'max_generations'
+        assert stats['generations'] == stats['max_generations']
+
+    def test_evolve_respects_time_budget(self, fitted_ga, target_nutrition):
+        """A tiny time budget returns the best plan so far and flags the cut-off"""
+        restrictions = {'allergies': [], 'health_risks': []}
+
+        plan, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True,
+                                       stagnation_generations=None, time_budget_ms=1e-6)
+
+        assert len(plan) == 2
+        assert stats['budget_exhausted'] is True
+        assert stats['stop_reason'] == 'time_budget'
+        assert stats['generations'] == 1
+
+        _, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True,
+                                    time_budget_ms=60000)
+        assert stats['budget_exhausted'] is False
+
+    def test_overlapping_runs_return_their_own_results(self, fitted_ga, target_nutrition, monkeypatch):
+        """A run that overlaps another on the same instance still returns its own plan and stats"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        ga = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=3, island_count=1)
+        inner = []
+        memo_stats = ga._memo_stats
+
+        def overlap(memos):
+            if not inner:  # a 2-day run finishes while the 3-day one is collecting its stats
+                inner.append(None)
+                inner[0] = ga.evolve(target_nutrition, restrictions, 2, return_stats=True)
+            return memo_stats(memos)
+        monkeypatch.setattr(ga, '_memo_stats', overlap)
+        plan, stats = ga.evolve(target_nutrition, restrictions, 3, return_stats=True)
+
+        assert len(plan) == 3 and len(inner[0][0]) == 2
+        assert stats['best_fitness'] == pytest.approx(ga.calculate_fitness(plan, target_nutrition, 3))
+
+    def test_single_island_matches_serial(self, fitted_ga, target_nutrition):
+        """One island is exactly the serial GA"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        serial = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=11)
+        island = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=11, island_count=1)
+
+        assert serial.evolve(target_nutrition, restrictions, 3) == \
+            island.evolve(target_nutrition, restrictions, 3, islands=1)
+        assert serial.best_fitness == island.best_fitness
+
+    def test_island_model_returns_global_best(self, fitted_ga, target_nutrition):
+        """Several islands evolve in worker processes and the best plan wins"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        ga = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=5, island_count=2)
+        try:
+            plan, stats = ga.evolve(target_nutrition, restrictions, 2, return_stats=True)
+        finally:
+            ga.close()
+
+        assert stats['islands'] == 2
+        assert len(plan) == 2
+        assert ga.best_fitness == pytest.approx(ga.calculate_fitness(plan, target_nutrition, 2))
+
+    def test_islands_use_instance_settings(self, fitted_ga, target_nutrition):
+        """Island workers and with_catalog() copies honor settings overridden on the instance"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        ga = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=5, island_count=2)
+        ga.repair_count = 0
+        try:
+            _, stats = ga.evolve(target_nutrition, restrictions, 2, return_stats=True)
+        finally:
+            ga.close()
+
+        assert stats['repairs'] == 0
+        assert ga.with_catalog(fitted_ga.meals).repair_count == 0
+
+    def test_islands_run_delta_check(self, fitted_ga, target_nutrition, monkeypatch):
+        """The delta fitness debug check also runs in island workers"""
+        import models.genetic_algorithm as genetic_algorithm
+        monkeypatch.setattr(genetic_algorithm, '_island_ga', None)
+        monkeypatch.setattr(genetic_algorithm, '_island_catalog_dir', None)
+        restrictions = {'allergies': [], 'health_risks': []}
+        valid = fitted_ga._valid_meal_array(restrictions)
+        state = fitted_ga._new_island(target_nutrition, 2, valid, fitted_ga._new_rngs(1)[0])
+        criteria = {'stagnation_generations': None, 'fitness_target': None, 'min_diversity': None}
+        genetic_algorithm._init_island_worker(fitted_ga._macro_matrix, fitted_ga.meal_name_ids)
+        # Corrupt full scoring, so only the check can notice
+        monkeypatch.setattr(MealPlanGeneticAlgorithm, '_score', lambda self, genes, *args: np.zeros(len(genes)))
+
+        settings = dict(fitted_ga._search_settings(), delta_fitness=True, delta_check=True)
+        with pytest.raises(RuntimeError):
+            genetic_algorithm._advance_island_task(state, target_nutrition, 2, valid, 3, criteria, None,
+                                                   settings=settings)
+
+    def test_migration_replaces_worst_individuals(self, fitted_ga):
+        """Ring migration moves each island's best into the next island"""
+        def island(values, fitness):
+            return {
+                'population': np.array(values).reshape(-1, 1, 3),
+                'fitness': np.array(fitness, dtype=float),
+                'best_genes': None,
+                'best_fitness': max(fitness),
+                'stop_reason': None
+            }
+
+        states = [island([[1] * 3, [2] * 3, [3] * 3], [0.1, 0.2, 0.9]),
+                  island([[4] * 3, [5] * 3, [6] * 3], [0.5, 0.3, 0.4])]
+        MealPlanGeneticAlgorithm._migrate(states)
+
+        assert 4 in states[0]['population'] and 1 not in states[0]['population']
+        assert 3 in states[1]['population'] and 5 not in states[1]['population']
+        assert states[1]['best_fitness'] == 0.9
+
+    def test_evolve_batch_one_plan_per_target(self, fitted_ga, target_nutrition):
+        """Batched evolution returns a plan and stats per target"""
+        targets = [target_nutrition, dict(target_nutrition, calories=1200), dict(target_nutrition, calories=3000)]
+
+        results = fitted_ga.evolve_batch(targets, {'allergies': [], 'health_risks': []}, 2)
+
+        assert len(results) == 3
+        for target, (plan, stats) in zip(targets, results):
+            assert len(plan) == 2
+            assert stats['batch_size'] == 3
+            assert stats['best_fitness'] == pytest.approx(fitted_ga.calculate_fitness(plan, target, 2))
+
+    def test_block_tournaments_stay_within_block(self, fitted_ga):
+        """Parents for each block are chosen from that block only"""
+        rng = np.random.default_rng(1)
+        fitness = np.array([[0.1, 0.9, 0.2, 0.3, 0.4, 0.5], [0.6, 0.2, 0.1, 0.3, 0.0, 0.4]])
+
+        parents = fitted_ga._select_parents(fitness, 8, rng)
+
+        assert parents.shape == (2, 8)
+        assert ((parents >= 0) & (parents < 6)).all()
+        # A tournament of 5 out of 6 always contains one of the two best
+        assert np.isin(parents[0], [1, 5]).all()
+        assert np.isin(parents[1], [0, 5]).all()
+
+    def test_mapped_catalog_matches_dataframe(self, fitted_ga, target_nutrition, tmp_path):
+        """A GA over the memory-mapped catalog finds the same plan as over the DataFrame"""
+        from models.catalog import MealCatalog
+        catalog = MealCatalog.write(str(tmp_path), fitted_ga.meals, fitted_ga.scaler)
+        restrictions = {'vegetarian': True, 'allergies': [], 'health_risks': ['High blood pressure']}
+
+        from_frame = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=3)
+        from_catalog = MealPlanGeneticAlgorithm(catalog, seed=3)
+
+        assert not from_catalog.nutrition_matrix.flags.writeable
+        np.testing.assert_array_equal(from_catalog.nutrition_matrix, from_frame.nutrition_matrix)
+        assert from_catalog.evolve(target_nutrition, restrictions, 2) == \
+            from_frame.evolve(target_nutrition, restrictions, 2)
+        assert catalog.row(0)['meal_name'] == fitted_ga.meals['meal_name'].iloc[0]
+
+    def test_island_workers_map_catalog(self, fitted_ga, target_nutrition, tmp_path):
+        """Island workers open the catalog files instead of receiving arrays"""
+        from models.catalog import MealCatalog
+        catalog = MealCatalog.write(str(tmp_path), fitted_ga.meals, fitted_ga.scaler)
+        ga = MealPlanGeneticAlgorithm(catalog, seed=5, island_count=2)
+        try:
+            plan = ga.evolve(target_nutrition, {'allergies': [], 'health_risks': []}, 2)
+        finally:
+            ga.close()
+
+        assert ga.best_fitness == pytest.approx(ga.calculate_fitness(plan, target_nutrition, 2))
+
+    def test_breeding_reports_day_sources(self, fitted_ga, monkeypatch):
+        """Without mutation every child day is a copy of the parent day it is attributed to"""
+        monkeypatch.setattr('models.genetic_algorithm.GA_MUTATION_RATE', 0.0)
+        rng = np.random.default_rng(2)
+        valid = np.arange(len(fitted_ga.meals))
+        population = fitted_ga._random_population(5, valid, rng)
+        fitness = rng.random(len(population))
+
+        children, source = fitted_ga._breed_blocks(population[None], fitness[None], valid, rng)
+
+        assert source.shape == children.shape[:3]
+        np.testing.assert_array_equal(children[0], population[source[0], np.arange(5)])
+
+    def test_delta_fitness_matches_full_recomputation(self, fitted_ga, target_nutrition, monkeypatch):
+        """Delta-scored runs pass the debug check and find the same plan as full scoring"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        delta = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=9)
+        delta.delta_check = True
+        full = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=9)
+        full.delta_fitness = False
+
+        assert delta.evolve(target_nutrition, restrictions, 3) == full.evolve(target_nutrition, restrictions, 3)
+        assert delta.best_fitness == pytest.approx(full.best_fitness)
+
+    def test_fitness_memo_reuses_scores(self, fitted_ga, target_nutrition):
+        """A memoized run finds the same plan and reports the re-scoring it skipped"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        memoized = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=4)
+        memoized.fitness_memo_size = 100
+        plain = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=4)
+        plain.fitness_memo_size = 0
+
+        _, stats = memoized.evolve(target_nutrition, restrictions, 3, return_stats=True)
+        assert memoized.best_solution == plain.evolve(target_nutrition, restrictions, 3)
+
+        memo = stats['fitness_memo']
+        assert memo['hits'] > 0  # elites are carried over unchanged
+        assert memo['hits'] + memo['misses'] == stats['generations'] * GA_POPULATION_SIZE
+        assert memo['hit_rate'] == pytest.approx(memo['hits'] / (memo['hits'] + memo['misses']))
+        assert memo['size'] <= 100
+        assert plain.last_run_stats['fitness_memo']['hits'] == 0
+
+    def test_replan_searches_only_free_slots(self, fitted_ga, target_nutrition):
+        """Fixed meals are kept, freed slots get new meals, and the result is no worse than random"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        plan = fitted_ga.evolve(target_nutrition, restrictions, 3)
+
+        new_plan, stats = fitted_ga.replan(plan, [(1, None), (2, 'lunch')], target_nutrition, restrictions,
+                                           return_stats=True)
+
+        assert new_plan[0] == plan[0]
+        assert all(new_plan[1][meal_type] != plan[1][meal_type] for meal_type in new_plan[1])
+        assert new_plan[2]['lunch'] != plan[2]['lunch']
+        assert new_plan[2]['breakfast'] == plan[2]['breakfast'] and new_plan[2]['dinner'] == plan[2]['dinner']
+        assert stats['slots'] == 4 and stats['generations'] <= stats['max_generations']
+        assert stats['best_fitness'] == pytest.approx(fitted_ga.calculate_fitness(new_plan, target_nutrition, 3))
+
+    def test_replan_single_slot_is_exhaustive(self, fitted_ga, target_nutrition):
+        """One free slot gets the best-scoring replacement among all candidates"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        plan = fitted_ga.evolve(target_nutrition, restrictions, 2)
+
+        new_plan = fitted_ga.replan(plan, [(0, 'dinner')], target_nutrition, restrictions)
+
+        scores = {
+            meal: fitted_ga.calculate_fitness([dict(plan[0], dinner=meal), plan[1]], target_nutrition, 2)
+            for meal in range(len(fitted_ga.meals)) if meal != plan[0]['dinner']
+        }
+        assert fitted_ga.calculate_fitness(new_plan, target_nutrition, 2) == pytest.approx(max(scores.values()))
+
+    def test_greedy_seeds_start_closer_to_target(self, fitted_ga, target_nutrition, monkeypatch):
+        """Seeded days use valid meals and land closer to the daily macros than random days"""
+        monkeypatch.setattr('models.genetic_algorithm.GA_SEED_CANDIDATES', 1)
+        rng = np.random.default_rng(5)
+        valid = fitted_ga._valid_meal_array({'allergies': [], 'health_risks': []})
+        daily = fitted_ga._target_total(target_nutrition, 1)
+
+        seeded = fitted_ga._greedy_individuals(np.tile(daily, (20, 1)), 3, valid, rng)
+        random_genes = valid[rng.integers(len(valid), size=seeded.shape)]
+
+        def day_error(genes):
+            return (np.abs(fitted_ga._day_totals(genes) - daily) / daily).sum(axis=-1).mean()
+
+        assert np.isin(seeded, valid).all()
+        assert day_error(seeded) < day_error(random_genes)
+
+        fitted_ga.seed_fraction = 0
+        population = fitted_ga._random_population(3, valid, rng, daily)
+        assert population.shape == (GA_POPULATION_SIZE, 3, 3)
+
+    def test_repair_only_improves_best_individuals(self, fitted_ga, target_nutrition):
+        """Repair never lowers fitness, keeps meals valid and reports the true fitness"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        rng = np.random.default_rng(3)
+        valid = fitted_ga._valid_meal_array(restrictions)
+        population = fitted_ga._random_population(3, valid, rng)
+        target_total = fitted_ga._target_total(target_nutrition, 3)
+        fitness = fitted_ga._score(population, target_total, 3)
+        state = {'population': population.copy(), 'fitness': fitness.copy(), 'cache': None}
+
+        fitted_ga._repair(state, target_total, 3, fitted_ga._macro_index(valid))
+
+        assert (state['fitness'] >= fitness).all()
+        assert np.isin(state['population'], valid).all()
+        np.testing.assert_allclose(state['fitness'], fitted_ga._score(state['population'], target_total, 3))
+
+    def test_meals_filling_gap_respects_restrictions(self, fitted_ga):
+        restrictions = {'vegetarian': True, 'allergies': [], 'health_risks': []}
+        valid = fitted_ga._valid_meal_array(restrictions).tolist()
+
+        meals = fitted_ga.meals_filling_gap({'calories': 300, 'protein': 20, 'fat': 10, 'carbs': 30}, restrictions, 10)
+
+        assert sorted(meals) == sorted(valid)
+
+    def test_observers_get_one_record_per_generation(self, fitted_ga, target_nutrition):
+        """Observers see every bred generation with its statistics and phase timings"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        collector = GenerationCollector()
+        fitted_ga.add_observer(collector)
+        try:
+            _, stats = fitted_ga.evolve(target_nutrition, restrictions, 2, return_stats=True)
+            fitted_ga.evolve(target_nutrition, restrictions, 2)
+        finally:
+            fitted_ga.remove_observer(collector)
+
+        first = [record for record in collector.records if record['run'] == collector.records[0]['run']]
+        assert [record['generation'] for record in first] == list(range(2, stats['generations'] + 1))
+        assert first[-1]['best_fitness'] == stats['best_fitness']
+        for record in first:
+            assert record['mean_fitness'] <= record['best_fitness']
+            assert 0 < record['diversity'] <= 1
+            assert {'selection', 'crossover', 'mutation', 'fitness'} <= set(record['phase_ms'])
+        assert collector.summary()['runs'] == 2
+
+        seen = len(collector.records)
+        fitted_ga.evolve(target_nutrition, restrictions, 2)
+        assert len(collector.records) == seen  # removed observers are no longer called
+
+    def test_island_observers_get_worker_records(self, fitted_ga, target_nutrition):
+        """Records from island workers reach observers in the parent process"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        ga = MealPlanGeneticAlgorithm(fitted_ga.meals, scaler=fitted_ga.scaler, seed=5, island_count=2)
+        collector = GenerationCollector()
+        ga.add_observer(collector)
+        try:
+            _, stats = ga.evolve(target_nutrition, restrictions, 2, return_stats=True)
+        finally:
+            ga.close()
+
+        assert {record['island'] for record in collector.records} == {0, 1}
+        assert max(record['generation'] for record in collector.records) == stats['generations']
@@ -0,0 +1,59 @@
+import threading
+import pytest
+from models.jobs import JobManager, JobQueueFull
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestJobManager:
+
+    def test_job_runs_and_reports_progress(self):
+        """A submitted task runs in the background and its result is kept"""
+        manager = JobManager(max_workers=1)
+
+        def task(progress):
+            progress(generation=3, bestFitness=0.5)
+            return {'ok': True}
+
+        job_id = manager.submit(task)
+        job = manager.get(job_id, wait=5)
+
+        assert job['status'] == 'done'
+        assert job['result'] == {'ok': True}
+        assert job['progress'] == {'generation': 3, 'bestFitness': 0.5}
+        manager.shutdown()
+
+    def test_failed_job_keeps_error(self):
+        """Exceptions mark the job as failed instead of being lost"""
+        manager = JobManager(max_workers=1)
+
+        def task(progress):
+            raise ValueError("No meals match the dietary restrictions.")
+
+        job = manager.get(manager.submit(task), wait=5)
+
+        assert job['status'] == 'failed'
+        assert 'No meals match' in job['error']
+        manager.shutdown()
+
+    def test_pending_limit_and_expiry(self):
+        """Submissions beyond max_pending are refused and results expire after the TTL"""
+        clock = FakeClock()
+        release = threading.Event()
+        manager = JobManager(max_workers=1, max_pending=1, ttl=10, clock=clock)
+
+        job_id = manager.submit(lambda progress: release.wait(5))
+        with pytest.raises(JobQueueFull):
+            manager.submit(lambda progress: None)
+
+        release.set()
+        assert manager.get(job_id, wait=5)['status'] == 'done'
+        clock.now = 10
+        assert manager.get(job_id) is None
+        manager.shutdown()
@@ -0,0 +1,23 @@
+import numpy as np
+from models.macro_index import MacroIndex
+
+
+class TestMacroIndex:
+
+    def test_nearest_matches_brute_force(self):
+        """Neighbours are the closest indexed meals in scaled L1 distance, nearest first"""
+        rng = np.random.default_rng(0)
+        macros = rng.uniform(1, 100, size=(200, 4))
+        meal_ids = np.arange(0, 200, 2)
+        index = MacroIndex(macros, meal_ids)
+        queries = rng.uniform(1, 100, size=(5, 4))
+
+        found = index.nearest(queries, k=3)
+
+        distance = (np.abs(queries[:, None] - macros[meal_ids]) / index.scale).sum(axis=2)
+        np.testing.assert_array_equal(found, meal_ids[np.argsort(distance, axis=1)[:, :3]])
+
+    def test_k_is_capped_at_index_size(self):
+        index = MacroIndex(np.array([[1., 2, 3, 4], [5, 6, 7, 8]]), [1])
+
+        assert index.nearest([5, 6, 7, 8], k=4).tolist() == [1]
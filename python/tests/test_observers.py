@@ -0,0 +1,44 @@
+import pytest
+from models.observers import GenerationCollector, PhaseClock
+
+
+def record(run, generation, best, phase_ms):
+    return {'run': run, 'island': 0, 'generation': generation, 'best_fitness': best, 'mean_fitness': best / 2,
+            'diversity': 1.0, 'repairs': 0, 'phase_ms': phase_ms}
+
+
+class TestGenerationCollector:
+
+    def test_summary_aggregates_phases_and_convergence(self):
+        collector = GenerationCollector()
+        collector(record(1, 2, 0.4, {'fitness': 3.0, 'mutation': 1.0}))
+        collector(record(1, 3, 0.6, {'fitness': 5.0, 'mutation': 1.0}))
+        collector(record(2, 2, 0.6, {'fitness': 2.0, 'selection': 4.0}))
+
+        summary = collector.summary()
+
+        assert summary['runs'] == 2
+        assert summary['generations'] == 3
+        assert list(summary['phase_ms']) == ['fitness', 'selection', 'mutation']
+        assert summary['phase_ms']['fitness'] == {'total': 10.0, 'mean': pytest.approx(10 / 3), 'share': 10 / 16}
+        assert [(point['generation'], point['best_fitness']) for point in summary['convergence']] == \
+            [(2, pytest.approx(0.5)), (3, 0.6)]
+
+    def test_empty_and_cleared(self):
+        collector = GenerationCollector()
+        collector(record(1, 2, 0.4, {'fitness': 1.0}))
+        collector.clear()
+
+        assert collector.summary() == {'runs': 0, 'generations': 0, 'phase_ms': {}, 'convergence': []}
+
+
+class TestPhaseClock:
+
+    def test_laps_accumulate_per_phase(self):
+        clock = PhaseClock()
+        clock.lap('a')
+        clock.lap('b')
+        clock.lap('a')
+
+        assert set(clock.seconds) == {'a', 'b'}
+        assert all(seconds >= 0 for seconds in clock.seconds.values())
@@ -0,0 +1,130 @@
+import itertools
+import time
+import pytest
+from models.solvers import Planner, MilpSolver, AnnealingSolver
+
+
+class TestMilpSolver:
+
+    def test_plan_is_optimal(self, fitted_ga, target_nutrition):
+        """On a catalog small enough to enumerate, the MILP finds the best plan"""
+        restrictions = {'allergies': [], 'health_risks': []}
+        solution, stats = MilpSolver(fitted_ga).solve(target_nutrition, restrictions, 2)
+
+        best = max(
+            fitted_ga.calculate_fitness([dict(zip(['breakfast', 'lunch', 'dinner'], meals[:3])),
+                                         dict(zip(['breakfast', 'lunch', 'dinner'], meals[3:]))],
+                                        target_nutrition, 2)
+            for meals in itertools.combinations_with_replacement(range(len(fitted_ga.meals)), 6)
+        )
+        assert stats['stop_reason'] == 'optimal'
+        assert stats['best_fitness'] == pytest.approx(fitted_ga.calculate_fitness(solution, target_nutrition, 2))
+        assert stats['best_fitness'] == pytest.approx(best, abs=1e-3)
+
+    def test_respects_restrictions_and_is_deterministic(self, fitted_ga, target_nutrition):
+        restrictions = {'vegetarian': True, 'allergies': [], 'health_risks': []}
+        valid = set(fitted_ga._valid_meal_array(restrictions).tolist())
+        solver = MilpSolver(fitted_ga)
+
+        solution, _ = solver.solve(target_nutrition, restrictions, 3)
+
+        assert len(solution) == 3
+        assert {meal for day in solution for meal in day.values()} <= valid
+        assert solver.solve(target_nutrition, restrictions, 3)[0] == solution
+
+
+class TestAnnealingSolver:
+
+    def test_plan_is_valid_and_scored_like_the_ga(self, fitted_ga, target_nutrition):
+        restrictions = {'vegetarian': True, 'allergies': [], 'health_risks': []}
+        valid = set(fitted_ga._valid_meal_array(restrictions).tolist())
+
+        solution, stats = AnnealingSolver(fitted_ga, steps=50).solve(target_nutrition, restrictions, 3)
+
+        assert len(solution) == 3
+        assert {meal for day in solution for meal in day.values()} <= valid
+        assert stats['stop_reason'] == 'max_steps'
+        assert stats['generations'] == 50
+        assert stats['best_fitness'] == pytest.approx(fitted_ga.calculate_fitness(solution, target_nutrition, 3))
+
+    def test_time_budget_stops_early(self, fitted_ga, target_nutrition):
+        restrictions = {'allergies': [], 'health_risks': []}
+        solution, stats = AnnealingSolver(fitted_ga, steps=10 ** 6).solve(target_nutrition, restrictions, 2,
+                                                                          time_budget_ms=20)
+
+        assert len(solution) == 2
+        assert stats['stop_reason'] == 'time_budget'
+        assert stats['budget_exhausted']
+        assert stats['generations'] < 10 ** 6
+
+
+class TestPlanner:
+
+    def test_policy_picks_engine_by_pool_size(self, fitted_ga, monkeypatch):
+        restrictions = {'allergies': [], 'health_risks': []}
+        planner = Planner(fitted_ga, engine='auto')
+
+        assert planner.choose(restrictions).name == 'milp'
+        monkeypatch.setattr('models.solvers.SOLVER_MILP_MAX_MEALS', 2)
+        assert planner.choose(restrictions).name == 'ga'
+        assert planner.choose(restrictions, days=3).name == 'anneal'
+        assert planner.choose(restrictions, days=7).name == 'ga'
+        assert planner.choose(restrictions, engine='milp').name == 'milp'
+        with pytest.raises(ValueError):
+            planner.choose(restrictions, engine='simplex')
+
+    def test_engines_share_output_format(self, fitted_ga, target_nutrition):
+        restrictions = {'allergies': [], 'health_risks': []}
+        planner = Planner(fitted_ga)
+
+        for engine in ('ga', 'milp', 'anneal'):
+            solution, stats = planner.solve(target_nutrition, restrictions, 2, engine=engine)
+            assert [sorted(day) for day in solution] == [['breakfast', 'dinner', 'lunch']] * 2
+            assert stats['solver'] == engine
+            assert {'generations', 'max_generations', 'stop_reason', 'budget_exhausted', 'elapsed_ms',
+                    'best_fitness'} <= set(stats)
+
+    def test_progress_reports_the_engine_limit(self, fitted_ga, target_nutrition):
+        restrictions = {'allergies': [], 'health_risks': []}
+        planner = Planner(fitted_ga)
+        calls = []
+
+        planner.solve(target_nutrition, restrictions, 2, engine='milp',
+                      progress_callback=lambda *args: calls.append(args))
+
+        assert [max_generations for _, _, max_generations in calls] == [1]
+
+    def test_default_engine_is_ga(self, fitted_ga):
+        assert Planner(fitted_ga).choose({'allergies': [], 'health_risks': []}).name == 'ga'
+
+    def test_fallback_gets_the_remaining_budget(self, fitted_ga, target_nutrition, monkeypatch):
+        restrictions = {'allergies': [], 'health_risks': []}
+        planner = Planner(fitted_ga)
+        monkeypatch.setattr(planner.engines['milp'], 'solve',
+                            lambda *args: (None, {'solver': 'milp', 'stop_reason': 'time_limit', 'elapsed_ms': 30}))
+        budgets = []
+        ga_solve = planner.engines['ga'].solve
+        monkeypatch.setattr(planner.engines['ga'], 'solve',
+                            lambda target, restrictions, days, budget, callback: budgets.append(budget) or
+                            ga_solve(target, restrictions, days, budget, callback))
+
+        solution, stats = planner.solve(target_nutrition, restrictions, 2, time_budget_ms=50, engine='milp')
+
+        assert stats['solver'] == 'ga' and len(solution) == 2
+        assert budgets == [20]
+
+    def test_batch_shares_one_budget(self, fitted_ga, target_nutrition, monkeypatch):
+        restrictions = {'allergies': [], 'health_risks': []}
+        planner = Planner(fitted_ga)
+        budgets = []
+
+        def solve(target, restrictions, days, budget, callback):
+            budgets.append(budget)
+            time.sleep(0.02)
+            return [{}] * days, {'solver': 'anneal', 'elapsed_ms': 20}
+        monkeypatch.setattr(planner.engines['anneal'], 'solve', solve)
+
+        planner.solve_batch([target_nutrition] * 4, restrictions, 2, time_budget_ms=50, engine='anneal')
+
+        assert budgets[0] <= 50 and budgets[1] <= 30
+        assert budgets[-1] == 0
@@ -2,6 +2,7 @@
 
 from models.genetic_algorithm import MealPlanGeneticAlgorithm
 from models.data_preprocessor import DataPreprocessor
+import logging
 import random
 import pickle
 from config import COMMON_ALLERGENS, DIET_TYPE_MAPPING, DEFAULT_NUTRITION_TARGETS, SCALER_SAVE_PATH
@@ -50,9 +51,9 @@ def train_genetic_algorithm(ga, num_training_cases=50):
         print(f"Error saving model: {e}")
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')  # GA progress every GA_LOG_INTERVAL generations
     preprocessor = DataPreprocessor()
-    df = preprocessor.load_data()
-    df, scaler, vitamins, diet_cols = preprocessor.preprocess_data()
+    df, scaler, vitamins, diet_cols = preprocessor.load_or_build_catalog()
 
     ga = MealPlanGeneticAlgorithm(df)
     ga.scaler = scaler  # inject for accurate calculations